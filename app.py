@@ -1,227 +1,1721 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context, g, has_request_context
 from flask_cors import CORS
-from functools import wraps
-import requests
-from bs4 import BeautifulSoup
+from functools import wraps, lru_cache
 import os
 import sys
 import json
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from openai import OpenAI
-from urllib.parse import urlparse, parse_qs
-import redis
+from datetime import datetime, timedelta, timezone
 from collections import Counter
-import pytz
+from contextlib import contextmanager
+from contextvars import ContextVar
+import math
+import time
+import threading
+import random
+import atexit
+from types import SimpleNamespace
 
-# 🇰🇷 한국 시간대 설정
-KST = pytz.timezone('Asia/Seoul')
+# 🇰🇷 한국 시간대 설정 (서머타임 없음 → 고정 UTC+9, pytz 임포트 비용 제거)
+KST = timezone(timedelta(hours=9), 'KST')
 
 def get_kst_now():
     """한국 시간(KST) 현재 시각 반환"""
     return datetime.now(KST)
 
-# Vercel Serverless 환경에서도 로그가 보이도록 설정
-def log(message, level="INFO"):
-    """Vercel에서도 보이는 로그 출력"""
-    timestamp = get_kst_now().strftime('%H:%M:%S')
-    formatted_message = f"[{timestamp}] {level}: {message}"
-    print(formatted_message, flush=True)
-    sys.stdout.flush()
-    sys.stderr.flush()
+# ============================
+# 📝 구조화 로깅 (JSON lines)
+# ============================
+# log()는 레코드를 만들어 큐에 넣기만 하고, JSON 직렬화와 stdout 쓰기는 QueueListener 스레드가 담당
+# (기존: 호출마다 print + stdout/stderr flush → 요청당 수십 번의 동기 쓰기)
+# - LOG_LEVEL: DEBUG / INFO / WARNING / ERROR (기본 INFO)
+# - LOG_FORMAT: json (기본) / text (로컬 개발용 '[시각] 카테고리: 메시지')
+# - LOG_SAMPLE_RATES: 카테고리별 샘플링 비율 (기본 ANALYTICS=0.1,CACHE=0.1,AI=1). WARNING 이상은 항상 기록
+# - LOG_ASYNC: 백그라운드 출력 여부 (기본: Vercel에서는 0 - 응답 후 함수가 멈추면 큐에 남은 로그가 유실되므로)
+
+import logging
+import logging.handlers
+
+LOG_LEVEL = logging.getLevelName(os.environ.get('LOG_LEVEL', 'INFO').upper())
+if not isinstance(LOG_LEVEL, int):
+    LOG_LEVEL = logging.INFO
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+LOG_ASYNC = os.environ.get('LOG_ASYNC', '0' if os.environ.get('VERCEL') else '1') == '1'
+
+# 두 번째 인자가 이 이름이면 심각도로, 그 외(AI, CACHE, ...)는 INFO 카테고리로 취급
+LOG_SEVERITIES = {'DEBUG': logging.DEBUG, 'INFO': logging.INFO, 'WARNING': logging.WARNING, 'ERROR': logging.ERROR}
+
+def parse_log_sample_rates(spec):
+    """'ANALYTICS=0.1,CACHE=0.1' → {'ANALYTICS': 0.1, 'CACHE': 0.1} (잘못된 항목은 무시)"""
+    rates = {}
+    for item in spec.split(','):
+        name, _, value = item.partition('=')
+        try:
+            rates[name.strip().upper()] = min(max(float(value), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+LOG_SAMPLE_RATES = parse_log_sample_rates(os.environ.get('LOG_SAMPLE_RATES', 'ANALYTICS=0.1,CACHE=0.1,AI=1'))
+
+class JsonLogFormatter(logging.Formatter):
+    """레코드 → 한 줄 JSON ({ts, level, category, msg, request_id, ...필드})"""
+    
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, KST).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'category': record.category,
+            'msg': record.getMessage(),
+        }
+        if record.request_id:
+            entry['request_id'] = record.request_id
+        if record.sample_rate < 1:
+            entry['sample_rate'] = record.sample_rate  # 집계 시 1/sample_rate 배로 환산
+        for key, value in record.fields.items():
+            entry.setdefault(key, value)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextLogFormatter(logging.Formatter):
+    """기존 print 로그와 같은 형식 (로컬 개발용)"""
+    
+    def format(self, record):
+        timestamp = datetime.fromtimestamp(record.created, KST).strftime('%H:%M:%S')
+        line = f"[{timestamp}] {record.category}: {record.getMessage()}"
+        if record.fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in record.fields.items())
+        if record.request_id:
+            line += f' (req={record.request_id})'
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+def _make_log_record(item):
+    """log()가 만든 튜플 → LogRecord (비동기 모드에서는 리스너 스레드에서 실행)"""
+    created, levelno, category, message, fields, sample_rate, request_id, exc_text = item
+    record = logging.LogRecord('repost', levelno, '', 0, message, None, None)
+    record.created = created
+    record.category = category
+    record.fields = fields
+    record.sample_rate = sample_rate
+    record.request_id = request_id
+    record.exc_text = exc_text
+    return record
+
+class _TupleQueueListener(logging.handlers.QueueListener):
+    """요청 스레드는 튜플만 큐에 넣고, LogRecord 생성/포맷/쓰기는 모두 이 스레드에서"""
+    
+    def prepare(self, item):
+        return _make_log_record(item)
+
+_logger = logging.getLogger('repost')
+_logger.propagate = False
+_logger.setLevel(logging.DEBUG)  # 레벨 판단은 log()에서 (LOG_LEVEL)
+_log_listener = None
+_log_queue = None  # 비동기 모드일 때만 설정
+
+def configure_logging(stream=None, async_output=None, fmt=None):
+    """
+    로그 출력 (재)구성 - 모듈 로드 시, fork된 워커에서, 벤치마크에서 호출
+    
+    Args:
+        stream: 출력 스트림 (기본 sys.stdout)
+        async_output: True면 큐 + QueueListener 스레드 (기본 LOG_ASYNC)
+        fmt: 'json' / 'text' (기본 LOG_FORMAT)
+    """
+    global _log_listener, _log_queue
+    import queue
+    
+    _log_queue = None
+    if _log_listener is not None:
+        try:
+            _log_listener.stop()  # 남은 로그 비우기
+        except RuntimeError:
+            pass  # fork된 자식에는 부모의 리스너 스레드가 없음
+        _log_listener = None
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+    
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextLogFormatter() if (fmt or LOG_FORMAT) == 'text' else JsonLogFormatter())
+    _logger.addHandler(output)
+    if LOG_ASYNC if async_output is None else async_output:
+        log_queue = queue.SimpleQueue()
+        _log_listener = _TupleQueueListener(log_queue, output)
+        _log_listener.start()
+        _log_queue = log_queue
+
+def _stop_logging():
+    global _log_listener, _log_queue
+    _log_queue = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+configure_logging()
+atexit.register(_stop_logging)
+if hasattr(os, 'register_at_fork'):
+    # gunicorn preload 등으로 fork되면 리스너 스레드가 자식에 없으므로 새로 구성
+    os.register_at_fork(after_in_child=configure_logging)
+
+def log(message, level="INFO", exc_info=False, **fields):
+    """
+    구조화 로그 한 줄 기록
+    
+    Args:
+        message: 사람이 읽는 메시지
+        level: 심각도(DEBUG/INFO/WARNING/ERROR) 또는 카테고리(AI, CACHE, ...) - 카테고리는 INFO
+        exc_info: True면 현재 처리 중인 예외의 traceback 포함
+        **fields: JSON에 그대로 들어갈 구조화 필드 (url=..., count=...)
+    """
+    levelno = LOG_SEVERITIES.get(level, logging.INFO)
+    if levelno < LOG_LEVEL:
+        return
+    sample_rate = 1.0
+    if levelno < logging.WARNING:
+        sample_rate = LOG_SAMPLE_RATES.get(level, 1.0)
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return
+    
+    exc_text = None
+    if exc_info:
+        import traceback
+        exc_text = traceback.format_exc().rstrip()  # traceback 객체는 스레드를 넘기지 않음
+    request_id = g.get('request_id') if has_request_context() else None
+    item = (time.time(), levelno, level, message, fields, sample_rate, request_id, exc_text)
+    
+    log_queue = _log_queue
+    if log_queue is not None:
+        log_queue.put(item)
+    else:
+        _logger.handle(_make_log_record(item))
+
+# ============================
+# 📈 세션 시간 히스토그램 (로그 버킷)
+# ============================
+
+# 버킷 i = [BASE^i, BASE^(i+1)) 초 → 상대 오차 약 ±10%, 24시간까지 약 66개 필드
+SESSION_HIST_BASE = 2 ** 0.25
+SESSION_HIST_MAX_SECONDS = 86400  # 24시간 이상은 마지막 버킷에 합산
+
+def parse_session_duration(value):
+    """클라이언트가 보낸 sessionDuration을 0 이상의 정수(초)로 변환"""
+    try:
+        return max(0, int(float(value)))
+    except (TypeError, ValueError):
+        return 0
+
+def session_hist_bucket(seconds):
+    """세션 시간(초) → 히스토그램 버킷 인덱스"""
+    seconds = min(max(seconds, 1), SESSION_HIST_MAX_SECONDS)
+    return int(math.log(seconds) / math.log(SESSION_HIST_BASE))
+
+def session_hist_bucket_value(index):
+    """버킷 대표값 (버킷 경계의 기하 평균, 초)"""
+    return SESSION_HIST_BASE ** (index + 0.5)
+
+def merge_session_hists(*hists):
+    """
+    여러 히스토그램(HGETALL 결과)을 하나로 합치기 (일별 → 주간/월간)
+    
+    Returns:
+        dict: {'count': int, 'sum': int, 'buckets': {index: count}}
+    """
+    merged = {'count': 0, 'sum': 0, 'buckets': {}}
+    for hist in hists:
+        for field, value in (hist or {}).items():
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                continue
+            if field in ('count', 'sum'):
+                merged[field] += value
+            elif field.startswith('b'):
+                index = int(field[1:])
+                merged['buckets'][index] = merged['buckets'].get(index, 0) + value
+    return merged
+
+def session_hist_summary(hist, quantiles=(0.5, 0.9, 0.99)):
+    """
+    히스토그램에서 평균과 분위수 계산 (버킷 수에 비례 - 이벤트 수와 무관)
+    
+    Args:
+        hist: merge_session_hists() 결과
+        quantiles: 계산할 분위수 목록
+    
+    Returns:
+        dict: {'count', 'mean', 'p50', 'p90', 'p99'}
+    """
+    summary = {'count': hist['count'], 'mean': 0}
+    for q in quantiles:
+        summary[f'p{int(round(q * 100))}'] = 0
+    
+    total = sum(hist['buckets'].values())
+    if total == 0:
+        return summary
+    
+    summary['mean'] = round(hist['sum'] / hist['count'], 0) if hist['count'] else 0
+    
+    ordered = sorted(hist['buckets'].items())
+    for q in quantiles:
+        rank = q * total
+        cumulative = 0
+        for index, count in ordered:
+            cumulative += count
+            if cumulative >= rank:
+                summary[f'p{int(round(q * 100))}'] = round(session_hist_bucket_value(index), 0)
+                break
+    return summary
+
+# ============================
+# ⚡ 실시간 이벤트 (Redis Pub/Sub → SSE)
+# ============================
+
+LIVE_CHANNEL = 'analytics:live'
+LIVE_WINDOW_SECONDS = 60  # 분당 지표 계산 구간
+LIVE_MIN_INTERVAL = 0.5  # SSE 전송 최소 간격 (초) - 초당 최대 2회로 합쳐서 전송
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_STREAM_MAX_SECONDS = int(os.environ.get('LIVE_STREAM_MAX_SECONDS', '55'))  # 서버리스 타임아웃 전에 종료 → 브라우저가 재연결
+
+LIVE_BUCKET_TTL = LIVE_WINDOW_SECONDS + 5
+
+def live_bucket_key(second):
+    """실시간 카운터 초 단위 버킷 (HASH, 전 워커 공용 - 스트림이 새로 열려도 최근 60초를 그대로 읽음)"""
+    return f'analytics:live:{second}'
+
+def live_event_counts(action, success=True, from_cache=None):
+    """
+    이벤트 1개 → 실시간 카운터 증가분
+    
+    Args:
+        action: 이벤트 이름 ('blog_analyzed', 'page_view', 'ai_failed' ...)
+        success: 성공 여부
+        from_cache: 분석 결과가 캐시에서 왔는지 (캐시 조회가 없었으면 None)
+    """
+    counts = Counter(events=1)
+    if action == 'blog_analyzed':
+        counts['analyses'] += 1
+        if not success:
+            counts['failed_analyses'] += 1
+        if from_cache is not None:
+            counts['cache_lookups'] += 1
+            counts['cache_hits'] += int(bool(from_cache))
+    elif action == 'page_view':
+        counts['page_views'] += 1
+    elif action == 'ai_failed':
+        counts['ai_failures'] += 1
+    return counts
+
+def queue_live_counts(pipe, counts):
+    """현재 초 버킷에 증가분을 더하고 같은 증가분을 한 번만 발행 (배치 전체를 한 메시지로)"""
+    second = int(time.time())
+    key = live_bucket_key(second)
+    for field, amount in counts.items():
+        pipe.hincrby(key, field, amount)
+    pipe.expire(key, LIVE_BUCKET_TTL)
+    pipe.publish(LIVE_CHANNEL, json.dumps({'t': second, **counts}, separators=(',', ':')))
+
+def publish_live_event(action):
+    """
+    실시간 대시보드용 이벤트 기록 + 알림 (Analytics 기록과 별개인 이벤트, 실패해도 무시)
+    
+    Args:
+        action: 이벤트 이름 ('ai_failed' ...)
+    """
+    if not store:
+        return
+    try:
+        pipe = store.pipeline(transaction=False)
+        queue_live_counts(pipe, live_event_counts(action))
+        pipe.execute()
+    except Exception as e:
+        log(f"⚠️ 실시간 이벤트 발행 실패: {e}", "WARNING")
+
+def read_live_window(now_second):
+    """저장소의 최근 LIVE_WINDOW_SECONDS초 버킷 → {초: Counter} (스트림 시작 시 1회)"""
+    seconds = range(now_second - LIVE_WINDOW_SECONDS + 1, now_second + 1)
+    pipe = store.pipeline(transaction=False)
+    for second in seconds:
+        pipe.hgetall(live_bucket_key(second))
+    return {
+        second: Counter({field: int(value) for field, value in bucket.items()})
+        for second, bucket in zip(seconds, pipe.execute()) if bucket
+    }
+
+def summarize_live_window(buckets):
+    """
+    최근 LIVE_WINDOW_SECONDS 동안의 초 단위 버킷 → 실시간 카운터
+    
+    Args:
+        buckets: {초: Counter}
+    
+    Returns:
+        dict: 분당 분석/방문, 캐시 히트율, AI 실패 수
+    """
+    total = Counter()
+    for counts in buckets.values():
+        total.update(counts)
+    return {
+        'analyses_per_min': total['analyses'],
+        'failed_analyses': total['failed_analyses'],
+        'page_views_per_min': total['page_views'],
+        'events_per_min': total['events'],
+        'cache_hit_rate': round(total['cache_hits'] / total['cache_lookups'] * 100, 1) if total['cache_lookups'] else 0,
+        'ai_failures': total['ai_failures'],
+    }
+
+# ============================
+# 📈 Prometheus 메트릭 (/metrics)
+# ============================
+# prometheus_client는 첫 기록 시점에 임포트 (콜드 스타트 제외)
+# gunicorn 다중 워커: PROMETHEUS_MULTIPROC_DIR 설정 시 워커별 파일에 기록하고 /metrics에서 합산
+# Vercel은 인스턴스마다 따로 수집되어 의미가 없으므로 기본 비활성
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0' if os.environ.get('VERCEL') else '1') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # /metrics 조회용 Bearer 토큰 (미설정이면 /metrics 거부)
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRICS_COMMAND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """
+    메트릭 객체 묶음 (처음 호출될 때 정의)
+    
+    Returns:
+        SimpleNamespace 또는 None (비활성 / prometheus_client 미설치)
+    """
+    global _metrics, METRICS_ENABLED
+    if _metrics is not None or not METRICS_ENABLED:
+        return _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            try:
+                from prometheus_client import Counter as PromCounter, Gauge, Histogram
+            except ImportError:
+                log("⚠️ prometheus_client 미설치 - /metrics 비활성", "WARNING")
+                METRICS_ENABLED = False
+                return None
+            
+            _metrics = SimpleNamespace(
+                requests=PromCounter('repost_http_requests_total', 'HTTP 요청 수',
+                                     ['route', 'method', 'status']),
+                latency=Histogram('repost_http_request_duration_seconds', 'HTTP 요청 처리 시간',
+                                  ['route', 'method'], buckets=METRICS_LATENCY_BUCKETS),
+                in_flight=Gauge('repost_http_requests_in_flight', '처리 중인 요청 수',
+                                multiprocess_mode='livesum'),
+                stage=Histogram('repost_stage_duration_seconds', '분석 구간별 처리 시간 (Server-Timing 구간)',
+                                ['stage'], buckets=METRICS_LATENCY_BUCKETS),
+                cache=PromCounter('repost_cache_requests_total', '댓글 캐시 조회 결과',
+                                  ['tier', 'result']),
+                comments=PromCounter('repost_comment_generation_total', '댓글 생성 방식 (ai / hybrid / template)',
+                                     ['mode']),
+                redis_latency=Histogram('repost_redis_command_duration_seconds', 'Redis 명령 지연시간',
+                                        ['command'], buckets=METRICS_COMMAND_BUCKETS),
+                redis_reads=Histogram('repost_redis_read_duration_seconds', '지연 허용 읽기 지연시간 (endpoint / 복제본 또는 primary)',
+                                      ['endpoint', 'target'], buckets=METRICS_COMMAND_BUCKETS),
+                redis_replica_fallbacks=PromCounter('repost_redis_replica_fallbacks_total', '복제본 대신 primary에서 읽은 횟수',
+                                                    ['reason']),
+                redis_transitions=PromCounter('repost_redis_state_transitions_total', 'Redis 연결 상태 전환 (primary / 복제본별)',
+                                              ['node', 'transition']),
+                storage_up=Gauge('repost_storage_up', '저장소 사용 가능 여부 (1=정상)',
+                                 multiprocess_mode='livemostrecent'),
+            )
+    return _metrics
+
+def metric_inc(name, *labels):
+    """카운터 증가 (메트릭 비활성이면 무시)"""
+    metrics = get_metrics()
+    if metrics:
+        getattr(metrics, name).labels(*labels).inc()
+
+def metric_observe(name, value, *labels):
+    """히스토그램 기록 (메트릭 비활성이면 무시)"""
+    metrics = get_metrics()
+    if metrics:
+        getattr(metrics, name).labels(*labels).observe(value)
+
+# ============================
+# ⏱️ 구간별 처리 시간 (Server-Timing)
+# ============================
+
+# 분석 요청의 단계별 구간 - 대시보드는 이 목록의 히스토그램만 조회
+TIMING_STAGES = ('analyze', 'cache_lookup', 'scrape_fetch', 'scrape_parse', 'ai_call',
+                 'template', 'cache_store', 'analytics', 'respond')
+TIMING_HIST_MAX_US = 120 * 1000 * 1000  # 2분 이상은 마지막 버킷에 합산 (마이크로초 단위 저장)
+TIMING_FLUSH_SECONDS = 10  # 프로세스 내 버퍼 → 저장소 반영 주기
+
+_timing_buffer = {}  # {stage: {'count', 'sum', 'buckets': Counter}}
+_timing_lock = threading.Lock()
+_timing_last_flush = time.monotonic()
+
+def timing_hist_bucket(us):
+    """처리 시간(마이크로초) → 히스토그램 버킷 인덱스 (세션 히스토그램과 같은 로그 버킷)"""
+    us = min(max(us, 1), TIMING_HIST_MAX_US)
+    return int(math.log(us) / math.log(SESSION_HIST_BASE))
+
+def record_timing(stage, ms):
+    """
+    구간 처리 시간 기록
+    
+    - 요청 중이면 g.timings에 추가 → 응답의 Server-Timing 헤더
+    - 프로세스 내 히스토그램 버퍼에 합산 → flush_timings()가 주기적으로 저장소에 반영
+    """
+    if has_request_context():
+        g.setdefault('timings', []).append((stage, ms))
+    metric_observe('stage', ms / 1000, stage)
+    us = int(ms * 1000)
+    with _timing_lock:
+        entry = _timing_buffer.setdefault(stage, {'count': 0, 'sum': 0, 'buckets': Counter()})
+        entry['count'] += 1
+        entry['sum'] += us
+        entry['buckets'][timing_hist_bucket(us)] += 1
+
+@contextmanager
+def timed(stage):
+    """
+    구간 측정 (with 블록 또는 데코레이터로 사용)
+    
+        with timed('cache_lookup'):
+            ...
+        
+        @timed('template')
+        def generate_template_comments(...):
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, (time.perf_counter() - started) * 1000)
+
+def server_timing_header(timings):
+    """[(stage, ms)] → 'stage;dur=1.2, ...' (같은 구간이 여러 번이면 합산)"""
+    totals = {}
+    for stage, ms in timings:
+        totals[stage] = totals.get(stage, 0) + ms
+    return ', '.join(f'{stage};dur={ms:.1f}' for stage, ms in totals.items())
+
+def flush_timings(force=False):
+    """
+    히스토그램 버퍼를 저장소의 일별 해시에 합산 (analytics:timing:{stage}:{date})
+    
+    요청마다 쓰지 않고 TIMING_FLUSH_SECONDS마다 한 번의 파이프라인으로 반영
+    """
+    global _timing_buffer, _timing_last_flush
+    if not force and time.monotonic() - _timing_last_flush < TIMING_FLUSH_SECONDS:
+        return
+    with _timing_lock:
+        buffer, _timing_buffer = _timing_buffer, {}
+        _timing_last_flush = time.monotonic()
+    if not buffer or not store:
+        return
+    
+    today = get_kst_now().strftime('%Y-%m-%d')
+    try:
+        pipe = store.pipeline(transaction=False)
+        for stage, entry in buffer.items():
+            key = f'analytics:timing:{stage}:{today}'
+            pipe.hincrby(key, 'count', entry['count'])
+            pipe.hincrby(key, 'sum', entry['sum'])
+            for index, count in entry['buckets'].items():
+                pipe.hincrby(key, f'b{index}', count)
+            pipe.expire(key, 30 * 24 * 60 * 60)  # 30일 보관
+        pipe.execute()
+    except Exception as e:
+        log(f"⚠️ 구간 시간 저장 실패: {e}", "WARNING")
 
 # 📊 Analytics 로깅 시스템 (Vercel KV + GA4)
+def _queue_analytics(pipe, action, data, success, now_kst, live):
+    """
+    이벤트 1개의 Redis 쓰기를 pipeline에 추가 (네트워크 왕복 없음)
+    
+    Args:
+        pipe: Redis pipeline
+        action: 액션 유형
+        data: 추가 데이터 (dict 또는 None)
+        success: 성공 여부
+        now_kst: 기준 시각 (배치 전체 공통)
+        live: 실시간 카운터 증가분 (Counter - 배치 끝에 한 번 기록/발행)
+    
+    Returns:
+        tuple or None: page_view 이면 (userId, HSETNX 결과 위치) - 신규 사용자 판별용
+    """
+    today = now_kst.strftime('%Y-%m-%d')
+    hour = now_kst.strftime('%H')
+    status = 'success' if success else 'failed'
+    new_user_check = None
+    
+    # 1. 전체 카운트 증가
+    pipe.incr(f"analytics:total:{action}")
+    
+    # 2. 오늘 카운트 증가
+    key_daily = f"analytics:daily:{today}:{action}"
+    pipe.incr(key_daily)
+    pipe.expire(key_daily, 2592000)  # 30일
+    
+    # 3. 성공/실패 카운트
+    pipe.incr(f"analytics:{status}:{action}")
+    
+    # 4. 시간대별 카운트 (오늘만)
+    key_hourly = f"analytics:hourly:{today}:{hour}"
+    pipe.incr(key_hourly)
+    pipe.expire(key_hourly, 86400)  # 24시간
+    
+    # ✨ 5. DAU/WAU/MAU 추적 (page_view 이벤트에서만)
+    if action == 'page_view' and data and data.get('userId'):
+        user_id = data['userId']
+        first_visit = data.get('firstVisit') or now_kst.isoformat()
+        
+        # DAU: 오늘 활성 사용자 (SET - 자동 중복 제거!)
+        # WAU/MAU: 날짜별 SET에 오늘만 추가 → 조회 시 SUNIONSTORE
+        for prefix in ('dau', 'wau', 'mau'):
+            pipe.sadd(active_users_key(prefix, today), user_id)
+            pipe.expire(active_users_key(prefix, today), 2592000)  # 30일
+        
+        # 신규 vs 재방문 사용자 구분 (HSETNX 결과 1 = 신규)
+        user_key = f'analytics:user:{user_id}:info'
+        pipe.hsetnx(user_key, 'first_visit', first_visit)
+        new_user_check = (user_id, len(pipe) - 1)
+        pipe.hsetnx(user_key, 'first_date', today)
+    
+    # ✨ 세션 시간 기록 (모든 이벤트, page_view 제외)
+    # page_view는 로드 직후라 부정확하므로 실제 행동(댓글 복사, 블로그 이동)만 기록
+    # 📈 로그 버킷 히스토그램(HASH)에 누적 → 샘플 제한 없이 p50/p90/p99 계산 가능
+    session_duration = parse_session_duration(data.get('sessionDuration', 0) if data else 0)
+    if session_duration > 0 and action != 'page_view':
+        hist_key = f'analytics:sessions:hist:{today}'
+        pipe.hincrby(hist_key, f'b{session_hist_bucket(session_duration)}', 1)
+        pipe.hincrby(hist_key, 'count', 1)
+        pipe.hincrby(hist_key, 'sum', session_duration)
+        pipe.expire(hist_key, 2592000)  # 30일
+    
+    # 6. 브라우저/디바이스/OS 통계 (page_view 이벤트에서만)
+    if action == 'page_view' and data:
+        if 'browser' in data:
+            pipe.incr(f"analytics:browser:{data['browser']}")
+        if 'deviceType' in data:
+            pipe.incr(f"analytics:device:{data['deviceType']}")
+        if 'os' in data:
+            pipe.incr(f"analytics:os:{data['os']}")
+    
+    # 7. 피드백 통계 (rating별 카운트)
+    if action == 'quick_feedback' and data and 'rating' in data:
+        pipe.incr(f"analytics:feedback:rating_{data['rating']}")
+    
+    # 🔥 8. 플랫폼별 분석 수 + 인기 글 (정규화 URL별 요청/캐시 히트 - 일별 정렬 집합)
+    if action == 'blog_analyzed' and success and data and data.get('blog_url'):
+        resolved = resolve_url(data['blog_url'])
+        pipe.hincrby('analytics:platforms', resolved.platform, 1)
+        for hot_key, counted in ((hot_posts_key(today), True), (hot_posts_key(today, 'hits'), data.get('from_cache'))):
+            if counted:
+                pipe.zincrby(hot_key, 1, resolved.canonical)
+                pipe.expire(hot_key, HOT_POST_RETENTION)
+        # 예열용 요청 URL (정규 주소는 일반 사이트의 쿼리 등이 빠져 다른 페이지일 수 있음)
+        pipe.hset(hot_posts_key(today, 'url'), resolved.canonical, data['blog_url'])
+        pipe.expire(hot_posts_key(today, 'url'), HOT_POST_RETENTION)
+    
+    # ⚡ 실시간 대시보드 카운터 (배치 전체를 합쳐 queue_live_counts로)
+    live.update(live_event_counts(action, success, data.get('from_cache') if data else None))
+    
+    return new_user_check
+
+@timed('analytics')
+def log_analytics_batch(events):
+    """
+    여러 이벤트를 Redis Pipeline 한 번으로 기록 (/api/track/batch)
+    
+    신규 사용자가 있을 때만 후속 pipeline 1회 추가 (신규 사용자 SET + 정보 만료 설정)
+    
+    Args:
+        events: [(action, data, success), ...]
+    
+    Returns:
+        int: 기록된 이벤트 수 (KV 비활성화 / 실패 시 0)
+    """
+    if not store or not events:
+        return 0
+    
+    try:
+        now_kst = get_kst_now()
+        today = now_kst.strftime('%Y-%m-%d')
+        
+        pipe = store.pipeline(transaction=False)
+        new_user_checks = []
+        live = Counter()
+        for action, data, success in events:
+            check = _queue_analytics(pipe, action, data, success, now_kst, live)
+            if check:
+                new_user_checks.append(check)
+        queue_live_counts(pipe, live)
+        results = pipe.execute()
+        
+        # 신규 사용자 (HSETNX 성공) 후처리
+        new_users = {user_id for user_id, index in new_user_checks if results[index]}
+        if new_users:
+            pipe = store.pipeline(transaction=False)
+            for user_id in new_users:
+                pipe.expire(f'analytics:user:{user_id}:info', 7776000)  # 90일
+                pipe.sadd(f'analytics:new_users:{today}', user_id)
+            pipe.expire(f'analytics:new_users:{today}', 2592000)
+            pipe.execute()
+            log(f"✨ 신규 사용자 {len(new_users)}명 저장 완료", "ANALYTICS")
+        
+        log(f"✅ KV 저장 완료: {len(events)}개 이벤트 (pipeline)", "ANALYTICS")
+        return len(events)
+    
+    except Exception as kv_error:
+        log(f"⚠️ KV 저장 실패: {kv_error}", "WARNING")
+        return 0
+
 def log_analytics(action, data=None, success=True, error_message=None):
     """
-    사용자 행동 로깅 - Vercel KV (Redis)에 저장
+    사용자 행동 로깅 - Vercel KV (Redis)에 저장
+    
+    ✨ NEW: DAU/WAU/MAU/신규/재방문/세션 시간 추적
+    
+    Args:
+        action: 액션 유형 ('page_view', 'blog_analyzed', 'comment_copied', 'blog_visit')
+        data: 추가 데이터 (dict) - userId, firstVisit, sessionDuration 포함
+        success: 성공 여부
+        error_message: 실패 시 에러 메시지
+    """
+    try:
+        # 서버 로그 출력
+        log(f"📊 Analytics: {action} | success={success}", "ANALYTICS")
+        
+        # Vercel KV에 저장 (Redis 프로토콜)
+        log_analytics_batch([(action, data, success)])
+        
+        if error_message:
+            log(f"⚠️ Error: {error_message}", "ERROR")
+        
+    except Exception as e:
+        log(f"⚠️ Analytics logging failed: {e}", "WARNING")
+
+# 로컬 개발 환경에서만 .env 파일 로드 (배포 환경에서는 dotenv 임포트 생략)
+if os.path.exists('.env'):
+    from dotenv import load_dotenv
+    load_dotenv()
+    log("📁 .env 파일 로드됨 (로컬 개발 모드)")
+
+app = Flask(__name__)
+CORS(app)
+
+# 🌐 프록시 뒤 클라이언트 IP - 신뢰하는 프록시(Vercel/Render)가 붙인 X-Forwarded-For 값만 사용
+# (오른쪽에서 TRUSTED_PROXY_HOPS번째 → request.remote_addr, 클라이언트가 보낸 앞쪽 값은 무시)
+# 프록시 없이 직접 노출할 때는 0 (헤더를 전혀 믿지 않음)
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+def apply_proxy_fix(environ):
+    """app.wsgi_app을 거치지 않고 요청 컨텍스트를 여는 경로(asgi.py)도 같은 규칙으로 REMOTE_ADDR 보정"""
+    if TRUSTED_PROXY_HOPS > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        ProxyFix(lambda environ, start_response: None, x_for=TRUSTED_PROXY_HOPS)(environ, None)
+    return environ
+
+if TRUSTED_PROXY_HOPS > 0:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+# 🔐 세션 보안 설정
+app.secret_key = os.environ.get('SECRET_KEY', 'repost-admin-secret-key-change-this-in-production')
+# HTTPS 환경에서만 Secure Cookie 사용 (로컬 테스트 시 http 허용)
+app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV') == 'production'
+app.config['SESSION_COOKIE_HTTPONLY'] = True
+app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
+
+# 🔐 관리자 계정 설정 (환경변수에서 가져오기)
+ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
+ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'repost2025!')
+
+# 🪪 요청 ID (로그 상관관계용) - 프록시가 준 X-Request-ID가 있으면 그대로 사용
+REQUEST_ID_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_.')
+
+@app.before_request
+def assign_request_id():
+    incoming = request.headers.get('X-Request-ID', '')
+    if incoming and len(incoming) <= 64 and REQUEST_ID_CHARS.issuperset(incoming):
+        g.request_id = incoming
+    else:
+        import uuid
+        g.request_id = uuid.uuid4().hex[:16]
+
+@app.after_request
+def add_request_id_header(response):
+    if g.get('request_id'):
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+# 📈 요청 메트릭 (라우트 규칙 단위로 집계 → 라벨 수 고정)
+@app.before_request
+def start_request_metrics():
+    metrics = get_metrics()
+    if metrics:
+        g.metrics_started = time.perf_counter()
+        metrics.in_flight.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metric_inc('requests', route, request.method, str(response.status_code))
+        metric_observe('latency', time.perf_counter() - started, route, request.method)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop('metrics_started', None) is not None:
+        get_metrics().in_flight.dec()
+
+# ⏱️ 구간별 처리 시간 → Server-Timing 헤더 (브라우저 개발자 도구 Network 탭에서 확인)
+@app.after_request
+def add_server_timing(response):
+    timings = g.get('timings')
+    if timings:
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    flush_timings()
+    return response
+
+# 🔐 로그인 필수 데코레이터
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'admin_logged_in' not in session:
+            return redirect(url_for('admin_login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+# ============================
+# 🔬 요청 프로파일링 (관리자 전용)
+# ============================
+# 켜는 방법:
+# - 관리자 로그인 상태에서 X-Profile 헤더 또는 ?__profile= 쿼리 (값: cprofile / sample)
+# - 로그인 없이: X-Profile + X-Profile-Token (PROFILE_TOKEN)
+# - PROFILE_SAMPLE_RATE: 지정 경로 요청 중 일정 비율을 샘플링 프로파일러로 자동 수집
+# 프로파일하지 않는 요청은 헤더/쿼리 확인만 하고 지나감
+
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))  # 0.01 = 1%
+PROFILE_SAMPLE_ROUTES = tuple(os.environ.get('PROFILE_SAMPLE_ROUTES', '/api/analyze').split(','))
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_SAMPLE_INTERVAL = 0.005  # 샘플링 간격 (초)
+PROFILE_KEEP = 50  # 목록에 유지할 최근 프로파일 수
+PROFILE_TTL = 7 * 24 * 60 * 60
+PROFILE_FORMATS = {
+    'txt': 'text/plain; charset=utf-8',
+    'collapsed': 'text/plain; charset=utf-8',  # flamegraph.pl / speedscope 입력
+    'pstats': 'application/octet-stream',  # python -m pstats / snakeviz 입력
+}
+
+def _native_thread_api():
+    """
+    OS 스레드 함수 (get_ident, start_new_thread, allocate_lock, sleep) + gevent 여부
+    
+    gevent 몽키패치 후에는 get_ident()가 그린렛 ID라 sys._current_frames()에서 찾을 수 없고,
+    샘플러 스레드도 그린렛이 되어 요청이 양보할 때만 돌므로 패치 전 원본을 사용
+    """
+    import _thread
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            return (*monkey.get_original('_thread', ['get_ident', 'start_new_thread', 'allocate_lock']),
+                    monkey.get_original('time', 'sleep'), True)
+    except ImportError:
+        pass
+    return _thread.get_ident, _thread.start_new_thread, _thread.allocate_lock, time.sleep, False
+
+class StackSampler:
+    """
+    현재 요청(스레드, gevent면 그린렛)의 스택을 주기적으로 수집하는 샘플링 프로파일러
+    
+    결과는 collapsed stacks 형식 ('바깥;...;안쪽 횟수') - 함수 호출마다 비용이 드는 cProfile보다 오버헤드가 작음
+    gevent: 대상 그린렛이 멈춰 있으면 gr_frame (I/O 대기 위치), 실행 중이면 OS 스레드의 현재 프레임
+    """
+    
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        get_ident, self._start_thread, allocate_lock, self._sleep, patched = _native_thread_api()
+        self.thread_id = get_ident()
+        self.greenlet = None
+        if patched:
+            import greenlet
+            self.greenlet = greenlet.getcurrent()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = False
+        self._done = allocate_lock()
+    
+    def start(self):
+        self._done.acquire()
+        self._start_thread(self._run, ())
+    
+    def stop(self):
+        self._stopped = True
+        self._done.acquire()  # 샘플러가 마지막 샘플을 끝낼 때까지 (최대 interval)
+        self._done.release()
+    
+    def _run(self):
+        try:
+            while not self._stopped:
+                self._sleep(self.interval)
+                self._sample()
+        finally:
+            self._done.release()
+    
+    def _sample(self):
+        frame = self.greenlet.gr_frame if self.greenlet is not None else None
+        if frame is None:
+            frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+    
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+    
+    def summary(self, limit=40):
+        """가장 많이 잡힌 함수 (자기 자신 기준) 상위 목록"""
+        leaf = Counter()
+        for stack, count in self.stacks.items():
+            leaf[stack.rsplit(';', 1)[-1]] += count
+        lines = [f'샘플 {self.samples}개 (간격 {self.interval * 1000:.0f}ms)', '']
+        for frame, count in leaf.most_common(limit):
+            lines.append(f'{count / max(self.samples, 1) * 100:6.1f}%  {count:6d}  {frame}')
+        return '\n'.join(lines)
+
+def _profile_request_mode():
+    """이 요청을 프로파일할지 결정 → 'cprofile' / 'sample' / None"""
+    requested = request.headers.get('X-Profile') or request.args.get('__profile')
+    if requested:
+        token_ok = PROFILE_TOKEN and request.headers.get('X-Profile-Token') == PROFILE_TOKEN
+        if token_ok or 'admin_logged_in' in session:
+            return 'sample' if requested == 'sample' else 'cprofile'
+        return None
+    if PROFILE_SAMPLE_RATE and request.path in PROFILE_SAMPLE_ROUTES and random.random() < PROFILE_SAMPLE_RATE:
+        return 'sample'
+    return None
+
+def save_profile(meta, files):
+    """
+    프로파일 저장 (저장소: profile:{id}:meta + 형식별 profile:{id}:{fmt}, 7일 보관)
+    
+    Returns:
+        str or None: 프로파일 ID
+    """
+    if not store:
+        return None
+    import base64
+    import uuid
+    
+    profile_id = f"{get_kst_now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    meta = {**meta, 'id': profile_id, 'formats': sorted(files)}
+    try:
+        pipe = store.pipeline(transaction=False)
+        pipe.set(f'profile:{profile_id}:meta', json.dumps(meta, ensure_ascii=False), ex=PROFILE_TTL)
+        for fmt, data in files.items():
+            encoded = base64.b64encode(data).decode() if isinstance(data, bytes) else data
+            pipe.set(f'profile:{profile_id}:{fmt}', encoded, ex=PROFILE_TTL)
+        pipe.lpush('profiles:index', profile_id)
+        pipe.ltrim('profiles:index', 0, PROFILE_KEEP - 1)
+        pipe.execute()
+    except Exception as e:
+        log(f"⚠️ 프로파일 저장 실패: {e}", "WARNING")
+        return None
+    log(f"🔬 프로파일 저장: {profile_id} ({meta['mode']}, {meta['duration_ms']}ms, {meta['path']})", "PROFILE")
+    return profile_id
+
+@app.before_request
+def start_profiling():
+    mode = _profile_request_mode()
+    if not mode:
+        return
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler()
+        profiler.start()
+    g.profile = (mode, profiler, time.perf_counter())
+
+@app.after_request
+def finish_profiling(response):
+    profile = g.pop('profile', None)
+    if not profile:
+        return response
+    mode, profiler, started = profile
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    
+    if mode == 'cprofile':
+        import io
+        import marshal
+        import pstats
+        profiler.disable()
+        profiler.create_stats()
+        raw_stats = marshal.dumps(profiler.stats)  # pstats.Stats()가 profiler.stats를 비우므로 먼저 직렬화
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(60)
+        files = {'pstats': raw_stats, 'txt': text.getvalue()}
+    else:
+        profiler.stop()
+        files = {'collapsed': profiler.collapsed(), 'txt': profiler.summary()}
+    
+    profile_id = save_profile({
+        'mode': mode,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': duration_ms,
+        'created_at': get_kst_now().isoformat(),
+    }, files)
+    if profile_id:
+        response.headers['X-Profile-Id'] = profile_id
+    return response
+
+# ============================
+# 💤 지연 초기화 (콜드 스타트 단축)
+# ============================
+# openai/redis/bs4 임포트와 Redis ping은 서버리스 콜드 스타트의 대부분을 차지하므로
+# 모듈 로드 시점이 아니라 실제로 처음 쓰이는 요청에서 한 번만 수행
+
+class LazyClient:
+    """
+    첫 사용 시점에 factory()로 클라이언트를 만드는 프록시
+    
+    기존 코드의 `if not store:` / `store.get(...)` 형태를 그대로 유지.
+    factory가 None을 반환하면 (환경변수 없음/연결 실패) 비활성으로 간주하고 다시 시도하지 않음.
+    """
+    
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._resolved = False
+        self._lock = threading.Lock()
+    
+    def _resolve(self):
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    started = time.perf_counter()
+                    self._instance = self._factory()
+                    self._resolved = True
+                    log(f"💤 {self._name} 지연 초기화 완료 ({(time.perf_counter() - started) * 1000:.0f}ms)", "INIT")
+        return self._instance
+    
+    def reset(self):
+        """다음 사용 시 다시 생성 (포크된 워커가 부모의 커넥션 풀을 쓰지 않도록)"""
+        self._instance = None
+        self._resolved = False
+        self._lock = threading.Lock()
+    
+    def __bool__(self):
+        return self._resolve() is not None
+    
+    def __getattr__(self, name):
+        instance = self._resolve()
+        if instance is None:
+            raise AttributeError(f"{self._name} 클라이언트가 비활성 상태입니다 ({name})")
+        return getattr(instance, name)
+
+def _create_openai_client():
+    """🤖 OpenAI 클라이언트 생성 - API 키가 없거나 실패하면 None (기본 템플릿 사용)"""
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        log("⚠️ API 키가 없어서 기본 템플릿 사용", "WARNING")
+        return None
+    try:
+        from openai import OpenAI
+        
+        instance = OpenAI(api_key=api_key)
+        log("✅ OpenAI 클라이언트 초기화 성공!")
+        return instance
+    except Exception as e:
+        log(f"❌ OpenAI 클라이언트 초기화 실패: {e}", "ERROR")
+        return None
+
+client = LazyClient('OpenAI', _create_openai_client)
+
+# ============================
+# 🔌 Redis 연결 관리 (자동 복구)
+# ============================
+# 한 번 ping이 실패해도 프로세스가 끝날 때까지 Redis가 꺼져 있지 않도록
+# 연결 풀 + 헬스 체크 + 지터 백오프 재연결로 관리하고, 실제로 끊긴 동안에만 no-op 모드로 동작
+
+REDIS_CONNECT_TIMEOUT = float(os.environ.get('REDIS_CONNECT_TIMEOUT', '2'))
+REDIS_COMMAND_TIMEOUT = float(os.environ.get('REDIS_COMMAND_TIMEOUT', '2'))  # 명령별 소켓 타임아웃 (초)
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', '20'))
+REDIS_HEALTH_INTERVAL = float(os.environ.get('REDIS_HEALTH_INTERVAL', '15'))  # 정상 상태 헬스 체크 주기 (초)
+REDIS_BACKOFF_BASE = 0.5
+REDIS_BACKOFF_MAX = 30.0
+# 🧩 Redis Cluster (샤딩) - URL은 아무 노드 하나 (나머지 노드는 CLUSTER SLOTS로 찾음)
+REDIS_CLUSTER = os.environ.get('REDIS_CLUSTER', '0') == '1'
+# 📚 읽기 복제본 (쉼표 구분 URL) - 약간 오래된 값을 읽어도 되는 곳(대시보드 집계, 캐시 조회)만 복제본으로
+REDIS_REPLICA_URLS = [url.strip() for url in os.environ.get('REDIS_REPLICA_URLS', '').split(',') if url.strip()]
+REDIS_REPLICA_MAX_LAG = float(os.environ.get('REDIS_REPLICA_MAX_LAG', '5'))  # 이보다 뒤처진 복제본은 제외 (초)
+REDIS_REPLICA_CHECK_INTERVAL = float(os.environ.get('REDIS_REPLICA_CHECK_INTERVAL', '1'))  # 복제 지연 확인 주기 (초)
+REPLICA_HEARTBEAT_KEY = 'redis:replica:heartbeat'
+REPLICA_HEARTBEAT_TTL = 24 * 60 * 60  # 한가해서 확인이 뜸해도 기준 하트비트가 사라지지 않도록
+# replica_reads 블록에서 복제본으로 보내는 명령 (쓰기/스크립트는 블록 안에서도 항상 primary)
+REPLICA_READ_COMMANDS = frozenset({
+    'get', 'mget', 'exists', 'ttl', 'scard', 'smembers', 'sismember', 'llen', 'lrange',
+    'hget', 'hgetall', 'zscore', 'zcard', 'zrevrange', 'zrevrank',
+})
+
+_read_endpoint = ContextVar('redis_read_endpoint', default=None)
+
+@contextmanager
+def replica_reads(endpoint):
+    """
+    이 블록의 읽기 명령은 복제본으로 보내고 endpoint별 읽기 지연을 기록 (Redis 저장소일 때만)
+    
+    쓰기 직후 같은 값을 다시 읽어야 하는 곳에는 쓰지 않음 (복제 지연만큼 이전 값이 보일 수 있음)
+    """
+    token = _read_endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _read_endpoint.reset(token)
+
+def hash_tag(key, tag):
+    """
+    클러스터 해시 태그 - 한 번의 다중 키 명령/스크립트가 쓰는 키를 같은 슬롯에 두기 위해 키 앞에 {tag}
+    
+    클러스터가 아니면 (단일 Redis/memory/sqlite) 키 이름 그대로 → 기존 데이터 유지
+    태그가 없는 키(캐시/통계 카운터 등)는 키 전체 해시로 슬롯이 정해져 노드에 고르게 분산
+    """
+    return f'{{{tag}}}:{key}' if getattr(store, 'cluster', False) else key
+
+def account_key(key, owner=None):
+    """
+    사용량 한도/추천/공유 보너스 키
+    
+    owner(u:<userId> / ip:<IP>)가 있으면 주인별 슬롯 → 스크립트 1회는 한 주인의 키만 사용, 트래픽은 노드에 분산
+    owner가 없으면 전체 통계/순위 키 (analytics:total_*, analytics:referrers, referrals:leaderboard) → {accounts} 한 슬롯
+    """
+    return hash_tag(key, owner or 'accounts')
+
+def active_users_key(period, date_str):
+    """DAU/WAU/MAU 날짜별 SET (같은 기간 키끼리 SUNIONSTORE로 합치므로 기간별 한 슬롯)"""
+    return hash_tag(f'analytics:{period}:{date_str}', period)
+
+class ManagedRedis:
+    """
+    자동 재연결되는 Redis 클라이언트 프록시
+    
+    - 상태: 'disabled' (URL 없음) / 'up' / 'down'
+    - bool(store)는 'up'일 때만 True → 기존 `if not store:` 분기가 그대로 no-op 모드가 됨
+    - 연결 오류가 나면 'down'으로 전환하고 지터 백오프 후 ping으로 재시도
+      (백그라운드 스레드 + 요청 시점 재시도 둘 다 - 서버리스에서는 요청 사이 스레드가 멈추므로)
+    - 상태 전환/재연결 시도/명령 오류는 connection_stats()로 조회
+    - replica_urls가 주어지면 (primary) replica_reads 블록의 읽기를 ReadRouter로 분산
+    """
+    
+    backend = 'redis'
+    
+    def __init__(self, url, cluster=False, replica_urls=None, name='primary'):
+        self._url = url
+        self.cluster = cluster
+        self.name = name
+        self._client = None
+        self._pid = None
+        self._async_client = None
+        self._async_loop = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._health_thread = None
+        self._state = 'init'
+        self._failures = 0
+        self._next_retry_at = 0.0
+        self._state_changed_at = time.time()
+        self._down_seconds = 0.0
+        self._stats = {
+            'transitions': {},
+            'reconnect_attempts': 0,
+            'reconnect_failures': 0,
+            'command_errors': 0,
+            'last_error': None,
+        }
+        self.reads = ReadRouter(self, replica_urls) if replica_urls is not None else None
+    
+    # ---------- 연결/상태 전환 ----------
+    
+    def _pool_options(self):
+        # 워커 스레드/그린렛/코루틴이 풀 크기보다 많으면 오류 대신 빈 커넥션을 기다림
+        return dict(
+            decode_responses=True,  # 문자열로 자동 디코딩
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_COMMAND_TIMEOUT,
+            socket_keepalive=True,
+            health_check_interval=30,  # 오래 쉰 커넥션은 사용 전에 PING으로 확인
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_COMMAND_TIMEOUT,
+        )
+    
+    def _cluster_options(self):
+        # 노드별 풀 (BlockingConnectionPool 대기 옵션은 클러스터 클라이언트에 없음)
+        options = self._pool_options()
+        del options['timeout']
+        return options
+    
+    def _build_client(self):
+        import redis
+        
+        if self.cluster:
+            from redis.cluster import RedisCluster
+            return _ClusterClient(RedisCluster.from_url(self._url, **self._cluster_options()))
+        pool = redis.BlockingConnectionPool.from_url(self._url, **self._pool_options())
+        return redis.Redis(connection_pool=pool)
+    
+    def async_client(self):
+        """
+        같은 URL/타임아웃의 redis.asyncio 클라이언트 (asgi.py - 실행 중인 이벤트 루프당 하나)
+        
+        연결 상태(up/down)와 재연결은 동기 클라이언트가 관리 - 오류는 report_error()로 알림
+        """
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            import redis.asyncio
+            
+            if self.cluster:
+                from redis.asyncio.cluster import RedisCluster
+                self._async_client = _ClusterClient(RedisCluster.from_url(self._url, **self._cluster_options()))
+            else:
+                pool = redis.asyncio.BlockingConnectionPool.from_url(self._url, **self._pool_options())
+                self._async_client = redis.asyncio.Redis(connection_pool=pool)
+            self._async_loop = loop
+        return self._async_client
+    
+    def _set_state(self, state, error=None):
+        previous = self._state
+        if previous == state:
+            return
+        now = time.time()
+        if previous == 'down':
+            self._down_seconds += now - self._state_changed_at
+        transition = f'{previous}->{state}'
+        self._stats['transitions'][transition] = self._stats['transitions'].get(transition, 0) + 1
+        metric_inc('redis_transitions', self.name, transition)
+        metrics = get_metrics()
+        if metrics and self.name == 'primary':
+            metrics.storage_up.set(1 if state == 'up' else 0)
+        self._state = state
+        self._state_changed_at = now
+        if state == 'disabled':
+            return
+        if self.name != 'primary':
+            log(f"📚 Redis 복제본 {self.name}: {transition}" + (f" ({error})" if error else ''), "REDIS")
+        elif state == 'up':
+            self._failures = 0
+            log(f"✅ Redis 연결 {'복구' if previous == 'down' else '성공'}! ({transition})", "REDIS")
+        else:
+            log(f"⚠️ Redis 연결 끊김: {error} - 재연결 전까지 캐시/통계 비활성 ({transition})", "REDIS")
+    
+    def _mark_down(self, error):
+        """연결 오류 → 'down' 전환 후 다음 재시도 시각 계산 (지수 백오프 + 지터)"""
+        with self._lock:
+            self._stats['last_error'] = str(error)
+            self._failures += 1
+            delay = min(REDIS_BACKOFF_MAX, REDIS_BACKOFF_BASE * 2 ** (self._failures - 1))
+            self._next_retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+            self._set_state('down', error)
+    
+    def _probe(self):
+        """ping으로 연결 확인 (최초 연결/재연결/헬스 체크 공용, 동시에 하나만 실행)"""
+        if not self._probe_lock.acquire(blocking=False):
+            return self._state == 'up'
+        try:
+            return self._probe_locked()
+        finally:
+            self._probe_lock.release()
+    
+    def _probe_locked(self):
+        if self._state != 'up':
+            self._stats['reconnect_attempts'] += 1
+        try:
+            if self._client is None or self._pid != os.getpid():
+                # 포크된 워커는 부모의 소켓을 공유하지 않도록 새 풀 사용
+                self._client = self._build_client()
+                self._pid = os.getpid()
+                self._health_thread = None
+            self._client.ping()
+        except Exception as e:
+            if self._state != 'up':
+                self._stats['reconnect_failures'] += 1
+            self._mark_down(e)
+            return False
+        with self._lock:
+            self._set_state('up')
+        return True
+    
+    def _ensure(self):
+        """현재 사용 가능한지 판단 - 최초 사용/재시도 시각이 지났으면 요청 안에서 재연결 시도"""
+        if self._state == 'disabled':
+            return False
+        if self._state == 'init' and not self._url:
+            log("⚠️ KV 환경변수 없음 - GA4만 사용", "WARNING")
+            self._set_state('disabled')
+            return False
+        if self._state == 'init' or self._pid != os.getpid():
+            self._probe()
+            self._start_health_thread()
+        elif self._state == 'down' and time.monotonic() >= self._next_retry_at:
+            self._probe()
+        return self._state == 'up'
+    
+    def _start_health_thread(self):
+        if self._health_thread is not None or REDIS_HEALTH_INTERVAL <= 0:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name='redis-health', daemon=True)
+        self._health_thread.start()
+    
+    def _health_loop(self):
+        while self._health_thread is threading.current_thread():
+            if self._state == 'down':
+                time.sleep(max(0.1, self._next_retry_at - time.monotonic()))
+            else:
+                time.sleep(REDIS_HEALTH_INTERVAL)
+            self._probe()
+    
+    def after_fork(self):
+        """포크된 워커: 부모의 풀/잠금/헬스 스레드를 버리고 다음 사용 시 새로 연결"""
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._async_client = None
+        self._async_loop = None
+        self._health_thread = None
+        if self._state != 'disabled':
+            self._state = 'init'
+        if self.reads is not None:
+            self.reads.after_fork()
+    
+    # ---------- 프록시 ----------
+    
+    def __bool__(self):
+        return self._ensure()
+    
+    @property
+    def state(self):
+        return self._state
+    
+    def __getattr__(self, name):
+        if self._client is None:
+            self._ensure()
+            if self._client is None:
+                raise AttributeError(f"Redis 클라이언트가 비활성 상태입니다 ({name})")
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        
+        def guarded(*args, **kwargs):
+            endpoint = _read_endpoint.get()
+            if endpoint is not None and self.reads is not None:
+                if name == 'pipeline':
+                    return _RoutedPipeline(self.reads, endpoint, args, kwargs)
+                if name in REPLICA_READ_COMMANDS:
+                    return self.reads.read(endpoint, lambda command: command(name)(*args, **kwargs))
+            return self._call(name, attr, args, kwargs)
+        return guarded
+    
+    def _call(self, name, attr, args, kwargs):
+        started = time.perf_counter()
+        try:
+            result = attr(*args, **kwargs)
+        except Exception as e:
+            self.report_error(e)
+            raise
+        finally:
+            if name not in ('pipeline', 'pubsub'):
+                metric_observe('redis_latency', time.perf_counter() - started, name)
+        if name == 'pipeline':
+            return _ManagedPipeline(self, result)
+        return result
+    
+    def direct(self, name):
+        """복제본 라우팅 없이 이 서버에서 실행하는 명령 (ReadRouter의 primary 읽기/하트비트용)"""
+        if self._client is None:
+            raise AttributeError(f"Redis 클라이언트가 비활성 상태입니다 ({name})")
+        attr = getattr(self._client, name)
+        return lambda *args, **kwargs: self._call(name, attr, args, kwargs)
+    
+    def report_error(self, error):
+        """명령 오류 집계 - 연결 계열 오류만 'down' 전환 (WRONGTYPE 등 명령 오류는 제외)"""
+        import redis
+        
+        self._stats['command_errors'] += 1
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError, redis.exceptions.ClusterDownError)):
+            self._mark_down(error)
+    
+    def connection_stats(self):
+        """연결 상태 지표 (관리자 API / 메트릭 노출용)"""
+        now = time.time()
+        down_seconds = self._down_seconds + (now - self._state_changed_at if self._state == 'down' else 0)
+        pool = getattr(self._client, 'connection_pool', None)
+        return {
+            'backend': self.backend,
+            'cluster_nodes': len(self._client.get_nodes()) if self.cluster and self._client else None,
+            'state': self._state,
+            'state_since': datetime.fromtimestamp(self._state_changed_at, KST).isoformat(),
+            'consecutive_failures': self._failures,
+            'next_retry_in': round(max(0.0, self._next_retry_at - time.monotonic()), 1) if self._state == 'down' else 0,
+            'down_seconds_total': round(down_seconds, 1),
+            'pool_in_use': len(getattr(pool, '_in_use_connections', ())) if pool else 0,
+            'pool_available': len(getattr(pool, '_available_connections', ())) if pool else 0,
+            **self._stats,
+            'reads': self.reads.stats() if self.reads is not None else None,
+        }
+
+class _ClusterClient:
+    """
+    RedisCluster 래퍼 (동기 / redis.asyncio 공용) - 단일 Redis와 같은 호출 방식 유지
+    
+    - mget: 키가 여러 슬롯에 걸치면 노드별로 나눠 조회 (mget_nonatomic)
+    - pipeline: ClusterPipeline이 명령을 노드별로 묶어 노드당 1회 왕복
+      (클러스터는 MULTI 트랜잭션 미지원 → transaction 인자 무시, 원자성이 필요한 곳은 StorageScript 사용)
+    - 스크립트(EVALSHA)는 키의 슬롯 노드로 전달 - 키는 account_key(key, owner) 등으로 같은 슬롯에 둘 것
+    """
+    
+    def __init__(self, cluster):
+        self._cluster = cluster
+    
+    def __getattr__(self, name):
+        return getattr(self._cluster, name)
+    
+    def mget(self, keys, *args):
+        return self._cluster.mget_nonatomic(keys, *args)
+    
+    def pipeline(self, transaction=None, shard_hint=None):
+        return self._cluster.pipeline()
+
+class _ManagedPipeline:
+    """pipeline.execute()의 연결 오류도 ManagedRedis 상태에 반영"""
+    
+    def __init__(self, owner, pipe):
+        self._owner = owner
+        self._pipe = pipe
+    
+    def __len__(self):
+        return len(self._pipe)
+    
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+    
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._pipe.execute(*args, **kwargs)
+        except Exception as e:
+            self._owner.report_error(e)
+            raise
+        finally:
+            metric_observe('redis_latency', time.perf_counter() - started, 'pipeline')
+
+class ReadRouter:
+    """
+    지연 허용 읽기 라우팅 (primary ManagedRedis 하나에 연결, replica_reads 블록의 읽기만 처리)
+    
+    - 복제본마다 ManagedRedis → 재연결/백오프/헬스 체크는 primary와 같은 방식
+    - 복제 지연: primary의 마지막 하트비트(이전 확인 때 어느 워커든 SET한 시각 ms)와 복제본이 받은 하트비트의 차이
+      → 확인한 뒤 새 하트비트 SET (REDIS_REPLICA_CHECK_INTERVAL마다 요청 안에서 한 스레드만 확인)
+      한가한 동안에도 복제본이 마지막 하트비트를 받았으면 0 / 다른 워커가 막 SET한 하트비트가 아직 안 왔으면
+      직전 확인 간격만큼 크게 잡힐 수 있음 (그동안은 primary에서 읽음)
+    - 끊겼거나(읽기 실패) 지연이 REDIS_REPLICA_MAX_LAG초를 넘은 복제본만 제외하고 나머지를 라운드 로빈
+    - 쓸 수 있는 복제본이 없거나 복제본 명령이 실패하면 primary에서 읽음
+    - 복제본이 없어도 endpoint별 읽기 지연은 기록 (복제본 도입 전후 비교용)
+    """
+    
+    def __init__(self, primary, urls):
+        self._primary = primary
+        self._replicas = [ManagedRedis(url, name=f'replica{i}') for i, url in enumerate(urls)]
+        self._lags = [None] * len(self._replicas)
+        self._checked_at = None
+        self._check_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._cursor = 0
+        self._reads = {}  # (endpoint, 대상) → [횟수, 누적 초, 최대 초]
+        self._fallbacks = {}  # 사유 → 횟수
+    
+    def after_fork(self):
+        self._check_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._lags = [None] * len(self._replicas)
+        self._checked_at = None
+        for replica in self._replicas:
+            replica.after_fork()
+    
+    # ---------- 복제 지연 ----------
+    
+    def refresh_due(self):
+        return bool(self._replicas) and (
+            self._checked_at is None or time.monotonic() - self._checked_at >= REDIS_REPLICA_CHECK_INTERVAL)
+    
+    def refresh(self):
+        """하트비트 기록 + 복제본별 지연 갱신 (주기가 지났을 때만, 동시에 하나만)"""
+        if not self.refresh_due() or not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            try:
+                reference = self._primary.direct('get')(REPLICA_HEARTBEAT_KEY)
+                if reference is None:  # 첫 확인/만료 → 기준 하트비트를 먼저 기록
+                    reference = int(time.time() * 1000)
+                    self._primary.direct('set')(REPLICA_HEARTBEAT_KEY, reference, ex=REPLICA_HEARTBEAT_TTL)
+                reference = int(reference)
+            except Exception as e:
+                log(f"⚠️ 복제 하트비트 확인 실패: {e}", "WARNING")
+                reference = None
+            self._lags = [self._measure_lag(replica, reference) for replica in self._replicas]
+            try:
+                self._primary.direct('set')(REPLICA_HEARTBEAT_KEY, int(time.time() * 1000), ex=REPLICA_HEARTBEAT_TTL)
+            except Exception as e:
+                log(f"⚠️ 복제 하트비트 기록 실패: {e}", "WARNING")
+            self._checked_at = time.monotonic()
+        finally:
+            self._check_lock.release()
+    
+    @staticmethod
+    def _measure_lag(replica, reference):
+        """
+        primary의 기준 하트비트(ms) - 복제본이 받은 하트비트 → 지연 (초)
+        
+        None: 끊김 / primary 확인 실패 / 복제본에 하트비트가 아직 없음 (복제가 안 되고 있거나 막 처음 기록함)
+        """
+        if not replica or reference is None:
+            return None
+        try:
+            beat = replica.get(REPLICA_HEARTBEAT_KEY)
+        except Exception:
+            return None
+        if beat is None:
+            return None
+        return max(0.0, (reference - int(beat)) / 1000)
+    
+    def pick(self):
+        """읽을 복제본 하나 (라운드 로빈) - 쓸 수 있는 복제본이 없으면 None"""
+        if not self._replicas:
+            return None
+        usable = [replica for replica, lag in zip(self._replicas, self._lags)
+                  if lag is not None and lag <= REDIS_REPLICA_MAX_LAG and replica.state == 'up']
+        if not usable:
+            self.fallback('unavailable')
+            return None
+        self._cursor += 1
+        return usable[self._cursor % len(usable)]
+    
+    # ---------- 읽기 ----------
+    
+    def read(self, endpoint, run, primary_only=False):
+        """
+        run(command)을 복제본에서 실행, 복제본이 없거나 실패하면 primary에서
+        
+        Args:
+            endpoint: 지연 집계 이름 (replica_reads 인자)
+            run: 명령 이름 → 호출 가능 객체를 받는 함수 (command('get')(key) 형태로 사용)
+            primary_only: 쓰기가 섞인 파이프라인 (지연만 기록)
+        """
+        if not primary_only:
+            self.refresh()
+            replica = self.pick()
+            if replica is not None:
+                started = time.perf_counter()
+                try:
+                    result = run(lambda name: getattr(replica, name))
+                except Exception as e:
+                    self.replica_failed(replica, e)
+                else:
+                    self.record(endpoint, replica.name, time.perf_counter() - started)
+                    return result
+        
+        started = time.perf_counter()
+        result = run(self._primary.direct)
+        self.record(endpoint, 'primary', time.perf_counter() - started)
+        return result
+    
+    def replica_failed(self, replica, error):
+        log(f"⚠️ 복제본 읽기 실패 ({replica.name}): {error} → primary에서 읽음", "WARNING")
+        self.fallback('error')
+    
+    def fallback(self, reason):
+        metric_inc('redis_replica_fallbacks', reason)
+        with self._stats_lock:
+            self._fallbacks[reason] = self._fallbacks.get(reason, 0) + 1
+    
+    def record(self, endpoint, target, seconds):
+        metric_observe('redis_reads', seconds, endpoint, target)
+        with self._stats_lock:
+            entry = self._reads.setdefault((endpoint, target), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+    
+    def stats(self):
+        """복제본 상태/지연 + endpoint·대상별 읽기 횟수와 지연 (connection_stats의 'reads')"""
+        with self._stats_lock:
+            reads = {}
+            for (endpoint, target), (count, total, peak) in sorted(self._reads.items()):
+                reads.setdefault(endpoint, {})[target] = {
+                    'reads': count,
+                    'avg_ms': round(total / count * 1000, 2),
+                    'max_ms': round(peak * 1000, 2),
+                }
+            fallbacks = dict(self._fallbacks)
+        return {
+            'max_lag_seconds': REDIS_REPLICA_MAX_LAG,
+            'replicas': [{
+                'name': replica.name,
+                'state': replica.state,
+                'lag_seconds': round(lag, 3) if lag is not None else None,
+                'in_rotation': lag is not None and lag <= REDIS_REPLICA_MAX_LAG and replica.state == 'up',
+            } for replica, lag in zip(self._replicas, self._lags)],
+            'fallbacks': fallbacks,
+            'endpoints': reads,
+        }
+
+class _RoutedPipeline:
+    """
+    replica_reads 블록의 파이프라인 - 명령을 모아 두었다가 execute 시점에 실행 위치 결정
     
-    ✨ NEW: DAU/WAU/MAU/신규/재방문/세션 시간 추적
+    모두 읽기 명령이면 복제본, 쓰기(SUNIONSTORE/EXPIRE 등)가 하나라도 섞이면 전체를 primary에서
+    """
     
-    Args:
-        action: 액션 유형 ('page_view', 'blog_analyzed', 'comment_copied', 'blog_visit')
-        data: 추가 데이터 (dict) - userId, firstVisit, sessionDuration 포함
-        success: 성공 여부
-        error_message: 실패 시 에러 메시지
+    def __init__(self, router, endpoint, args, kwargs):
+        self._router = router
+        self._endpoint = endpoint
+        self._options = (args, kwargs)
+        self._commands = []
+    
+    def __len__(self):
+        return len(self._commands)
+    
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+    
+    def execute(self):
+        commands, self._commands = self._commands, []
+        args, kwargs = self._options
+        
+        def run(command):
+            pipe = command('pipeline')(*args, **kwargs)
+            for name, command_args, command_kwargs in commands:
+                getattr(pipe, name)(*command_args, **command_kwargs)
+            return pipe.execute()
+        read_only = all(name in REPLICA_READ_COMMANDS for name, _, _ in commands)
+        return self._router.read(self._endpoint, run, primary_only=not read_only)
+
+# ============================
+# 💽 저장소 선택 (Redis / 메모리 / SQLite)
+# ============================
+# 캐시/통계/추천/보너스는 모두 `store`를 통해 Redis 명령 형태로 호출
+# - redis: Vercel KV 등 (ManagedRedis)
+# - memory: 프로세스 내 (Redis 없이 로컬 개발/벤치마크 - 명시적으로 지정할 때만)
+# - sqlite: WAL 파일 (단일 서버 배포, 워커 간 공유)
+# - auto (기본): Redis URL이 있으면 redis, 없으면 none
+# - none: 저장소 없이 GA4만 사용 (기존 동작 - 한도/보너스/추천은 server_not_ready)
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'auto').lower()
+STORAGE_SQLITE_PATH = os.environ.get('STORAGE_SQLITE_PATH', 'data/repost.sqlite3')
+
+def create_storage(backend=None):
     """
-    try:
-        # 서버 로그 출력
-        log(f"📊 Analytics: {action} | success={success}", "ANALYTICS")
-        
-        # Vercel KV에 저장 (Redis 프로토콜)
-        if redis_client:
-            try:
-                now_kst = get_kst_now()
-                today = now_kst.strftime('%Y-%m-%d')
-                hour = now_kst.strftime('%H')
-                status = 'success' if success else 'failed'
-                
-                # 1. 전체 카운트 증가
-                redis_client.incr(f"analytics:total:{action}")
-                
-                # 2. 오늘 카운트 증가
-                key_daily = f"analytics:daily:{today}:{action}"
-                redis_client.incr(key_daily)
-                redis_client.expire(key_daily, 2592000)  # 30일
-                
-                # 3. 성공/실패 카운트
-                redis_client.incr(f"analytics:{status}:{action}")
-                
-                # 4. 시간대별 카운트 (오늘만)
-                key_hourly = f"analytics:hourly:{today}:{hour}"
-                redis_client.incr(key_hourly)
-                redis_client.expire(key_hourly, 86400)  # 24시간
-                
-                # ✨ 5. DAU/WAU/MAU 추적 (page_view 이벤트에서만)
-                if action == 'page_view' and data and 'userId' in data:
-                    user_id = data['userId']
-                    first_visit = data.get('firstVisit', '')
-                    
-                    log(f"👤 page_view 수신: userId={user_id[:20]}..., firstVisit={first_visit[:30] if first_visit else 'None'}...", "ANALYTICS")
-                    
-                    # DAU: 오늘 활성 사용자 (SET - 자동 중복 제거!)
-                    redis_client.sadd(f'analytics:dau:{today}', user_id)
-                    redis_client.expire(f'analytics:dau:{today}', 2592000)  # 30일
-                    log(f"✅ DAU 저장: {user_id[:20]}... → analytics:dau:{today}", "ANALYTICS")
-                    
-                    # WAU: 최근 7일 활성 사용자 (각 날짜별 SET)
-                    for i in range(7):
-                        date = (now_kst - timedelta(days=i)).strftime('%Y-%m-%d')
-                        if date == today:  # 오늘만 추가
-                            redis_client.sadd(f'analytics:wau:{date}', user_id)
-                            redis_client.expire(f'analytics:wau:{date}', 2592000)
-                    
-                    # MAU: 최근 30일 활성 사용자 (각 날짜별 SET)
-                    for i in range(30):
-                        date = (now_kst - timedelta(days=i)).strftime('%Y-%m-%d')
-                        if date == today:  # 오늘만 추가
-                            redis_client.sadd(f'analytics:mau:{date}', user_id)
-                            redis_client.expire(f'analytics:mau:{date}', 2592000)
-                    
-                    # 신규 vs 재방문 사용자 구분
-                    user_key = f'analytics:user:{user_id}:info'
-                    user_exists = redis_client.exists(user_key)
-                    
-                    log(f"🔍 Redis 확인: user_key={user_key[:60]}... exists={user_exists}", "ANALYTICS")
-                    
-                    if not user_exists:
-                        # 신규 사용자
-                        redis_client.hset(user_key, 'first_visit', first_visit or now_kst.isoformat())
-                        redis_client.hset(user_key, 'first_date', today)
-                        redis_client.expire(user_key, 7776000)  # 90일
-                        
-                        # 오늘 신규 사용자 카운트
-                        redis_client.sadd(f'analytics:new_users:{today}', user_id)
-                        redis_client.expire(f'analytics:new_users:{today}', 2592000)
-                        
-                        log(f"✨ 신규 사용자 저장 완료: {user_id[:15]}... → {user_key[:60]}...", "ANALYTICS")
-                    else:
-                        # 재방문 사용자
-                        stored_data = redis_client.hgetall(user_key)
-                        log(f"🔄 재방문 사용자: {user_id[:15]}... (첫방문: {stored_data.get('first_date', 'N/A')})", "ANALYTICS")
-                
-                # ✨ 세션 시간 기록 (모든 이벤트, page_view 제외)
-                # page_view는 로드 직후라 부정확하므로 실제 행동(댓글 복사, 블로그 이동)만 기록
-                session_duration = data.get('sessionDuration', 0) if data else 0
-                if session_duration > 0 and action != 'page_view':
-                    redis_client.lpush(f'analytics:sessions:{today}', session_duration)
-                    redis_client.ltrim(f'analytics:sessions:{today}', 0, 9999)  # 최대 10000개
-                    redis_client.expire(f'analytics:sessions:{today}', 2592000)
-                    log(f"✅ 세션 시간 저장: {session_duration}초 ({action})", "ANALYTICS")
-                
-                # 6. 브라우저/디바이스/OS 통계 (page_view 이벤트에서만)
-                if action == 'page_view' and data:
-                    if 'browser' in data:
-                        redis_client.incr(f"analytics:browser:{data['browser']}")
-                    if 'deviceType' in data:
-                        redis_client.incr(f"analytics:device:{data['deviceType']}")
-                    if 'os' in data:
-                        redis_client.incr(f"analytics:os:{data['os']}")
-                
-                # 7. 피드백 통계 (rating별 카운트)
-                if action == 'quick_feedback' and data and 'rating' in data:
-                    rating = data['rating']
-                    redis_client.incr(f"analytics:feedback:rating_{rating}")
-                
-                log(f"✅ KV 저장 완료: {action}", "ANALYTICS")
-                
-            except Exception as kv_error:
-                log(f"⚠️ KV 저장 실패: {kv_error}", "WARNING")
-        
-        if error_message:
-            log(f"⚠️ Error: {error_message}", "ERROR")
-        
-    except Exception as e:
-        log(f"⚠️ Analytics logging failed: {e}", "WARNING")
+    STORAGE_BACKEND 설정에 맞는 저장소 생성
+    
+    Returns:
+        Redis 호환 명령(get/set/incr/sadd/hincrby/pipeline/pubsub...)을 제공하는 객체
+    """
+    redis_url = os.environ.get('KV_REDIS_URL') or os.environ.get('REDIS_URL')
+    backend = (backend or STORAGE_BACKEND)
+    if backend == 'auto':
+        backend = 'redis' if redis_url else 'none'
+    
+    if backend == 'memory':
+        from storage import MemoryStorage
+        
+        # 워커/서버리스 인스턴스마다 따로이고 재시작하면 사라짐 (사용량 한도, 보너스 잔액, 추천 기록 포함)
+        log("⚠️ STORAGE_BACKEND=memory - 프로세스별 저장소 (로컬 개발/벤치마크용, 배포에는 redis/sqlite)", "WARNING")
+        return MemoryStorage()
+    if backend == 'sqlite':
+        from storage import SQLiteStorage
+        return SQLiteStorage(STORAGE_SQLITE_PATH)
+    if backend == 'none':
+        return ManagedRedis(None)
+    if backend != 'redis':
+        log(f"⚠️ 알 수 없는 STORAGE_BACKEND={backend} - redis 사용", "WARNING")
+    replica_urls = REDIS_REPLICA_URLS
+    if REDIS_CLUSTER and replica_urls:
+        log("⚠️ REDIS_CLUSTER 모드에서는 REDIS_REPLICA_URLS를 사용하지 않음 (읽기도 primary 노드)", "WARNING")
+        replica_urls = []
+    return ManagedRedis(redis_url, cluster=REDIS_CLUSTER, replica_urls=replica_urls)
 
-# 로컬 개발 환경에서만 .env 파일 로드
-if os.path.exists('.env'):
-    load_dotenv()
-    log("📁 .env 파일 로드됨 (로컬 개발 모드)")
-else:
-    log("☁️ 배포 환경 - 시스템 환경변수 사용")
+store = create_storage()
 
-app = Flask(__name__)
-CORS(app)
+# ============================
+# 🧵 워커 동시성 (gunicorn gthread / gevent + preload_app)
+# ============================
+# gunicorn.conf.py는 마스터에서 앱을 한 번 임포트한 뒤 워커를 포크 (preload_app)
+# → 포크 전에 만든 소켓/잠금/스레드는 워커에서 쓰지 않도록 post_fork에서 reinit_after_fork() 호출
+# - OpenAI: 지연 클라이언트를 초기화 전으로 (워커마다 새 httpx 커넥션 풀, 스레드 간 공유 가능)
+# - Redis: 새 BlockingConnectionPool + 헬스 체크 스레드
+# - 스크래핑: 프로세스당 requests 세션 하나를 스레드/그린렛이 공유 (keep-alive 재사용, 쿠키 저장 안 함)
 
-# 🔐 세션 보안 설정
-app.secret_key = os.environ.get('SECRET_KEY', 'repost-admin-secret-key-change-this-in-production')
-# HTTPS 환경에서만 Secure Cookie 사용 (로컬 테스트 시 http 허용)
-app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV') == 'production'
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '32'))  # 호스트당 유지할 keep-alive 커넥션 수
 
-# 🔐 관리자 계정 설정 (환경변수에서 가져오기)
-ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
-ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'repost2025!')
+_http_session = None
+_http_session_lock = threading.Lock()
 
-# 🔐 로그인 필수 데코레이터
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'admin_logged_in' not in session:
-            return redirect(url_for('admin_login'))
-        return f(*args, **kwargs)
-    return decorated_function
+def get_http_session():
+    """스크래핑용 requests 세션 (요청 간 상태를 남기지 않도록 쿠키는 받지 않음)"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import requests
+                from http.cookiejar import DefaultCookiePolicy
+                
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
 
-# 📊 Redis (Vercel KV) 클라이언트 초기화
-redis_client = None
-try:
-    redis_url = os.environ.get('KV_REDIS_URL') or os.environ.get('REDIS_URL')
+def preload_lazy_modules():
+    """
+    gunicorn preload_app: 요청 중에 지연 임포트하는 무거운 모듈을 마스터에서 미리 임포트
     
-    if redis_url:
-        # Redis 프로토콜 연결
-        redis_client = redis.from_url(
-            redis_url,
-            decode_responses=True,  # 문자열로 자동 디코딩
-            socket_connect_timeout=5,
-            socket_timeout=5
-        )
-        # 연결 테스트
-        redis_client.ping()
-        log("✅ Vercel KV (Redis) 연결 성공!")
-    else:
-        log("⚠️ KV 환경변수 없음 - GA4만 사용")
-        redis_client = None
-except Exception as e:
-    log(f"⚠️ KV 연결 실패: {e} - GA4만 사용")
-    redis_client = None
-
-# OpenAI 클라이언트 초기화
-api_key = os.environ.get('OPENAI_API_KEY')
-log(f"🔑 환경변수 확인: OPENAI_API_KEY={'있음 ('+api_key[:10]+'...)' if api_key else '❌ 없음'}")
-
-# 클라이언트 초기화 (에러 핸들링 추가)
-client = None
-if api_key:
-    try:
-        client = OpenAI(api_key=api_key)
-        log("✅ OpenAI 클라이언트 초기화 성공!")
-    except Exception as e:
-        log(f"❌ OpenAI 클라이언트 초기화 실패: {e}")
-        client = None
-else:
-    log("⚠️ API 키가 없어서 기본 템플릿 사용")
+    - 워커가 포크로 공유 (워커마다 첫 요청이 임포트 비용을 내지 않음)
+    - gevent: 여러 그린렛이 같은 모듈을 동시에 처음 임포트하면 임포트 잠금에서 서로 막히므로 필수
+    (서버리스 콜드 스타트에는 영향 없음 - gunicorn.conf.py에서만 호출)
+    """
+    for module in ('requests', 'bs4', 'openai'):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+def reinit_after_fork():
+    """gunicorn post_fork: 부모(마스터)에서 만든 클라이언트를 버리고 워커에서 새로 만들도록"""
+    global _http_session, _http_session_lock
+    client.reset()
+    if isinstance(store, ManagedRedis):
+        store.after_fork()
+    _http_session = None
+    _http_session_lock = threading.Lock()
+    log("🧵 워커 포크 후 클라이언트 초기화", "DEBUG", pid=os.getpid())
 
 # ============================
 # 💾 캐싱 시스템 (프로덕션급)
@@ -229,60 +1723,139 @@ else:
 
 import hashlib
 
+from platforms import platform_label, platform_selectors, resolve_url
+
 def normalize_blog_url(url):
     """
-    블로그 URL 정규화 (모바일/데스크톱 URL 통일)
+    블로그 URL 정규화 (모바일/데스크톱/PostView/추적 파라미터 등 같은 글이면 같은 주소)
     
     Args:
         url: 블로그 URL
     
     Returns:
-        str: 정규화된 URL
+        str: 정규화된 URL (플랫폼 규칙은 platforms.py)
     """
-    try:
-        from urllib.parse import urlparse, parse_qs
-        
-        parsed = urlparse(url)
-        
-        # 네이버 블로그 URL 처리
-        if 'blog.naver.com' in url or 'm.blog.naver.com' in url:
-            # 쿼리 파라미터에서 blogId, logNo 추출
-            query_params = parse_qs(parsed.query)
-            
-            if 'blogId' in query_params and 'logNo' in query_params:
-                blog_id = query_params['blogId'][0]
-                log_no = query_params['logNo'][0]
-            else:
-                # 경로에서 추출
-                path_parts = parsed.path.strip('/').split('/')
-                if len(path_parts) >= 2:
-                    blog_id = path_parts[0]
-                    log_no = path_parts[-1]
-                else:
-                    return url  # 변환 실패 시 원본 반환
-            
-            # 정규화된 URL 생성 (항상 동일한 형식)
-            return f"blog.naver.com/{blog_id}/{log_no}"
-        
-        # 다른 블로그 플랫폼은 도메인 + 경로
-        return f"{parsed.netloc}{parsed.path}"
-    
-    except:
-        return url  # 에러 시 원본 반환
+    return resolve_url(url).canonical
+
+# 캐시 네임스페이스 = "{생성 지문}.{세대}" → 키에 포함되므로 바뀌면 이전 캐시는 조회되지 않고 TTL로 사라짐
+# - 생성 지문: 모델 + 프롬프트 + 템플릿 문구 버전의 해시 (배포로 바뀌면 자동으로 새 네임스페이스)
+# - 세대: CACHE_GENERATION_KEY 카운터 - 관리자 무효화 = INCR 1번 (키를 지우지 않음)
+ANALYSIS_CACHE_TTL = 86400  # 분석 결과 캐시 (24시간)
+CACHE_GENERATION_KEY = 'cache:generation'
+CACHE_NAMESPACES_KEY = 'analytics:cache:namespaces'  # zset {네임스페이스: 첫 저장 시각(ms)}
+CACHE_NAMESPACE_STATS_TTL = 30 * 24 * 60 * 60  # 네임스페이스별 히트/미스/저장 통계 보관 (30일)
+# 다른 워커의 무효화를 반영하는 주기 (초) - 그 사이에는 프로세스에 기억한 세대 사용
+CACHE_GENERATION_REFRESH = float(os.environ.get('CACHE_GENERATION_REFRESH', '10'))
+
+_cache_generation = {'value': 0, 'checked_at': None}
+
+@lru_cache(maxsize=1)
+def cache_fingerprint():
+    """모델/프롬프트/템플릿 문구 버전 → 8자리 해시 (프로세스 동안 고정)"""
+    source = '\x00'.join((AI_MODEL, AI_SYSTEM_PROMPT, AI_PROMPT_TEMPLATE, str(TEMPLATE_CORPUS_VERSION)))
+    return hashlib.sha1(source.encode()).hexdigest()[:8]
+
+def cache_generation_due():
+    """저장소의 세대를 다시 읽을 때인지"""
+    checked_at = _cache_generation['checked_at']
+    return checked_at is None or time.monotonic() - checked_at >= CACHE_GENERATION_REFRESH
+
+def set_cache_generation(raw):
+    """저장소에서 읽은 세대 값 반영 (다른 워커가 무효화했으면 로그)"""
+    generation = int(raw or 0)
+    if _cache_generation['checked_at'] is not None and generation != _cache_generation['value']:
+        log(f"🔄 캐시 세대 변경: {_cache_generation['value']} → {generation}", "CACHE")
+    _cache_generation['value'] = generation
+    _cache_generation['checked_at'] = time.monotonic()
+
+def cache_generation_failed(error):
+    """세대 조회 실패 → 다음 주기까지 기억한 세대로 계속 (장애 중 매 요청 재조회 방지)"""
+    _cache_generation['checked_at'] = time.monotonic()
+    log(f"⚠️ 캐시 세대 조회 실패: {error}", "WARNING")
 
-def generate_cache_key(url):
+def current_cache_namespace():
+    """기억한 세대 기준 네임스페이스 (저장소 조회 없음)"""
+    return f"{cache_fingerprint()}.{_cache_generation['value']}"
+
+def cache_namespace():
+    """현재 캐시 네임스페이스 (CACHE_GENERATION_REFRESH초마다 저장소의 세대 확인)"""
+    if store and cache_generation_due():
+        try:
+            set_cache_generation(store.get(CACHE_GENERATION_KEY))
+        except Exception as e:
+            cache_generation_failed(e)
+    return current_cache_namespace()
+
+def invalidate_cache():
+    """전체 캐시 무효화 (세대 +1) → 새 네임스페이스"""
+    previous = current_cache_namespace()
+    set_cache_generation(store.incr(CACHE_GENERATION_KEY))
+    namespace = current_cache_namespace()
+    log(f"🧹 캐시 무효화: {previous} → {namespace}", "CACHE")
+    return namespace
+
+def generate_cache_key(url, namespace):
     """
-    캐시 키 생성 (URL 해시)
+    캐시 키 생성 (네임스페이스 + URL 해시)
     
     Args:
         url: 정규화된 URL
+        namespace: 캐시 네임스페이스 (cache_namespace())
     
     Returns:
         str: 캐시 키
     """
     url_hash = hashlib.md5(url.encode()).hexdigest()
-    return f"cache:blog:{url_hash}"
+    return f"cache:blog:{namespace}:{url_hash}"
+
+def cache_lookup_key(url, namespace):
+    """블로그 URL → (정규화된 URL, 캐시 키) - 동기/비동기(asgi.py) 캐시 함수 공용"""
+    normalized_url = normalize_blog_url(url)
+    return normalized_url, generate_cache_key(normalized_url, namespace)
+
+def cache_namespace_stats_ops(namespace, field):
+    """네임스페이스별 통계 증가 명령 (hits / misses / stores)"""
+    key = f'analytics:cache:ns:{namespace}'
+    return [('hincrby', key, field, 1), ('expire', key, CACHE_NAMESPACE_STATS_TTL)]
+
+def record_cache_outcome(normalized_url, hit, namespace):
+    """캐시 히트/미스 로그 + 메트릭 → 실행할 통계 명령 [(명령, 인자...)] (전체, 오늘, 네임스페이스별)"""
+    if hit:
+        log(f"✅ 캐시 HIT: {normalized_url[:50]}...", "CACHE")
+    else:
+        log(f"❌ 캐시 MISS: {normalized_url[:50]}...", "CACHE")
+    kind = 'hits' if hit else 'misses'
+    metric_inc('cache', getattr(store, 'backend', 'redis'), 'hit' if hit else 'miss')
+    return [
+        ('incr', f'analytics:cache:{kind}'),
+        ('incr', f'analytics:cache:{kind}:{get_kst_now().strftime("%Y-%m-%d")}'),
+        *cache_namespace_stats_ops(namespace, kind),
+    ]
+
+def record_cache_store(namespace):
+    """캐시 저장 통계 명령 (전체 저장 수 + 네임스페이스별 + 네임스페이스 첫 저장 시각)"""
+    return [
+        ('incr', 'analytics:cache:stores'),
+        *cache_namespace_stats_ops(namespace, 'stores'),
+        ('zadd', CACHE_NAMESPACES_KEY, {namespace: int(time.time() * 1000)}, True),  # nx: 처음 시각 유지
+    ]
+
+def run_store_ops(ops):
+    """통계 명령 목록을 파이프라인 한 번으로 실행"""
+    pipe = store.pipeline(transaction=False)
+    for command, *args in ops:
+        getattr(pipe, command)(*args)
+    pipe.execute()
+
+def cache_payload(blog_data, comments):
+    """캐시에 저장할 JSON 문자열"""
+    return json.dumps({
+        'blog': blog_data,
+        'comments': comments,
+        'cached_at': get_kst_now().isoformat()
+    }, ensure_ascii=False)
 
+@timed('cache_lookup')
 def get_cached_comments(url):
     """
     캐시에서 댓글 조회
@@ -293,39 +1866,28 @@ def get_cached_comments(url):
     Returns:
         dict or None: 캐시된 데이터 (blog + comments) 또는 None
     """
-    if not redis_client:
+    if not store:
         return None
     
     try:
-        normalized_url = normalize_blog_url(url)
-        cache_key = generate_cache_key(normalized_url)
+        # 세대/캐시 조회는 복제본에서 (REDIS_REPLICA_URLS), 통계 증가는 primary
+        with replica_reads('cache'):
+            namespace = cache_namespace()
+            normalized_url, cache_key = cache_lookup_key(url, namespace)
+            cached_data = store.get(cache_key)
         
-        # Redis에서 조회
-        cached_data = redis_client.get(cache_key)
+        # 캐시 히트/미스 통계 증가 (전체 + 네임스페이스별)
+        run_store_ops(record_cache_outcome(normalized_url, bool(cached_data), namespace))
         
-        if cached_data:
-            import json
-            log(f"✅ 캐시 HIT: {normalized_url[:50]}...", "CACHE")
-            
-            # 캐시 히트 통계 증가
-            redis_client.incr('analytics:cache:hits')
-            redis_client.incr(f'analytics:cache:hits:{get_kst_now().strftime("%Y-%m-%d")}')
-            
-            return json.loads(cached_data)
-        else:
-            log(f"❌ 캐시 MISS: {normalized_url[:50]}...", "CACHE")
-            
-            # 캐시 미스 통계 증가
-            redis_client.incr('analytics:cache:misses')
-            redis_client.incr(f'analytics:cache:misses:{get_kst_now().strftime("%Y-%m-%d")}')
-            
-            return None
+        return json.loads(cached_data) if cached_data else None
     
     except Exception as e:
         log(f"⚠️ 캐시 조회 실패: {e}", "WARNING")
+        metric_inc('cache', getattr(store, 'backend', 'redis'), 'error')
         return None
 
-def set_cached_comments(url, blog_data, comments, ttl=86400):
+@timed('cache_store')
+def set_cached_comments(url, blog_data, comments, ttl=ANALYSIS_CACHE_TTL):
     """
     댓글을 캐시에 저장
     
@@ -338,31 +1900,20 @@ def set_cached_comments(url, blog_data, comments, ttl=86400):
     Returns:
         bool: 저장 성공 여부
     """
-    if not redis_client:
+    if not store:
         return False
     
     try:
-        normalized_url = normalize_blog_url(url)
-        cache_key = generate_cache_key(normalized_url)
-        
-        import json
-        cache_data = {
-            'blog': blog_data,
-            'comments': comments,
-            'cached_at': get_kst_now().isoformat()
-        }
+        namespace = cache_namespace()
+        normalized_url, cache_key = cache_lookup_key(url, namespace)
         
         # Redis에 저장 (24시간 TTL)
-        redis_client.setex(
-            cache_key,
-            ttl,
-            json.dumps(cache_data, ensure_ascii=False)
-        )
+        store.setex(cache_key, ttl, cache_payload(blog_data, comments))
         
-        log(f"💾 캐시 저장 완료: {normalized_url[:50]}... (TTL: {ttl}초)", "CACHE")
+        log(f"💾 캐시 저장 완료: {normalized_url[:50]}... (TTL: {ttl}초)", "CACHE", namespace=namespace)
         
         # 캐시 저장 통계 증가
-        redis_client.incr('analytics:cache:stores')
+        run_store_ops(record_cache_store(namespace))
         
         return True
     
@@ -370,134 +1921,514 @@ def set_cached_comments(url, blog_data, comments, ttl=86400):
         log(f"⚠️ 캐시 저장 실패: {e}", "WARNING")
         return False
 
+# ============================
+# 🚦 사용량 한도 (서버 기준 무료 횟수 + 속도 제한)
+# ============================
+# 브라우저 localStorage 횟수는 지우면 그만이므로 /api/analyze는 서버에서 한 번 더 확인
+# 검사 1회 = 스크립트 1회 (Redis Lua / memory·sqlite는 트랜잭션 안의 파이썬 구현):
+#   1) 토큰 버킷: userId와 IP 각각 QUOTA_BURST개, 분당 QUOTA_REFILL_PER_MINUTE개 충전 (연타/스크립트 차단)
+#   2) 일일 무료 횟수: userId 기준 (첫 사용 후 QUOTA_TRIAL_DAYS일은 체험 한도), IP 기준 상한 별도
+#   3) 무료 횟수 소진 시 보너스 잔액 (친구 추천/SNS 공유로 적립) 차감
+# 저장소가 없거나 오류가 나면 통과 (한도 때문에 서비스가 멈추지 않도록)
+
+QUOTA_ENABLED = os.environ.get('QUOTA_ENABLED', '1') == '1'
+QUOTA_DAILY_LIMIT = int(os.environ.get('QUOTA_DAILY_LIMIT', '3'))
+QUOTA_TRIAL_DAILY_LIMIT = int(os.environ.get('QUOTA_TRIAL_DAILY_LIMIT', '7'))
+QUOTA_TRIAL_DAYS = int(os.environ.get('QUOTA_TRIAL_DAYS', '7'))
+QUOTA_IP_DAILY_LIMIT = int(os.environ.get('QUOTA_IP_DAILY_LIMIT', '50'))  # 같은 공유기/회사망 여러 명 고려
+QUOTA_BURST = int(os.environ.get('QUOTA_BURST', '5'))
+QUOTA_REFILL_PER_MINUTE = float(os.environ.get('QUOTA_REFILL_PER_MINUTE', '6'))
+QUOTA_FIRST_SEEN_TTL = 365 * 24 * 60 * 60
+
+# 단일 Redis/memory/sqlite: 사용자 + IP 검사와 차감을 스크립트 1회로 (원자적)
+# KEYS: 1 사용자 버킷, 2 사용자 일일 사용량, 3 보너스 잔액, 4 첫 사용 시각, 5 IP 버킷, 6 IP 일일 사용량
+# ARGV: 1 now_ms, 2 burst, 3 ms당 충전량, 4 기본 한도, 5 체험 한도, 6 체험 기간(ms), 7 일일 키 TTL,
+#       8 첫 사용 키 TTL, 9 버킷 키 TTL, 10 IP 한도
+# 반환: {허용 여부, 사유/차감 출처, 재시도 대기(ms), 일일 한도, 오늘 사용량, 보너스 잔액, IP 남은 횟수}
+QUOTA_LUA = """
+local now = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+
+local function refill(key)
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+
+local user_tokens = refill(KEYS[1])
+local ip_tokens = refill(KEYS[5])
+local limit = tonumber(ARGV[4])
+local first_seen = tonumber(redis.call('GET', KEYS[4]))
+if not first_seen or now - first_seen < tonumber(ARGV[6]) then
+    limit = tonumber(ARGV[5])
+end
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+local bonus = tonumber(redis.call('GET', KEYS[3]) or '0')
+local ip_used = tonumber(redis.call('GET', KEYS[6]) or '0')
+local ip_limit = tonumber(ARGV[10])
+
+if user_tokens < 1 or ip_tokens < 1 then
+    local wait = math.ceil((1 - math.min(user_tokens, ip_tokens)) / rate)
+    return {0, 'rate_limited', wait, limit, used, bonus, ip_limit - ip_used}
+end
+if ip_used >= ip_limit then
+    return {0, 'ip_quota_exceeded', 0, limit, used, bonus, 0}
+end
+
+local source
+if used < limit then
+    used = redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[7])
+    source = 'daily'
+elseif bonus > 0 then
+    bonus = redis.call('DECR', KEYS[3])
+    source = 'bonus'
+else
+    return {0, 'quota_exceeded', 0, limit, used, bonus, ip_limit - ip_used}
+end
+if not first_seen then
+    redis.call('SET', KEYS[4], ARGV[1], 'EX', ARGV[8])
+end
+ip_used = redis.call('INCR', KEYS[6])
+redis.call('EXPIRE', KEYS[6], ARGV[7])
+redis.call('HSET', KEYS[1], 'tokens', tostring(user_tokens - 1), 'ts', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[9])
+redis.call('HSET', KEYS[5], 'tokens', tostring(ip_tokens - 1), 'ts', ARGV[1])
+redis.call('EXPIRE', KEYS[5], ARGV[9])
+return {1, source, 0, limit, used, bonus, ip_limit - ip_used}
+"""
+
+# 클러스터: 사용자 키와 IP 키는 슬롯이 달라 한 스크립트에 넣을 수 없음 → 사용자 검사로 1회 차감한 뒤 IP 검사,
+# IP에서 거절되면 사용자 차감을 되돌림 (두 검사 사이는 원자적이지 않음 - 동시 요청이 잠깐 1회씩 더 막힐 수 있음)
+# userId 없는 호출(사용자 키 = IP 키)은 클러스터가 아니어도 사용자 검사만 사용
+
+# KEYS: 1 사용자 버킷, 2 사용자 일일 사용량, 3 보너스 잔액, 4 첫 사용 시각
+# ARGV: 1~9 QUOTA_LUA와 같음
+# 반환: {허용 여부, 사유/차감 출처, 재시도 대기(ms), 일일 한도, 오늘 사용량, 보너스 잔액}
+QUOTA_USER_LUA = """
+local now = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = math.min(burst, (tonumber(bucket[1]) or burst) + math.max(0, now - (tonumber(bucket[2]) or now)) * rate)
+local limit = tonumber(ARGV[4])
+local first_seen = tonumber(redis.call('GET', KEYS[4]))
+if not first_seen or now - first_seen < tonumber(ARGV[6]) then
+    limit = tonumber(ARGV[5])
+end
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+local bonus = tonumber(redis.call('GET', KEYS[3]) or '0')
+
+if tokens < 1 then
+    return {0, 'rate_limited', math.ceil((1 - tokens) / rate), limit, used, bonus}
+end
+
+local source
+if used < limit then
+    used = redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[7])
+    source = 'daily'
+elseif bonus > 0 then
+    bonus = redis.call('DECR', KEYS[3])
+    source = 'bonus'
+else
+    return {0, 'quota_exceeded', 0, limit, used, bonus}
+end
+if not first_seen then
+    redis.call('SET', KEYS[4], ARGV[1], 'EX', ARGV[8])
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[9])
+return {1, source, 0, limit, used, bonus}
+"""
+
+# KEYS: 1 IP 버킷, 2 IP 일일 사용량
+# ARGV: 1 now_ms, 2 burst, 3 ms당 충전량, 4 IP 한도, 5 일일 키 TTL, 6 버킷 키 TTL
+# 반환: {허용 여부, 사유, 재시도 대기(ms), IP 남은 횟수}
+QUOTA_IP_LUA = """
+local now = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = math.min(burst, (tonumber(bucket[1]) or burst) + math.max(0, now - (tonumber(bucket[2]) or now)) * rate)
+local ip_used = tonumber(redis.call('GET', KEYS[2]) or '0')
+local ip_limit = tonumber(ARGV[4])
+
+if tokens < 1 then
+    return {0, 'rate_limited', math.ceil((1 - tokens) / rate), ip_limit - ip_used}
+end
+if ip_used >= ip_limit then
+    return {0, 'ip_quota_exceeded', 0, 0}
+end
+ip_used = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return {1, 'ok', 0, ip_limit - ip_used}
+"""
+
+# IP 검사에서 거절됐을 때 사용자 차감 되돌리기 (충전 상한은 다음 검사의 refill에서 적용)
+# KEYS: 1 사용자 버킷, 2 차감한 키 (일일 사용량 / 보너스 잔액)
+# ARGV: 1 되돌릴 양 (일일 사용량 -1 / 보너스 +1)
+QUOTA_RELEASE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HINCRBYFLOAT', KEYS[1], 'tokens', 1)
+end
+return redis.call('INCRBY', KEYS[2], ARGV[1])
+"""
+
+def _refill_bucket(db, key, now, burst, rate):
+    """토큰 버킷 현재 잔량 (스크립트 fallback 공용)"""
+    bucket = db.hgetall(key)
+    tokens = float(bucket['tokens']) if 'tokens' in bucket else burst
+    ts = float(bucket['ts']) if 'ts' in bucket else now
+    return min(burst, tokens + max(0, now - ts) * rate)
+
+def _quota_check_fallback(db, keys, args):
+    """QUOTA_LUA와 같은 동작 (memory/sqlite 백엔드, 트랜잭션 안에서 호출됨)"""
+    user_bucket, daily_key, bonus_key, first_seen_key, ip_bucket, ip_daily_key = keys
+    now, burst, rate, base_limit, trial_limit, trial_ms, daily_ttl, first_seen_ttl, bucket_ttl, ip_limit = args
+    user_tokens = _refill_bucket(db, user_bucket, now, burst, rate)
+    ip_tokens = _refill_bucket(db, ip_bucket, now, burst, rate)
+    first_seen = db.get(first_seen_key)
+    limit = trial_limit if first_seen is None or now - float(first_seen) < trial_ms else base_limit
+    used = int(db.get(daily_key) or 0)
+    bonus = int(db.get(bonus_key) or 0)
+    ip_used = int(db.get(ip_daily_key) or 0)
+    
+    if user_tokens < 1 or ip_tokens < 1:
+        wait = math.ceil((1 - min(user_tokens, ip_tokens)) / rate)
+        return [0, 'rate_limited', wait, limit, used, bonus, ip_limit - ip_used]
+    if ip_used >= ip_limit:
+        return [0, 'ip_quota_exceeded', 0, limit, used, bonus, 0]
+    
+    if used < limit:
+        used = db.incr(daily_key)
+        db.expire(daily_key, daily_ttl)
+        source = 'daily'
+    elif bonus > 0:
+        bonus = db.decr(bonus_key)
+        source = 'bonus'
+    else:
+        return [0, 'quota_exceeded', 0, limit, used, bonus, ip_limit - ip_used]
+    if first_seen is None:
+        db.set(first_seen_key, str(now), ex=first_seen_ttl)
+    ip_used = db.incr(ip_daily_key)
+    db.expire(ip_daily_key, daily_ttl)
+    db.hset(user_bucket, mapping={'tokens': str(user_tokens - 1), 'ts': str(now)})
+    db.expire(user_bucket, bucket_ttl)
+    db.hset(ip_bucket, mapping={'tokens': str(ip_tokens - 1), 'ts': str(now)})
+    db.expire(ip_bucket, bucket_ttl)
+    return [1, source, 0, limit, used, bonus, ip_limit - ip_used]
+
+def _quota_user_fallback(db, keys, args):
+    """QUOTA_USER_LUA와 같은 동작 (memory/sqlite)"""
+    user_bucket, daily_key, bonus_key, first_seen_key = keys
+    now, burst, rate, base_limit, trial_limit, trial_ms, daily_ttl, first_seen_ttl, bucket_ttl = args
+    tokens = _refill_bucket(db, user_bucket, now, burst, rate)
+    first_seen = db.get(first_seen_key)
+    limit = trial_limit if first_seen is None or now - float(first_seen) < trial_ms else base_limit
+    used = int(db.get(daily_key) or 0)
+    bonus = int(db.get(bonus_key) or 0)
+    
+    if tokens < 1:
+        return [0, 'rate_limited', math.ceil((1 - tokens) / rate), limit, used, bonus]
+    
+    if used < limit:
+        used = db.incr(daily_key)
+        db.expire(daily_key, daily_ttl)
+        source = 'daily'
+    elif bonus > 0:
+        bonus = db.decr(bonus_key)
+        source = 'bonus'
+    else:
+        return [0, 'quota_exceeded', 0, limit, used, bonus]
+    if first_seen is None:
+        db.set(first_seen_key, str(now), ex=first_seen_ttl)
+    db.hset(user_bucket, mapping={'tokens': str(tokens - 1), 'ts': str(now)})
+    db.expire(user_bucket, bucket_ttl)
+    return [1, source, 0, limit, used, bonus]
+
+def _quota_ip_fallback(db, keys, args):
+    """QUOTA_IP_LUA와 같은 동작 (memory/sqlite 백엔드, 트랜잭션 안에서 호출됨)"""
+    ip_bucket, ip_daily_key = keys
+    now, burst, rate, ip_limit, daily_ttl, bucket_ttl = args
+    tokens = _refill_bucket(db, ip_bucket, now, burst, rate)
+    ip_used = int(db.get(ip_daily_key) or 0)
+    
+    if tokens < 1:
+        return [0, 'rate_limited', math.ceil((1 - tokens) / rate), ip_limit - ip_used]
+    if ip_used >= ip_limit:
+        return [0, 'ip_quota_exceeded', 0, 0]
+    ip_used = db.incr(ip_daily_key)
+    db.expire(ip_daily_key, daily_ttl)
+    db.hset(ip_bucket, mapping={'tokens': str(tokens - 1), 'ts': str(now)})
+    db.expire(ip_bucket, bucket_ttl)
+    return [1, 'ok', 0, ip_limit - ip_used]
+
+def _quota_release_fallback(db, keys, args):
+    """QUOTA_RELEASE_LUA와 같은 동작 (memory/sqlite)"""
+    bucket_key, counter_key = keys
+    amount, = args
+    tokens = db.hget(bucket_key, 'tokens')
+    if tokens is not None:
+        db.hset(bucket_key, 'tokens', str(float(tokens) + 1))
+    return db.incrby(counter_key, amount)
+
+QUOTA_ERROR_MESSAGES = {
+    'rate_limited': '요청이 너무 잦아요. 잠시 후 다시 시도해주세요.',
+    'quota_exceeded': '오늘 무료 사용 횟수를 모두 사용했어요. 친구 추천/공유 보너스로 더 이용할 수 있어요!',
+    'ip_quota_exceeded': '이 네트워크의 오늘 사용 한도를 초과했어요. 내일 다시 이용해주세요.',
+}
+
+_quota_scripts = None
+
+def get_client_ip():
+    """요청자 IP (프록시 뒤에서는 ProxyFix가 신뢰하는 홉의 X-Forwarded-For 값으로 바꾼 remote_addr)"""
+    return request.remote_addr or 'unknown'
+
+def seconds_until_kst_midnight():
+    now = get_kst_now()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int((midnight - now).total_seconds())
+
+def quota_scripts():
+    """(사용자 + IP 검사, 사용자 검사, IP 검사, 사용자 차감 되돌리기) 스크립트 (처음 호출 시 생성)"""
+    global _quota_scripts
+    if _quota_scripts is None:
+        from storage import StorageScript
+        _quota_scripts = (
+            StorageScript(QUOTA_LUA, _quota_check_fallback),
+            StorageScript(QUOTA_USER_LUA, _quota_user_fallback),
+            StorageScript(QUOTA_IP_LUA, _quota_ip_fallback),
+            StorageScript(QUOTA_RELEASE_LUA, _quota_release_fallback),
+        )
+    return _quota_scripts
+
+def quota_script_calls(user_id, ip):
+    """
+    한도 검사 스크립트 호출 인자 → ((script, keys, args) 첫 검사, IP 검사 또는 None) - 동기/비동기(asgi.py) 경로 공용
+    
+    - 단일 Redis/memory/sqlite: 사용자 + IP 스크립트 1회 (IP 검사 None)
+    - 클러스터: 사용자 검사 → IP 검사 (IP에서 거절되면 quota_release_call로 되돌림)
+    - userId 없음: 사용자 검사만 (사용자 키가 곧 IP 키)
+    """
+    combined_script, user_script, ip_script, _ = quota_scripts()
+    
+    today = get_kst_now().strftime('%Y-%m-%d')
+    ip_subject = f'ip:{ip}'
+    user_subject = f'u:{user_id}' if user_id else ip_subject  # userId 없이 호출하면 IP를 사용자로 취급
+    user_keys = [account_key(key, user_subject) for key in (
+        f'quota:bucket:{user_subject}',
+        f'quota:daily:{user_subject}:{today}',
+        f'quota:bonus:{user_subject}',
+        f'quota:first_seen:{user_subject}',
+    )]
+    ip_keys = [account_key(key, ip_subject) for key in (f'quota:bucket:{ip_subject}', f'quota:daily:{ip_subject}:{today}')]
+    now_ms = int(time.time() * 1000)
+    refill_per_ms = QUOTA_REFILL_PER_MINUTE / 60000
+    daily_ttl = 2 * 86400
+    bucket_ttl = math.ceil(QUOTA_BURST / refill_per_ms / 1000) + 1
+    user_args = [
+        now_ms, QUOTA_BURST, refill_per_ms,
+        QUOTA_DAILY_LIMIT, QUOTA_TRIAL_DAILY_LIMIT, QUOTA_TRIAL_DAYS * 86400 * 1000,
+        daily_ttl, QUOTA_FIRST_SEEN_TTL, bucket_ttl,
+    ]
+    if not user_id:
+        return (user_script, user_keys, user_args), None
+    if not getattr(store, 'cluster', False):
+        return (combined_script, user_keys + ip_keys, user_args + [QUOTA_IP_DAILY_LIMIT]), None
+    ip_args = [now_ms, QUOTA_BURST, refill_per_ms, QUOTA_IP_DAILY_LIMIT, daily_ttl, bucket_ttl]
+    return (user_script, user_keys, user_args), (ip_script, ip_keys, ip_args)
+
+def quota_release_call(user_raw, keys):
+    """IP 검사에서 거절됐을 때 사용자 차감을 되돌리는 (script, keys, args)"""
+    user_bucket, daily_key, bonus_key = keys[:3]
+    if user_raw[1] == 'bonus':
+        return quota_scripts()[3], [user_bucket, bonus_key], [1]
+    return quota_scripts()[3], [user_bucket, daily_key], [-1]
+
+def quota_result(user_raw, ip_raw, keys):
+    """
+    스크립트 반환값 → check_usage_quota() 결과 dict
+    
+    user_raw: 사용자 검사 또는 사용자 + IP 검사(QUOTA_LUA, 마지막 값이 IP 남은 횟수) 반환값
+    ip_raw: 클러스터의 IP 검사 반환값 (하지 않았으면 None) - 거절되면 사용자 차감은 되돌린 값으로 보고
+    IP 남은 횟수를 모르면 (사용자 검사에서 거절 / userId 없음) ip_remaining은 None
+    """
+    allowed, reason, retry_ms, limit, used, bonus, *combined_ip = user_raw
+    used, bonus = int(used), int(bonus)
+    ip_remaining = int(combined_ip[0]) if combined_ip else None
+    if ip_raw is not None:
+        ip_allowed, ip_reason, ip_retry_ms, ip_remaining = ip_raw
+        ip_remaining = int(ip_remaining)
+        if not ip_allowed:
+            if reason == 'bonus':
+                bonus += 1
+            else:
+                used -= 1
+            allowed, reason, retry_ms = 0, ip_reason, ip_retry_ms
+    return {
+        'allowed': bool(allowed),
+        'reason': reason,
+        'retry_after': max(1, math.ceil(int(retry_ms) / 1000)) if reason == 'rate_limited' else seconds_until_kst_midnight(),
+        'limit': int(limit),
+        'used': used,
+        'bonus': bonus,
+        'ip_remaining': ip_remaining,
+        'keys': keys,
+    }
+
+def check_usage_quota(user_id, ip):
+    """
+    분석 1회 사용 가능 여부 확인 + 차감 (스크립트 1회로 원자적, 클러스터에서는 사용자 검사 → IP 검사)
+    
+    Returns:
+        dict or None: {allowed, reason, retry_after, limit, used, bonus, ip_remaining, ...}
+                      None이면 한도 검사 없이 통과 (비활성/저장소 없음/오류)
+    """
+    if not QUOTA_ENABLED or not store:
+        return None
+    (script, first_keys, args), ip_call = quota_script_calls(user_id, ip)
+    keys = first_keys + (ip_call[1] if ip_call else [])
+    try:
+        user_raw = script(store, first_keys, args)
+        if not int(user_raw[0]) or not ip_call:
+            return quota_result(user_raw, None, keys)
+        ip_script, ip_keys, ip_args = ip_call
+        ip_raw = ip_script(store, ip_keys, ip_args)
+        if not int(ip_raw[0]):
+            script, release_keys, release_args = quota_release_call(user_raw, keys)
+            script(store, release_keys, release_args)
+        return quota_result(user_raw, ip_raw, keys)
+    except Exception as e:
+        log(f"⚠️ 사용량 한도 확인 실패 (통과 처리): {e}", "WARNING")
+        return None
+
+def refund_usage_quota(quota):
+    """서버 오류로 분석이 실패했을 때 차감한 1회를 되돌림 (버킷 토큰은 그대로)"""
+    if not quota or not quota['allowed'] or not store:
+        return
+    _, daily_key, bonus_key, _, *ip_keys = quota['keys']  # IP 키는 IP 검사를 했을 때만
+    try:
+        pipe = store.pipeline(transaction=False)
+        if quota['reason'] == 'bonus':
+            pipe.incr(bonus_key)
+        else:
+            pipe.decr(daily_key)
+        if ip_keys:
+            pipe.decr(ip_keys[1])
+        pipe.execute()
+    except Exception as e:
+        log(f"⚠️ 사용량 환불 실패: {e}", "WARNING")
+
+@app.after_request
+def add_quota_headers(response):
+    """남은 사용량을 응답 헤더로 전달 (X-RateLimit-*)"""
+    quota = g.get('quota')
+    if quota:
+        remaining = max(0, quota['limit'] - quota['used']) + max(0, quota['bonus'])
+        response.headers['X-RateLimit-Limit'] = str(quota['limit'])
+        response.headers['X-RateLimit-Remaining'] = str(remaining)
+        response.headers['X-RateLimit-Reset'] = str(seconds_until_kst_midnight())
+        response.headers['X-Quota-Bonus-Remaining'] = str(max(0, quota['bonus']))
+        if not quota['allowed']:
+            response.headers['Retry-After'] = str(quota['retry_after'])
+    return response
+
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0',
+    'Referer': 'https://www.naver.com/'
+}
+SCRAPE_TIMEOUT = 10  # 초
+
+def scrape_fetch_url(url):
+    """블로그 URL → 실제로 요청할 주소 (네이버 블로그는 모바일/데스크톱 모두 PostView 주소로 변환)"""
+    resolved = resolve_url(url)
+    if resolved.fetch_url != url:
+        log("🔗 본문 주소로 변환", "DEBUG", platform=resolved.platform, fetch_url=resolved.fetch_url)
+    return resolved.fetch_url
+
+def parse_blog_html(html, url):
+    """블로그 HTML → {title, content, url}"""
+    # 스크래핑 요청에서만 필요한 무거운 모듈 (콜드 스타트에서 제외)
+    from bs4 import BeautifulSoup
+    
+    parse_started = time.perf_counter()
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    title_selectors, content_selectors = platform_selectors(resolve_url(url).platform)
+    
+    # 제목 추출
+    title = ''
+    for selector in title_selectors:
+        title_tag = soup.select_one(selector)
+        if title_tag:
+            title = title_tag.get('content', '') or title_tag.get_text(strip=True)
+            if title:
+                break
+    
+    # 본문 내용 추출 (플랫폼별 우선순위)
+    content = ''
+    for selector in content_selectors:
+        content_tag = soup.select_one(selector)
+        if content_tag:
+            content = content_tag.get('content', '') or content_tag.get_text(strip=True)
+            if content:
+                break
+    
+    # 내용이 너무 길면 일부만 사용 (1000자)
+    if len(content) > 1000:
+        content = content[:1000] + '...'
+    
+    record_timing('scrape_parse', (time.perf_counter() - parse_started) * 1000)
+    
+    return {
+        'title': title or '제목 없음',
+        'content': content or '내용을 가져올 수 없습니다.',
+        'url': url
+    }
+
+SCRAPE_ERROR_TITLE = '오류'
+
+def scrape_error_result(url, error):
+    """스크래핑 실패 시 결과 (분석은 템플릿 댓글로 계속 진행)"""
+    return {
+        'title': SCRAPE_ERROR_TITLE,
+        'content': f'블로그 내용을 가져오는 중 오류가 발생했습니다: {str(error)}',
+        'url': url
+    }
+
 def scrape_blog_content(url):
     """네이버 블로그 내용 스크래핑"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0',
-            'Referer': 'https://www.naver.com/'
-        }
-        # 네이버 블로그 URL 파싱 (모바일/데스크톱 모두 지원)
-        blog_id = None
-        log_no = None
-        
-        if 'blog.naver.com' in url or 'm.blog.naver.com' in url:
-            # URL 파싱
-            parsed_url = urlparse(url)
-            query_params = parse_qs(parsed_url.query)
-            
-            # 1. 쿼리 파라미터에서 추출 (모바일 URL)
-            if 'blogId' in query_params and 'logNo' in query_params:
-                blog_id = query_params['blogId'][0]
-                log_no = query_params['logNo'][0]
-                print(f"📱 모바일 URL 감지: blogId={blog_id}, logNo={log_no}")
-            
-            # 2. 경로에서 추출 (데스크톱 URL)
-            elif '/' in parsed_url.path:
-                path_parts = parsed_url.path.strip('/').split('/')
-                if len(path_parts) >= 2:
-                    blog_id = path_parts[0]
-                    log_no = path_parts[-1]
-                    print(f"🖥️ 데스크톱 URL 감지: blogId={blog_id}, logNo={log_no}")
-            
-            # blogId와 logNo가 있으면 정규 URL로 접근
-            if blog_id and log_no:
-                content_url = f'https://blog.naver.com/PostView.naver?blogId={blog_id}&logNo={log_no}'
-                print(f"🔗 변환된 URL: {content_url}")
-                response = requests.get(content_url, headers=headers, timeout=10, allow_redirects=True)
-            else:
-                response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-        else:
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
+        fetch_url = scrape_fetch_url(url)
+        with timed('scrape_fetch'):
+            response = get_http_session().get(fetch_url, headers=SCRAPE_HEADERS, timeout=SCRAPE_TIMEOUT,
+                                              allow_redirects=True)
         
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 제목 추출
-        title = ''
-        title_selectors = [
-            'meta[property="og:title"]',
-            'title',
-            '.se-title-text',
-            '.pcol1'
-        ]
-        for selector in title_selectors:
-            title_tag = soup.select_one(selector)
-            if title_tag:
-                title = title_tag.get('content', '') or title_tag.get_text(strip=True)
-                if title:
-                    break
-        
-        # 본문 내용 추출
-        content = ''
-        content_selectors = [
-            'meta[property="og:description"]',
-            '.se-main-container',
-            '#postViewArea',
-            '.post-view',
-            'article'
-        ]
-        for selector in content_selectors:
-            content_tag = soup.select_one(selector)
-            if content_tag:
-                content = content_tag.get('content', '') or content_tag.get_text(strip=True)
-                if content:
-                    break
-        
-        # 내용이 너무 길면 일부만 사용 (1000자)
-        if len(content) > 1000:
-            content = content[:1000] + '...'
-        
-        return {
-            'title': title or '제목 없음',
-            'content': content or '내용을 가져올 수 없습니다.',
-            'url': url
-        }
+        return parse_blog_html(response.text, url)
     
     except Exception as e:
-        return {
-            'title': '오류',
-            'content': f'블로그 내용을 가져오는 중 오류가 발생했습니다: {str(e)}',
-            'url': url
-        }
+        return scrape_error_result(url, e)
 
-def generate_comments_with_ai(title, content, is_admin=False):
-    """OpenAI를 사용하여 블로그 내용 기반 댓글 생성 (프로덕션 레벨)"""
-    log("=" * 60)
-    log("🤖 AI 댓글 생성 함수 시작", "AI")
-    log("=" * 60)
-    
-    try:
-        if not client:
-            log("❌ OpenAI 클라이언트가 초기화되지 않음 → 템플릿 사용", "WARNING")
-            return None
-        
-        log("✅ OpenAI 클라이언트 확인 완료", "AI")
-        
-        # 🔑 블로그 내용 요약 및 정제 (마스터 계정은 1000자)
-        max_length = 1000 if is_admin else 500
-        content_preview = content[:max_length] if len(content) > max_length else content
-        content_preview = content_preview.strip()
-        
-        if not content_preview:
-            log("❌ 블로그 내용이 비어있음 → 템플릿 사용", "WARNING")
-            return None
-        
-        log(f"📝 블로그 제목: {title[:50]}...", "AI")
-        log(f"📝 내용 길이: {len(content)}자 (미리보기: {len(content_preview)}자)", "AI")
-        log(f"🔑 마스터 계정: {is_admin} (분석 길이: {max_length}자)", "AI")
-        
-        prompt = f"""다음은 네이버 블로그 글입니다. 이 글을 실제로 읽은 사람처럼 자연스러운 댓글을 **정확히 8개** 한국어로 작성해주세요.
+# 모델/프롬프트가 바뀌면 캐시 네임스페이스도 바뀜 (cache_fingerprint)
+AI_MODEL = "gpt-3.5-turbo-1106"
+AI_SYSTEM_PROMPT = "당신은 블로그 댓글을 작성하는 친근한 한국인입니다. 반드시 JSON 형식으로만 응답하고, 정확히 8개의 댓글을 생성해야 합니다."
+AI_PROMPT_TEMPLATE = """다음은 네이버 블로그 글입니다. 이 글을 실제로 읽은 사람처럼 자연스러운 댓글을 **정확히 8개** 한국어로 작성해주세요.
 
 블로그 제목: {title}
 블로그 내용: {content_preview}
@@ -516,79 +2447,114 @@ def generate_comments_with_ai(title, content, is_admin=False):
 
 주의: 댓글이 8개가 안 되면 안 됩니다! 반드시 8개를 채워주세요!"""
 
-        # OpenAI API 호출 (JSON 모드 강제, 토큰 증가)
-        log("🚀 OpenAI API 호출 시작...", "AI")
-        log(f"   모델: gpt-3.5-turbo-1106, max_tokens: 1000", "AI")
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-1106",
-            messages=[
-                {"role": "system", "content": "당신은 블로그 댓글을 작성하는 친근한 한국인입니다. 반드시 JSON 형식으로만 응답하고, 정확히 8개의 댓글을 생성해야 합니다."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.8,
-            max_tokens=1000
-        )
-        
-        log("✅ OpenAI API 응답 수신 완료", "AI")
-        
-        # 응답 검증
-        if not response.choices or not response.choices[0].message.content:
-            log("❌ AI 응답이 비어있음 → 템플릿 사용", "ERROR")
-            return None
-        
-        # JSON 파싱 (안전하게)
-        import json
-        response_text = response.choices[0].message.content.strip()
-        log(f"📥 AI 응답 받음 (길이: {len(response_text)}자)", "AI")
-        log(f"   내용 미리보기: {response_text[:150]}...", "AI")
-        
-        try:
-            result = json.loads(response_text)
-            log("✅ JSON 파싱 성공", "AI")
-        except json.JSONDecodeError as je:
-            log(f"❌ JSON 파싱 실패: {je} → 템플릿 사용", "ERROR")
-            log(f"   응답 내용: {response_text[:200]}", "ERROR")
-            return None
-        
-        # 댓글 배열 검증
-        comments = result.get('comments', [])
-        log(f"📊 댓글 배열 추출: {len(comments)}개 받음", "AI")
-        
-        if not isinstance(comments, list) or len(comments) == 0:
-            log(f"❌ 댓글 형식 오류: 타입={type(comments)}, 길이={len(comments) if isinstance(comments, list) else 0} → 템플릿 사용", "ERROR")
+def ai_completion_request(title, content, is_admin=False):
+    """
+    댓글 생성 요청 인자 (chat.completions.create(**kwargs)) - 동기 OpenAI / AsyncOpenAI 공용
+    
+    Returns:
+        dict or None: 블로그 내용이 비어 있으면 None (템플릿 사용)
+    """
+    # 🔑 블로그 내용 요약 및 정제 (마스터 계정은 1000자)
+    max_length = 1000 if is_admin else 500
+    content_preview = content[:max_length] if len(content) > max_length else content
+    content_preview = content_preview.strip()
+    
+    if not content_preview:
+        log("❌ 블로그 내용이 비어있음 → 템플릿 사용", "WARNING")
+        return None
+    
+    log("📝 AI 입력 준비", "AI", title=title[:50], content_length=len(content),
+        preview_length=len(content_preview), is_admin=is_admin)
+    
+    prompt = AI_PROMPT_TEMPLATE.format(title=title, content_preview=content_preview)
+
+    log("🚀 OpenAI API 호출 시작", "AI", model=AI_MODEL, max_tokens=1000)
+    return {
+        'model': AI_MODEL,
+        'messages': [
+            {"role": "system", "content": AI_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        'response_format': {"type": "json_object"},
+        'temperature': 0.8,
+        'max_tokens': 1000,
+    }
+
+def parse_ai_comments(response):
+    """OpenAI 응답 → 유효한 댓글 최대 8개 (부족하거나 형식이 틀리면 None)"""
+    log("✅ OpenAI API 응답 수신 완료", "AI")
+    
+    # 응답 검증
+    if not response.choices or not response.choices[0].message.content:
+        log("❌ AI 응답이 비어있음 → 템플릿 사용", "ERROR")
+        return None
+    
+    # JSON 파싱 (안전하게)
+    response_text = response.choices[0].message.content.strip()
+    log("📥 AI 응답 받음", "AI", response_length=len(response_text))
+    log("   내용 미리보기", "DEBUG", preview=response_text[:150])
+    
+    try:
+        result = json.loads(response_text)
+        log("✅ JSON 파싱 성공", "AI")
+    except json.JSONDecodeError as je:
+        log(f"❌ JSON 파싱 실패: {je} → 템플릿 사용", "ERROR", response=response_text[:200])
+        return None
+    
+    # 댓글 배열 검증
+    comments = result.get('comments', [])
+    log(f"📊 댓글 배열 추출: {len(comments)}개 받음", "AI")
+    
+    if not isinstance(comments, list) or len(comments) == 0:
+        log(f"❌ 댓글 형식 오류: 타입={type(comments)}, 길이={len(comments) if isinstance(comments, list) else 0} → 템플릿 사용", "ERROR")
+        return None
+    
+    # 유효한 댓글만 필터링
+    valid_comments = [c for c in comments if isinstance(c, str) and len(c.strip()) > 0]
+    log(f"✅ 유효한 댓글 필터링: {len(valid_comments)}개", "AI")
+    
+    if len(valid_comments) < 3:
+        log(f"⚠️ 유효한 댓글이 너무 적음: {len(valid_comments)}개 → 템플릿 사용", "WARNING")
+        return None
+    
+    # 댓글 내용 미리보기
+    for i, comment in enumerate(valid_comments[:3], 1):
+        log(f"   💬 댓글 {i}: {comment[:30]}...", "DEBUG")
+    
+    log(f"🎉 AI 댓글 생성 최종 성공! 총 {len(valid_comments)}개 반환", "SUCCESS")
+    
+    return valid_comments[:8]
+
+def generate_comments_with_ai(title, content, is_admin=False):
+    """OpenAI를 사용하여 블로그 내용 기반 댓글 생성 (프로덕션 레벨)"""
+    log("🤖 AI 댓글 생성 시작", "AI")
+    
+    try:
+        if not client:
+            log("❌ OpenAI 클라이언트가 초기화되지 않음 → 템플릿 사용", "WARNING")
             return None
         
-        # 유효한 댓글만 필터링
-        valid_comments = [c for c in comments if isinstance(c, str) and len(c.strip()) > 0]
-        log(f"✅ 유효한 댓글 필터링: {len(valid_comments)}개", "AI")
+        log("✅ OpenAI 클라이언트 확인 완료", "AI")
         
-        if len(valid_comments) < 3:
-            log(f"⚠️ 유효한 댓글이 너무 적음: {len(valid_comments)}개 → 템플릿 사용", "WARNING")
+        request_kwargs = ai_completion_request(title, content, is_admin)
+        if request_kwargs is None:
             return None
         
-        # 댓글 내용 미리보기
-        for i, comment in enumerate(valid_comments[:3], 1):
-            log(f"   💬 댓글 {i}: {comment[:30]}...", "AI")
-        
-        log("=" * 60, "AI")
-        log(f"🎉 AI 댓글 생성 최종 성공! 총 {len(valid_comments)}개 반환", "SUCCESS")
-        log("=" * 60, "AI")
+        # OpenAI API 호출 (JSON 모드 강제, 토큰 증가)
+        with timed('ai_call'):
+            response = client.chat.completions.create(**request_kwargs)
         
-        return valid_comments[:8]
+        return parse_ai_comments(response)
     
     except Exception as e:
-        log("=" * 60, "ERROR")
-        log(f"❌ AI 댓글 생성 중 예외 발생", "ERROR")
-        log(f"   예외 타입: {type(e).__name__}", "ERROR")
-        log(f"   예외 메시지: {str(e)}", "ERROR")
-        log("   → 템플릿 댓글로 대체합니다", "ERROR")
-        log("=" * 60, "ERROR")
-        import traceback
-        traceback.print_exc()
+        log(f"❌ AI 댓글 생성 중 예외 발생 → 템플릿 댓글로 대체: {e}", "ERROR",
+            exc_info=True, error_type=type(e).__name__)
         return None
 
+# 템플릿 댓글 문구(아래 목록, complete_comments의 보충 문구)를 바꾸면 1 올릴 것 → 캐시 네임스페이스 변경
+TEMPLATE_CORPUS_VERSION = 1
+
+@timed('template')
 def generate_template_comments(title, content, count=8):
     """기본 템플릿을 사용하여 댓글 생성 (내부 함수)"""
     comments = []
@@ -835,29 +2801,25 @@ def generate_comments(blog_data, is_admin=False):
     title = blog_data['title']
     content = blog_data['content']
     
-    log("━" * 60)
-    log(f"📋 댓글 생성 프로세스 시작", "COMMENT")
-    log(f"   블로그 제목: {title[:50]}...", "COMMENT")
-    log(f"   🔑 마스터 계정: {is_admin}", "COMMENT")
-    log("━" * 60)
+    log("📋 댓글 생성 프로세스 시작", "COMMENT", title=title[:50], is_admin=is_admin)
     
     # AI 댓글 생성 시도 (마스터 계정 여부 전달)
     ai_comments = generate_comments_with_ai(title, content, is_admin)
-    
+    return complete_comments(ai_comments, title, content, ai_enabled=bool(client))
+
+def complete_comments(ai_comments, title, content, ai_enabled):
+    """AI 댓글 → 최종 댓글 8개 (부족하면 템플릿 보충) - 동기/비동기(asgi.py) 경로 공용"""
     # AI 댓글이 8개 이상이면 그대로 반환
     if ai_comments and len(ai_comments) >= 8:
-        log("━" * 60, "SUCCESS")
-        log(f"🎉 100% AI 댓글 생성 완료! ({len(ai_comments)}개)", "SUCCESS")
-        log("   템플릿 사용: 0개", "SUCCESS")
-        log("━" * 60, "SUCCESS")
+        log(f"🎉 100% AI 댓글 생성 완료! ({len(ai_comments)}개)", "SUCCESS", ai=len(ai_comments), template=0)
+        metric_inc('comments', 'ai')
         return ai_comments[:8]
     
     # AI 댓글이 1개 이상 8개 미만이면 템플릿으로 보충
     if ai_comments and len(ai_comments) > 0:
         needed_count = 8 - len(ai_comments)
-        log("━" * 60, "HYBRID")
         log(f"🔀 하이브리드 모드: AI {len(ai_comments)}개 + 템플릿 {needed_count}개", "HYBRID")
-        log("━" * 60, "HYBRID")
+        metric_inc('comments', 'hybrid')
         
         # 템플릿 댓글 생성
         template_comments = generate_template_comments(title, content, count=needed_count)
@@ -881,24 +2843,133 @@ def generate_comments(blog_data, is_admin=False):
                 if comment not in final_comments and len(final_comments) < 8:
                     final_comments.append(comment)
         
-        log(f"✅ 하이브리드 댓글 생성 완료: 총 {len(final_comments)}개", "HYBRID")
-        log(f"   구성: AI {len(ai_comments)}개 + 템플릿 {len(final_comments)-len(ai_comments)}개", "HYBRID")
-        log("━" * 60, "HYBRID")
+        log(f"✅ 하이브리드 댓글 생성 완료: 총 {len(final_comments)}개", "HYBRID",
+            ai=len(ai_comments), template=len(final_comments) - len(ai_comments))
         return final_comments[:8]
     
     # AI 댓글이 없으면 템플릿만 사용
-    log("━" * 60, "TEMPLATE")
+    metric_inc('comments', 'template')
+    if ai_enabled:
+        publish_live_event('ai_failed')
     log("⚠️ AI 생성 실패 → 100% 템플릿 댓글 사용", "TEMPLATE")
-    log("━" * 60, "TEMPLATE")
     template_comments = generate_template_comments(title, content, count=8)
     return template_comments[:8]
 
+# ============================
+# 📦 페이지 응답 캐시 (배포당 1회 렌더 + gzip/brotli 미리 압축)
+# ============================
+# 메인/약관/테스트 페이지, robots.txt, sitemap.xml은 배포 중 내용이 바뀌지 않음
+# → 첫 요청에서 렌더한 본문과 압축본을 메모리에 두고 재사용
+# - ETag: 본문 해시 (압축본은 -gzip / -br 접미사) → If-None-Match 일치 시 304
+# - url_for(_external=True)가 요청 호스트를 따르므로 호스트별로 보관
+#   PAGE_CACHE_HOSTS에 있는 호스트만 (비우면 처음 온 PAGE_CACHE_MAX_ENTRIES개)
+#   → 그 밖의 Host 헤더는 보관하지 않고 빠른 압축으로 매번 렌더 (임의 Host로 최대 압축을 반복시키지 못하게)
+# - 디버그 모드(로컬 개발)에서는 템플릿 수정이 바로 보이도록 캐시하지 않음
+
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+PAGE_MAX_AGE = int(os.environ.get('PAGE_MAX_AGE', '300'))  # 브라우저/CDN 재검증 주기 (초)
+PAGE_CACHE_MAX_ENTRIES = 64  # 임의 Host 헤더로 메모리가 늘지 않도록
+PAGE_CACHE_HOSTS = frozenset(host.strip().lower() for host in os.environ.get('PAGE_CACHE_HOSTS', '').split(',')
+                             if host.strip())  # 예: repost.example.com,www.repost.example.com
+PAGE_COMPRESS_MIN_BYTES = 512
+
+_page_cache = {}  # (엔드포인트, 호스트) → build_cached_page() 결과
+
+@lru_cache(maxsize=2)
+def _compressors(fast=False):
+    """
+    사용 가능한 압축 방식 (brotli 패키지가 없으면 gzip만)
+    
+    fast=True: 요청마다 압축하는 API 응답용 (최대 압축률 대신 속도)
+    """
+    import gzip
+    gzip_level, brotli_quality = (6, 5) if fast else (9, 11)
+    compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=gzip_level, mtime=0)}
+    try:
+        import brotli
+        compressors['br'] = lambda data: brotli.compress(data, quality=brotli_quality)
+    except ImportError:
+        pass
+    return compressors
+
+def build_cached_page(body, content_type, fast=False):
+    """본문 1개 → 원본/압축본 + ETag (압축해도 작아지지 않으면 원본만, fast=True: 보관하지 않을 본문)"""
+    data = body.encode('utf-8') if isinstance(body, str) else body
+    variants = {'identity': data}
+    if len(data) >= PAGE_COMPRESS_MIN_BYTES:
+        for encoding, compress in _compressors(fast).items():
+            compressed = compress(data)
+            if len(compressed) < len(data):
+                variants[encoding] = compressed
+    return {
+        'variants': variants,
+        'etag': hashlib.md5(data).hexdigest(),
+        'content_type': content_type,
+    }
+
+def _variant_etag(page, encoding):
+    return page['etag'] if encoding == 'identity' else f"{page['etag']}-{encoding}"
+
+def _pick_encoding(variants):
+    """Accept-Encoding 중 가장 작은 압축본 (br → gzip → 원본)"""
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and accepted[encoding] > 0:
+            return encoding
+    return 'identity'
+
+def serve_cached_page(page, max_age):
+    encoding = _pick_encoding(page['variants'])
+    if any(request.if_none_match.contains(_variant_etag(page, e)) for e in page['variants']):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(page['variants'][encoding], content_type=page['content_type'])
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(_variant_etag(page, encoding))
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.must_revalidate = True
+    return response
+
+def cached_page(content_type='text/html; charset=utf-8', max_age=None):
+    """
+    페이지 뷰 데코레이터: 뷰는 본문 문자열만 반환, 캐시/압축/조건부 응답은 여기서 처리
+    
+    @cached_page()
+    def index():
+        return render_template('index.html')
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not PAGE_CACHE_ENABLED or app.debug:
+                return app.response_class(view(*args, **kwargs), content_type=content_type)
+            key = (request.endpoint, request.host_url)
+            page = _page_cache.get(key)
+            if page is None:
+                if PAGE_CACHE_HOSTS:
+                    cacheable = request.host.lower() in PAGE_CACHE_HOSTS
+                else:
+                    cacheable = len(_page_cache) < PAGE_CACHE_MAX_ENTRIES
+                page = build_cached_page(view(*args, **kwargs), content_type, fast=not cacheable)
+                if cacheable:
+                    _page_cache[key] = page
+                    log(f"📦 페이지 캐시 생성: {request.path}", "DEBUG",
+                        bytes={e: len(v) for e, v in page['variants'].items()})
+            return serve_cached_page(page, PAGE_MAX_AGE if max_age is None else max_age)
+        return wrapper
+    return decorator
+
 @app.route('/')
+@cached_page()
 def index():
     """메인 페이지"""
     return render_template('index.html')
 
 @app.route('/test')
+@cached_page()
 def test_usage():
     """사용 횟수 테스트 페이지"""
     with open('test_usage.html', 'r', encoding='utf-8') as f:
@@ -909,10 +2980,7 @@ def favicon():
     """파비콘 제공"""
     return app.send_static_file('images/favicon.svg')
 
-@app.route('/robots.txt')
-def robots():
-    """robots.txt 제공 (네이버 검색 최적화)"""
-    robots_txt = """User-agent: *
+ROBOTS_TXT = """User-agent: *
 Allow: /
 
 User-agent: Yeti
@@ -921,12 +2989,8 @@ Allow: /
 Sitemap: https://repost.kr/sitemap.xml
 Sitemap: https://www.repost.kr/sitemap.xml
 """
-    return robots_txt, 200, {'Content-Type': 'text/plain; charset=utf-8'}
 
-@app.route('/sitemap.xml')
-def sitemap():
-    """sitemap.xml 제공"""
-    sitemap_xml = """<?xml version="1.0" encoding="UTF-8"?>
+SITEMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
         xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
@@ -957,62 +3021,203 @@ def sitemap():
     </url>
     
 </urlset>"""
-    return sitemap_xml, 200, {'Content-Type': 'application/xml; charset=utf-8'}
+
+@app.route('/robots.txt')
+@cached_page('text/plain; charset=utf-8', max_age=86400)
+def robots():
+    """robots.txt 제공 (네이버 검색 최적화)"""
+    return ROBOTS_TXT
+
+@app.route('/sitemap.xml')
+@cached_page('application/xml; charset=utf-8', max_age=86400)
+def sitemap():
+    """sitemap.xml 제공"""
+    return SITEMAP_XML
 
 @app.route('/terms')
+@cached_page()
 def terms():
     """이용약관 페이지"""
     return render_template('terms.html')
 
 @app.route('/privacy')
+@cached_page()
 def privacy():
     """개인정보처리방침 페이지"""
     return render_template('privacy.html')
 
+# ============================
+# 📦 /api/analyze 응답 형식 (필드 선택 + 압축)
+# ============================
+# - 기본(v1): 기존 응답 그대로 {success, blog{title, content, url}, comments, from_cache, cached_at}
+# - v2 (요청 body의 "v": 2 또는 "fields"): 평평한 구조 + 필요한 필드만 + 공백 없는 UTF-8 JSON
+#   예) {"url": ..., "fields": "title,preview,comments"} → {"v":2,"title":...,"preview":...,"comments":[...]}
+# - 응답 본문이 ANALYZE_COMPRESS_MIN_BYTES 이상이면 Accept-Encoding에 맞춰 gzip/brotli 압축
+
+ANALYZE_SCHEMA_VERSION = 2
+ANALYZE_COMPRESS_MIN_BYTES = int(os.environ.get('ANALYZE_COMPRESS_MIN_BYTES', '1024'))
+ANALYZE_PREVIEW_CHARS = 200  # 화면에 보여주는 본문 미리보기 길이
+
+ANALYZE_FIELDS = {
+    'title': lambda blog, result: blog.get('title', ''),
+    'preview': lambda blog, result: blog.get('content', '')[:ANALYZE_PREVIEW_CHARS],
+    'content': lambda blog, result: blog.get('content', ''),
+    'url': lambda blog, result: blog.get('url', ''),
+    'comments': lambda blog, result: result['comments'],
+    'from_cache': lambda blog, result: result['from_cache'],
+    'cached_at': lambda blog, result: result.get('cached_at'),
+}
+ANALYZE_DEFAULT_FIELDS = ('title', 'preview', 'comments', 'from_cache')
+
+def parse_analyze_fields(data):
+    """
+    요청의 응답 형식 → 필드 튜플 (v1이면 None)
+    
+    Raises:
+        ValueError: 알 수 없는 필드 (메시지 = 쉼표로 이은 필드 이름)
+    """
+    fields = data.get('fields') or request.args.get('fields')
+    if not fields:
+        return ANALYZE_DEFAULT_FIELDS if str(data.get('v', '')) == str(ANALYZE_SCHEMA_VERSION) else None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = tuple(dict.fromkeys(f.strip() for f in fields if f and f.strip()))
+    unknown = [f for f in fields if f not in ANALYZE_FIELDS]
+    if unknown or not fields:
+        raise ValueError(','.join(unknown))
+    return fields
+
+def compress_response(response, min_bytes=ANALYZE_COMPRESS_MIN_BYTES):
+    """큰 JSON 응답을 Accept-Encoding에 맞춰 압축 (작은 응답은 그대로)"""
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    compressors = _compressors(fast=True)
+    encoding = _pick_encoding(compressors)
+    if encoding != 'identity':
+        response.set_data(compressors[encoding](data))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@timed('respond')
+def analyze_response(result, fields):
+    """분석 결과 {blog, comments, from_cache, cached_at} → 요청한 형식의 (압축된) 응답"""
+    if fields is None:
+        payload = {'success': True, **result}
+        if 'cached_at' not in result:
+            payload.pop('cached_at', None)
+        response = jsonify(payload)
+    else:
+        blog = result['blog']
+        payload = {'v': ANALYZE_SCHEMA_VERSION}
+        payload.update((field, ANALYZE_FIELDS[field](blog, result)) for field in fields)
+        response = app.response_class(json.dumps(payload, ensure_ascii=False, separators=(',', ':')),
+                                      mimetype='application/json')
+    return compress_response(response)
+
+def prepare_analyze(data):
+    """
+    분석 요청 검증 (한도 차감 전) - 동기 뷰 / 비동기 뷰(asgi.py) 공용
+    
+    Returns:
+        tuple: (params, None) 또는 (None, 400 응답)
+               params = {url, force_refresh, is_admin, user_id, fields}
+    """
+    blog_url = data.get('url', '').strip()
+    if not blog_url:
+        return None, (jsonify({'error': 'URL을 입력해주세요.'}), 400)
+    
+    # 📦 응답 형식
+    try:
+        fields = parse_analyze_fields(data)
+    except ValueError as e:
+        return None, (jsonify({
+            'error': f'알 수 없는 필드: {e}',
+            'code': 'unknown_fields',
+            'fields': list(ANALYZE_FIELDS),
+        }), 400)
+    
+    return {
+        'url': blog_url,
+        'force_refresh': data.get('force_refresh', False),  # 강제 재생성 옵션
+        'is_admin': data.get('isAdmin', False),  # 🔑 마스터 계정 여부
+        'user_id': data.get('userId'),
+        'fields': fields,
+    }, None
+
+def quota_denied_response(quota, user_id):
+    """한도 초과면 429 응답, 통과면 None"""
+    if not quota or quota['allowed']:
+        return None
+    log(f"🚦 사용량 한도 초과: {quota['reason']}", "WARNING",
+        user_id=user_id, used=quota['used'], limit=quota['limit'])
+    return jsonify({
+        'error': QUOTA_ERROR_MESSAGES[quota['reason']],
+        'code': quota['reason'],
+        'retry_after': quota['retry_after'],
+        'limit': quota['limit'],
+        'bonus': quota['bonus'],
+    }), 429
+
+def log_analyze_success(blog_url, blog, comments, from_cache):
+    """📊 Analytics 로깅 (분석 성공)"""
+    log_analytics(
+        action='blog_analyzed',
+        data={
+            'blog_url': blog_url,
+            'title': blog.get('title', '')[:100],
+            'comments_count': len(comments),
+            'from_cache': from_cache
+        },
+        success=True
+    )
+
+def analyze_failed_response(blog_url, error):
+    """📊 Analytics 로깅 (실패) + 차감한 사용량 환불 → 500 응답"""
+    log_analytics(
+        action='blog_analyzed',
+        data={'blog_url': blog_url or 'unknown'},
+        success=False,
+        error_message=str(error)
+    )
+    refund_usage_quota(g.get('quota'))
+    return jsonify({'error': f'오류가 발생했습니다: {str(error)}'}), 500
+
 @app.route('/api/analyze', methods=['POST'])
+@timed('analyze')
 def analyze_blog():
     """블로그 분석 및 댓글 추천 API (💾 캐싱 적용)"""
+    blog_url = None
     try:
-        data = request.json
-        blog_url = data.get('url', '').strip()
-        force_refresh = data.get('force_refresh', False)  # 강제 재생성 옵션
-        is_admin = data.get('isAdmin', False)  # 🔑 마스터 계정 여부
+        params, error_response = prepare_analyze(request.json)
+        if error_response:
+            return error_response
+        blog_url, force_refresh, is_admin = params['url'], params['force_refresh'], params['is_admin']
         
-        if not blog_url:
-            return jsonify({'error': 'URL을 입력해주세요.'}), 400
-        
-        log("═" * 60)
-        log("🚀 새로운 블로그 분석 요청 시작", "API")
-        log(f"   URL: {blog_url}", "API")
-        log(f"   강제 재생성: {force_refresh}", "API")
-        log(f"   🔑 마스터 계정: {is_admin}", "API")
-        log("═" * 60)
+        log("🚀 새로운 블로그 분석 요청 시작", "API", url=blog_url, force_refresh=force_refresh, is_admin=is_admin)
         
         # 💾 1단계: 캐시 조회 (강제 재생성이 아닌 경우)
         if not force_refresh:
             cached_result = get_cached_comments(blog_url)
             if cached_result:
                 log("⚡ 캐시된 데이터 반환 (즉시 응답!)", "CACHE")
+                log_analyze_success(blog_url, cached_result['blog'], cached_result['comments'], from_cache=True)
                 
-                # 📊 Analytics 로깅 (캐시 히트)
-                log_analytics(
-                    action='blog_analyzed',
-                    data={
-                        'blog_url': blog_url,
-                        'title': cached_result['blog'].get('title', '')[:100],
-                        'comments_count': len(cached_result['comments']),
-                        'from_cache': True
-                    },
-                    success=True
-                )
-                
-                return jsonify({
-                    'success': True,
+                return analyze_response({
                     'blog': cached_result['blog'],
                     'comments': cached_result['comments'],
                     'from_cache': True,
                     'cached_at': cached_result.get('cached_at')
-                })
+                }, params['fields'])
+        
+        # 🚦 사용량 한도 (캐시 히트는 차감 없음 - 스크래핑/AI 전에 차감, 관리자 세션은 제외)
+        # isAdmin(클라이언트 마스터 코드)은 서버가 확인할 수 없으므로 한도 대상
+        if 'admin_logged_in' not in session:
+            quota = g.quota = check_usage_quota(params['user_id'], get_client_ip())
+            denied = quota_denied_response(quota, params['user_id'])
+            if denied:
+                return denied
         
         # 💾 2단계: 캐시 미스 → 새로 생성
         log("🔨 새로운 댓글 생성 시작...", "API")
@@ -1026,46 +3231,646 @@ def analyze_blog():
         comments = generate_comments(blog_data, is_admin)
         
         # 💾 3단계: 캐시에 저장 (24시간)
-        cache_saved = set_cached_comments(blog_url, blog_data, comments, ttl=86400)
-        
-        log("═" * 60, "API")
-        log(f"🎉 전체 분석 완료! 댓글 {len(comments)}개 생성", "API")
-        log(f"💾 캐시 저장: {'성공' if cache_saved else '실패'}", "API")
-        log("═" * 60, "API")
-        
-        # 📊 Analytics 로깅 (성공)
-        log_analytics(
-            action='blog_analyzed',
-            data={
-                'blog_url': blog_url,
-                'title': blog_data.get('title', '')[:100],
-                'comments_count': len(comments),
-                'from_cache': False
-            },
-            success=True
-        )
+        cache_saved = set_cached_comments(blog_url, blog_data, comments, ttl=ANALYSIS_CACHE_TTL)
         
-        return jsonify({
-            'success': True,
+        log(f"🎉 전체 분석 완료! 댓글 {len(comments)}개 생성", "API", cache_saved=cache_saved)
+        log_analyze_success(blog_url, blog_data, comments, from_cache=False)
+        
+        return analyze_response({
             'blog': blog_data,
             'comments': comments,
             'from_cache': False
+        }, params['fields'])
+    
+    except Exception as e:
+        return analyze_failed_response(blog_url, e)
+
+# ============================
+# 🔥 인기 글 + 캐시 예열
+# ============================
+# 분석 성공마다 정규화 URL의 요청 수/캐시 히트 수를 일별 정렬 집합에 ZINCRBY (_queue_analytics)
+# → 최근 HOT_POST_WINDOW_DAYS일 합산 상위 글이 인기 글
+# 예열 크론: 인기 상위 CACHE_WARM_TOP개 중 캐시가 곧 만료되거나(CACHE_WARM_BEFORE초 이내) 없는 글을
+# 만료 전에 다시 생성 → 인기 글은 TTL이 끝나도 사용자 요청이 미스를 맞지 않음
+# 스크래핑 + AI 한 건이 수 초~십수 초 → 서버리스 실행 시간 안에 끝나도록 호출당 기본 1건 (크론을 자주 호출)
+
+HOT_POST_WINDOW_DAYS = int(os.environ.get('HOT_POST_WINDOW_DAYS', '2'))
+HOT_POST_RETENTION = (HOT_POST_WINDOW_DAYS + 1) * 24 * 60 * 60
+HOT_POST_PANEL_SIZE = 20
+CACHE_WARM_TOP = int(os.environ.get('CACHE_WARM_TOP', '20'))  # 예열 대상 인기 글 수
+CACHE_WARM_BEFORE = int(os.environ.get('CACHE_WARM_BEFORE', '7200'))  # 남은 TTL이 이보다 짧으면 예열 (초)
+CACHE_WARM_MAX_PER_RUN = int(os.environ.get('CACHE_WARM_MAX_PER_RUN', '1'))  # 1회 최대 생성 수 (AI 비용/실행 시간)
+CACHE_WARM_BUDGET = float(os.environ.get('CACHE_WARM_BUDGET', '20'))  # 이 시간(초)이 지나면 다음 글을 시작하지 않음
+CACHE_WARM_FAILED_TTL = int(os.environ.get('CACHE_WARM_FAILED_TTL', '3600'))  # 실패한 글은 이 시간(초) 동안 예열 대상에서 제외
+CACHE_WARM_LOCK_TTL = int(CACHE_WARM_BUDGET) + 60  # 실행이 중간에 끊겨도 락이 오래 남지 않도록 (마지막 1건 여유)
+
+def hot_posts_key(date_str, kind='requests'):
+    """일별 인기 글 키 (requests: 요청 수 / hits: 캐시 히트 수 - 정렬 집합, url: 정규 주소 → 요청 URL HASH)"""
+    return f'analytics:hot:{date_str}' if kind == 'requests' else f'analytics:hot:{kind}:{date_str}'
+
+def get_hot_posts(limit, with_ttl=False):
+    """
+    최근 HOT_POST_WINDOW_DAYS일 요청 수 상위 글
+    
+    Args:
+        limit: 최대 글 수
+        with_ttl: 예열용 - 현재 캐시 네임스페이스 기준 남은 TTL(-2 = 캐시 없음)과
+                  마지막 요청 URL(source_url, 기록 전 글은 None) 포함 여부
+    
+    Returns:
+        list: [{url, platform, requests, hits, hit_rate(, cache_ttl, source_url)}, ...] 요청 많은 순
+    """
+    today = get_kst_now()
+    dates = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(HOT_POST_WINDOW_DAYS)]
+    
+    # 날짜별 상위 limit개만 읽어 합산 (전체 멤버를 읽지 않음)
+    pipe = store.pipeline()
+    for date_str in dates:
+        pipe.zrevrange(hot_posts_key(date_str), 0, limit - 1, withscores=True)
+    requests_by_url = {}
+    for ranked in pipe.execute():
+        for url, score in ranked or []:
+            requests_by_url[url] = requests_by_url.get(url, 0) + int(score)
+    top = sorted(requests_by_url.items(), key=lambda item: -item[1])[:limit]
+    if not top:
+        return []
+    
+    pipe = store.pipeline()
+    for url, _ in top:
+        for date_str in dates:
+            pipe.zscore(hot_posts_key(date_str, 'hits'), url)
+    if with_ttl:
+        namespace = cache_namespace()
+        for url, _ in top:
+            pipe.ttl(generate_cache_key(url, namespace))
+        for url, _ in top:
+            for date_str in dates:  # 최근 날짜부터
+                pipe.hget(hot_posts_key(date_str, 'url'), url)
+    results = pipe.execute()
+    
+    posts = []
+    for i, (url, requests_count) in enumerate(top):
+        hits = int(sum(score or 0 for score in results[i * len(dates):(i + 1) * len(dates)]))
+        post = {
+            'url': url,
+            'platform': platform_label(resolve_url(url).platform),
+            'requests': requests_count,
+            'hits': hits,
+            'hit_rate': _rate(hits, requests_count),
+        }
+        if with_ttl:
+            post['cache_ttl'] = results[len(top) * len(dates) + i]
+            source_start = len(top) * (len(dates) + 1) + i * len(dates)
+            post['source_url'] = next(filter(None, results[source_start:source_start + len(dates)]), None)
+        posts.append(post)
+    return posts
+
+def warm_source_url(post):
+    """예열할 때 요청할 URL - 사용자가 요청한 URL (기록이 없으면 플랫폼 처리기가 있는 글만 정규 주소로)"""
+    if post['source_url']:
+        return post['source_url']
+    if resolve_url(post['url']).platform != 'generic':
+        return f"https://{post['url']}"
+    return None
+
+def warm_failed_key(canonical):
+    """예열 실패 표시 키 (CACHE_WARM_FAILED_TTL 동안 다음 후보에게 순서를 넘김)"""
+    return f'cache:warm:failed:{canonical}'
+
+def warm_hot_cache(top=CACHE_WARM_TOP, before=CACHE_WARM_BEFORE, max_runs=CACHE_WARM_MAX_PER_RUN,
+                   budget=CACHE_WARM_BUDGET):
+    """
+    인기 글 캐시 예열 (곧 만료되거나 없는 항목만, 많이 요청된 글부터 AI 생성 최대 max_runs회, budget초 안에 시작한 것만)
+    
+    - 요청 URL을 모르는 일반 사이트 글, 최근 실패한 글은 처음부터 제외 (skipped)
+    - 스크래핑/생성에 실패한 글은 기존 캐시를 덮어쓰지 않고 CACHE_WARM_FAILED_TTL 동안 제외
+      → 계속 실패하는 인기 글이 매번 맨 앞에서 예열 순서를 막지 않음
+    
+    Returns:
+        dict: {checked, warmed: [url], skipped: [url], failed: [url], remaining}
+    """
+    started = time.monotonic()
+    result = {'checked': 0, 'warmed': [], 'skipped': [], 'failed': [], 'remaining': 0}
+    posts = [post for post in get_hot_posts(top, with_ttl=True)
+             if post['cache_ttl'] == -2 or 0 <= post['cache_ttl'] < before]
+    result['checked'] = len(posts)
+    
+    pipe = store.pipeline(transaction=False)
+    for post in posts:
+        pipe.exists(warm_failed_key(post['url']))
+    recently_failed = pipe.execute() if posts else []
+    candidates = []
+    for post, failed in zip(posts, recently_failed):
+        url = warm_source_url(post)
+        if url is None or failed:
+            result['skipped'].append(post['url'])
+        else:
+            candidates.append((post, url))
+    
+    runs = 0
+    attempted = 0
+    for post, url in candidates:
+        if runs >= max_runs or time.monotonic() - started >= budget:
+            break
+        attempted += 1
+        try:
+            blog_data = scrape_blog_content(url)
+            if blog_data['title'] == SCRAPE_ERROR_TITLE:
+                raise ValueError('스크래핑 실패')
+            runs += 1  # AI 생성을 호출한 것만 1회로 셈
+            comments = generate_comments(blog_data)
+            if not set_cached_comments(url, blog_data, comments):
+                raise ValueError('캐시 저장 실패')
+            result['warmed'].append(post['url'])
+            metric_inc('cache', getattr(store, 'backend', 'redis'), 'warm')
+        except Exception as e:
+            log(f"⚠️ 캐시 예열 실패: {post['url'][:50]}... {e}", "WARNING")
+            result['failed'].append(post['url'])
+            try:
+                store.set(warm_failed_key(post['url']), 1, ex=CACHE_WARM_FAILED_TTL)
+            except Exception:
+                pass
+    
+    result['remaining'] = len(candidates) - attempted  # 다음 크론 호출에서 처리
+    log(f"🔥 캐시 예열: 대상 {result['checked']}개 중 {len(result['warmed'])}개 생성", "CACHE",
+        skipped=len(result['skipped']), failed=len(result['failed']), remaining=result['remaining'])
+    return result
+
+@app.route('/api/cron/cache-warm')
+def cron_cache_warm():
+    """🔥 인기 글 캐시 예열 (크론 - Authorization: Bearer CRON_SECRET, 동시 실행 1개)"""
+    if not cron_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
+    if not store:
+        return jsonify({'error': 'storage_unavailable'}), 503
+    
+    lock_key = 'cache:warm:lock'
+    if not store.set(lock_key, '1', nx=True, ex=CACHE_WARM_LOCK_TTL):
+        return jsonify({'success': False, 'error': 'already_running'}), 409
+    try:
+        return jsonify({'success': True, **warm_hot_cache()})
+    finally:
+        store.delete(lock_key)
+
+# ============================
+# 📊 Analytics 통계 계산 (패널별)
+# ============================
+
+# 대시보드 패널 목록 - 패널마다 독립적으로 계산/캐싱/조회
+STATS_PANELS = ('traffic', 'funnel', 'cache', 'hot', 'users', 'referrals', 'devices', 'timing')
+
+# 패널별 필드 목록 (기본값 / 빈 패널 응답용)
+STATS_PANEL_FIELDS = {
+    'traffic': ('total_analyses', 'success_analyses', 'failed_analyses', 'today_analyses',
+                'yesterday_analyses', 'week_analyses', 'month_analyses', 'hourly_stats',
+                'daily_stats', 'top_blog_domains', 'success_rate', 'avg_comments_count',
+                'total_page_views', 'total_comment_copies', 'total_blog_visits',
+                'today_page_views', 'today_comment_copies', 'today_blog_visits',
+                'week_page_views', 'week_comment_copies', 'week_blog_visits',
+                'daily_page_views', 'daily_comment_copies', 'daily_blog_visits'),
+    'funnel': ('conversion_funnel', 'success_rate', 'completion_rate', 'feedback_stats',
+               'total_feedbacks', 'avg_rating'),
+    'cache': ('cache_hits', 'cache_misses', 'cache_stores', 'today_cache_hits',
+              'today_cache_misses', 'cache_hit_rate', 'today_cache_hit_rate', 'cache_versions'),
+    'hot': ('hot_posts', 'hot_window_days'),
+    'users': ('dau', 'wau', 'mau', 'today_new_users', 'new_user_rate', 'retention_rate',
+              'avg_session_time', 'session_p50', 'session_p90', 'session_p99', 'session_count'),
+    'referrals': ('total_referrals', 'total_bonus_claims', 'total_referrers',
+                  'referral_participation_rate', 'top_referrers'),
+    'devices': ('browser_stats', 'device_stats', 'os_stats'),
+    'timing': ('stage_timings', 'timing_days'),
+}
+
+def _empty_stats():
+    """통계 기본값 (KV 비활성화 / 조회 실패 시에도 템플릿이 깨지지 않도록)"""
+    return {
+        'total_analyses': 0,
+        'success_analyses': 0,
+        'failed_analyses': 0,
+        'today_analyses': 0,
+        'yesterday_analyses': 0,
+        'week_analyses': 0,
+        'month_analyses': 0,
+        'hourly_stats': {},
+        'daily_stats': {},
+        'recent_logs': [],
+        'top_blog_domains': {'네이버 블로그': 0},
+        'conversion_funnel': {
+            'visits': 0,
+            'analyses': 0,
+            'copies': 0,
+            'visits_to_blog': 0
+        },
+        'success_rate': 0,
+        'avg_comments_count': 8.0,
+        'total_page_views': 0,
+        'total_comment_copies': 0,
+        'total_blog_visits': 0,
+        'today_page_views': 0,
+        'today_comment_copies': 0,
+        'today_blog_visits': 0,
+        'week_page_views': 0,
+        'week_comment_copies': 0,
+        'week_blog_visits': 0,
+        'daily_page_views': {},
+        'daily_comment_copies': {},
+        'daily_blog_visits': {},
+        'browser_stats': {},
+        'device_stats': {},
+        'os_stats': {},
+        'feedback_stats': {},
+        'total_feedbacks': 0,
+        'avg_rating': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'cache_stores': 0,
+        'today_cache_hits': 0,
+        'today_cache_misses': 0,
+        'cache_hit_rate': 0,
+        'today_cache_hit_rate': 0,
+        'cache_versions': [],
+        'hot_posts': [],
+        'hot_window_days': HOT_POST_WINDOW_DAYS,
+        'total_referrals': 0,
+        'total_bonus_claims': 0,
+        'total_referrers': 0,
+        'referral_participation_rate': 0,
+        'top_referrers': [],
+        # ✨ NEW: DAU/WAU/MAU/신규/재방문/세션
+        'dau': 0,
+        'wau': 0,
+        'mau': 0,
+        'today_new_users': 0,
+        'new_user_rate': 0,
+        'retention_rate': 0,
+        'avg_session_time': 0,
+        'session_p50': 0,
+        'session_p90': 0,
+        'session_p99': 0,
+        'session_count': 0,
+        'completion_rate': 0,
+        'stage_timings': [],
+        'timing_days': 7
+    }
+
+def _get_counters(keys_to_get):
+    """
+    ⚡ 카운터 키 여러 개를 Redis Pipeline 한 번으로 조회
+    
+    Args:
+        keys_to_get: [(이름, Redis 키), ...]
+    
+    Returns:
+        dict: {이름: int}
+    """
+    pipe = store.pipeline()
+    for _, redis_key in keys_to_get:
+        pipe.get(redis_key)
+    results = pipe.execute()
+    
+    values = {}
+    for (key_name, _), value in zip(keys_to_get, results):
+        try:
+            values[key_name] = int(value) if value else 0
+        except (TypeError, ValueError):
+            values[key_name] = 0
+    return values
+
+def _rate(part, total):
+    """백분율 (소수점 1자리, total=0이면 0)"""
+    return round((part / total) * 100, 1) if total > 0 else 0
+
+def _compute_traffic_panel(today, days):
+    """📈 트래픽 패널: 분석/방문/복사/이동 카운트 + 시간대별/일별 추이"""
+    today_str = today.strftime('%Y-%m-%d')
+    yesterday_str = (today - timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    keys_to_get = [
+        ('total_analyses', 'analytics:total:blog_analyzed'),
+        ('success_analyses', 'analytics:success:blog_analyzed'),
+        ('failed_analyses', 'analytics:failed:blog_analyzed'),
+        ('today_analyses', f'analytics:daily:{today_str}:blog_analyzed'),
+        ('yesterday_analyses', f'analytics:daily:{yesterday_str}:blog_analyzed'),
+        ('total_page_views', 'analytics:total:page_view'),
+        ('today_page_views', f'analytics:daily:{today_str}:page_view'),
+        ('total_comment_copies', 'analytics:total:comment_copied'),
+        ('today_comment_copies', f'analytics:daily:{today_str}:comment_copied'),
+        ('total_blog_visits', 'analytics:total:blog_visit'),
+        ('today_blog_visits', f'analytics:daily:{today_str}:blog_visit'),
+    ]
+    
+    # 시간대별 (24시간)
+    for hour in range(24):
+        hour_str = f"{hour:02d}"
+        keys_to_get.append((f'hourly_{hour_str}', f'analytics:hourly:{today_str}:{hour_str}'))
+    
+    # 일별 통계
+    dates = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+    for date in dates:
+        keys_to_get.append((f'daily_analyzed_{date}', f'analytics:daily:{date}:blog_analyzed'))
+        keys_to_get.append((f'daily_pageview_{date}', f'analytics:daily:{date}:page_view'))
+        keys_to_get.append((f'daily_copies_{date}', f'analytics:daily:{date}:comment_copied'))
+        keys_to_get.append((f'daily_visits_{date}', f'analytics:daily:{date}:blog_visit'))
+    
+    values = _get_counters(keys_to_get)
+    
+    panel = {name: values[name] for name, _ in keys_to_get[:11]}
+    panel.update({
+        'hourly_stats': {},
+        'daily_stats': {},
+        'daily_page_views': {},
+        'daily_comment_copies': {},
+        'daily_blog_visits': {},
+        'week_analyses': 0,
+        'week_page_views': 0,
+        'week_comment_copies': 0,
+        'week_blog_visits': 0,
+        'month_analyses': 0,
+        'avg_comments_count': 8.0,
+    })
+    
+    for hour in range(24):
+        hour_str = f"{hour:02d}"
+        count = values[f'hourly_{hour_str}']
+        if count > 0:
+            panel['hourly_stats'][hour_str] = count
+    
+    for i, date in enumerate(dates):
+        analyzed = values[f'daily_analyzed_{date}']
+        panel['daily_stats'][date] = analyzed
+        panel['daily_page_views'][date] = values[f'daily_pageview_{date}']
+        panel['daily_comment_copies'][date] = values[f'daily_copies_{date}']
+        panel['daily_blog_visits'][date] = values[f'daily_visits_{date}']
+        
+        if i < 7:
+            panel['week_analyses'] += analyzed
+            panel['week_page_views'] += values[f'daily_pageview_{date}']
+            panel['week_comment_copies'] += values[f'daily_copies_{date}']
+            panel['week_blog_visits'] += values[f'daily_visits_{date}']
+        
+        panel['month_analyses'] += analyzed
+    
+    panel['success_rate'] = _rate(panel['success_analyses'], panel['total_analyses'])
+    
+    # 플랫폼별 분석 수 (성공한 분석 기준, 많은 순)
+    platforms = store.hgetall('analytics:platforms') or {}
+    panel['top_blog_domains'] = {
+        platform_label(name): int(count)
+        for name, count in sorted(platforms.items(), key=lambda item: -int(item[1]))
+    } or {'네이버 블로그': 0}
+    return panel
+
+def _compute_funnel_panel(today, days):
+    """🎯 퍼널 패널: 방문 → 분석 → 복사 → 이동 전환 + 피드백"""
+    keys_to_get = [
+        ('total_page_views', 'analytics:total:page_view'),
+        ('total_analyses', 'analytics:total:blog_analyzed'),
+        ('success_analyses', 'analytics:success:blog_analyzed'),
+        ('total_comment_copies', 'analytics:total:comment_copied'),
+        ('total_blog_visits', 'analytics:total:blog_visit'),
+    ]
+    for rating in [5, 4, 3, 2]:
+        keys_to_get.append((f'feedback_{rating}', f'analytics:feedback:rating_{rating}'))
+    
+    values = _get_counters(keys_to_get)
+    
+    panel = {
+        'conversion_funnel': {
+            'visits': values['total_page_views'],
+            'analyses': values['success_analyses'],
+            'copies': values['total_comment_copies'],
+            'visits_to_blog': values['total_blog_visits']
+        },
+        'success_rate': _rate(values['success_analyses'], values['total_analyses']),
+        'completion_rate': _rate(values['total_blog_visits'], values['total_page_views']),
+        'feedback_stats': {},
+        'total_feedbacks': 0,
+        'avg_rating': 0
+    }
+    
+    for rating in [5, 4, 3, 2]:
+        count = values[f'feedback_{rating}']
+        if count > 0:
+            panel['feedback_stats'][rating] = count
+            panel['total_feedbacks'] += count
+    
+    # 평균 만족도 계산
+    if panel['total_feedbacks'] > 0:
+        weighted_sum = sum(rating * count for rating, count in panel['feedback_stats'].items())
+        panel['avg_rating'] = round(weighted_sum / panel['total_feedbacks'], 2)
+    return panel
+
+def _compute_cache_panel(today, days):
+    """💾 캐시 패널: 히트/미스/저장 + 히트율"""
+    today_str = today.strftime('%Y-%m-%d')
+    panel = _get_counters([
+        ('cache_hits', 'analytics:cache:hits'),
+        ('cache_misses', 'analytics:cache:misses'),
+        ('cache_stores', 'analytics:cache:stores'),
+        ('today_cache_hits', f'analytics:cache:hits:{today_str}'),
+        ('today_cache_misses', f'analytics:cache:misses:{today_str}'),
+    ])
+    panel['cache_hit_rate'] = _rate(panel['cache_hits'], panel['cache_hits'] + panel['cache_misses'])
+    panel['today_cache_hit_rate'] = _rate(panel['today_cache_hits'], panel['today_cache_hits'] + panel['today_cache_misses'])
+    
+    # 🔄 네임스페이스(모델/프롬프트 지문 + 세대)별 히트율 - 최근에 생긴 10개
+    namespaces = store.zrevrange(CACHE_NAMESPACES_KEY, 0, 9, withscores=True) or []
+    pipe = store.pipeline()
+    for namespace, _ in namespaces:
+        pipe.hgetall(f'analytics:cache:ns:{namespace}')
+    current = cache_namespace()
+    panel['cache_versions'] = []
+    for (namespace, since), counts in zip(namespaces, pipe.execute() if namespaces else []):
+        hits, misses = int(counts.get('hits', 0)), int(counts.get('misses', 0))
+        panel['cache_versions'].append({
+            'namespace': namespace,
+            'hits': hits,
+            'misses': misses,
+            'stores': int(counts.get('stores', 0)),
+            'hit_rate': _rate(hits, hits + misses),
+            'current': namespace == current,
+            'since': datetime.fromtimestamp(since / 1000, KST).strftime('%Y-%m-%d %H:%M'),
+        })
+    return panel
+
+def _compute_hot_panel(today, days):
+    """🔥 인기 글 패널: 최근 HOT_POST_WINDOW_DAYS일 요청 상위 글 + 글별 캐시 히트율/남은 TTL"""
+    return {'hot_posts': get_hot_posts(HOT_POST_PANEL_SIZE, with_ttl=True), 'hot_window_days': HOT_POST_WINDOW_DAYS}
+
+def _compute_users_panel(today, days):
+    """👥 사용자 패널: DAU/WAU/MAU, 신규/재방문, 세션 시간 분포"""
+    today_str = today.strftime('%Y-%m-%d')
+    
+    # ⚡ Pipeline으로 모든 작업 한 번에!
+    pipe = store.pipeline()
+    
+    # 1. DAU (오늘 고유 사용자)
+    pipe.scard(active_users_key('dau', today_str))
+    
+    # 2. WAU (최근 7일 고유 사용자) - SUNIONSTORE 사용! (클러스터: 기간별 해시 태그로 같은 슬롯)
+    wau_keys = [active_users_key('wau', (today - timedelta(days=i)).strftime("%Y-%m-%d")) for i in range(7)]
+    wau_temp = active_users_key('wau', 'temp')
+    pipe.sunionstore(wau_temp, *wau_keys)  # 임시 SET 생성
+    pipe.scard(wau_temp)  # 크기만 조회 (초고속!)
+    pipe.expire(wau_temp, 3600)  # 1시간 후 자동 삭제
+    
+    # 3. MAU (최근 30일 고유 사용자) - SUNIONSTORE 사용!
+    mau_keys = [active_users_key('mau', (today - timedelta(days=i)).strftime("%Y-%m-%d")) for i in range(30)]
+    mau_temp = active_users_key('mau', 'temp')
+    pipe.sunionstore(mau_temp, *mau_keys)
+    pipe.scard(mau_temp)
+    pipe.expire(mau_temp, 3600)
+    
+    # 4. 오늘 신규 사용자
+    pipe.scard(f'analytics:new_users:{today_str}')
+    
+    # 5. 세션 시간 히스토그램 (HGETALL - 버킷 수만큼만 읽음)
+    pipe.hgetall(f'analytics:sessions:hist:{today_str}')
+    
+    dau, _, wau, _, _, mau, _, new_users, session_hist = pipe.execute()
+    
+    panel = {
+        'dau': dau or 0,
+        'wau': wau or 0,
+        'mau': mau or 0,
+        'today_new_users': new_users or 0,
+        'new_user_rate': 0,
+        'retention_rate': 0,
+        'avg_session_time': 0,
+        'session_p50': 0,
+        'session_p90': 0,
+        'session_p99': 0,
+        'session_count': 0
+    }
+    
+    # 세션 시간 계산 (평균 + p50/p90/p99)
+    session_summary = session_hist_summary(merge_session_hists(session_hist))
+    if session_summary['count']:
+        panel['avg_session_time'] = session_summary['mean']
+        panel['session_p50'] = session_summary['p50']
+        panel['session_p90'] = session_summary['p90']
+        panel['session_p99'] = session_summary['p99']
+        panel['session_count'] = session_summary['count']
+        log(f"📊 세션 시간 통계: {session_summary['count']}개 기록, 평균 {panel['avg_session_time']}초, p50 {panel['session_p50']}초, p99 {panel['session_p99']}초", "ANALYTICS")
+    else:
+        log(f"⚠️ 세션 시간 데이터 없음 (오늘: {today_str})", "WARNING")
+    
+    # 계산형 지표
+    if panel['dau'] > 0:
+        returning_users = panel['dau'] - panel['today_new_users']
+        panel['new_user_rate'] = _rate(panel['today_new_users'], panel['dau'])
+        panel['retention_rate'] = _rate(returning_users, panel['dau'])
+        log(f"👥 DAU: {panel['dau']}명, 신규: {panel['today_new_users']}명, 재방문: {returning_users}명 ({panel['retention_rate']}%)", "ANALYTICS")
+    
+    log(f"⚡ DAU: {panel['dau']}, WAU: {panel['wau']}, MAU: {panel['mau']} (초고속 조회!)", "ANALYTICS")
+    return panel
+
+def _compute_referrals_panel(today, days):
+    """🎁 추천 패널: 추천 건수, 보너스 지급, 참여율"""
+    panel = _get_counters([
+        ('total_referrals', account_key('analytics:total_referrals')),  # 총 추천 건수
+        ('total_bonus_claims', account_key('analytics:total_bonus_claims')),  # 총 보너스 지급 횟수
+    ])
+    
+    # 추천한 유저 수 (SET 크기 조회)
+    panel['total_referrers'] = store.scard(account_key('analytics:referrers')) or 0
+    
+    # 👥 추천 참여율 (추천한 유저 / MAU) - MAU는 users 패널 스냅샷 재사용
+    mau = get_stats_snapshot(days, panel='users').get('mau', 0)
+    panel['referral_participation_rate'] = _rate(panel['total_referrers'], mau)
+    
+    # 🏆 추천 순위 상위 10명 (정렬 집합이라 전체 스캔 없이 조회)
+    leaders = store.zrevrange(account_key('referrals:leaderboard'), 0, 9, withscores=True) or []
+    panel['top_referrers'] = [{'user_id': user_id, 'referrals': int(score)} for user_id, score in leaders]
+    return panel
+
+def _compute_devices_panel(today, days):
+    """📱 디바이스 패널: 브라우저/디바이스/OS 분포"""
+    groups = {
+        'browser_stats': ('browser', ['Chrome', 'Safari', 'Edge', 'Firefox', 'Other']),
+        'device_stats': ('device', ['Desktop', 'Mobile', 'Tablet']),
+        'os_stats': ('os', ['Windows', 'macOS', 'iOS', 'Android', 'Linux', 'Other']),
+    }
+    keys_to_get = []
+    for _, (prefix, names) in groups.items():
+        for name in names:
+            keys_to_get.append((f'{prefix}_{name}', f'analytics:{prefix}:{name}'))
+    
+    values = _get_counters(keys_to_get)
+    
+    panel = {}
+    for stats_key, (prefix, names) in groups.items():
+        panel[stats_key] = {name: values[f'{prefix}_{name}'] for name in names if values[f'{prefix}_{name}'] > 0}
+    return panel
+
+def _compute_timing_panel(today, days):
+    """⏱️ 처리 시간 패널: 분석 단계별 지연시간 분포 (최근 7일 이내 히스토그램 합산)"""
+    flush_timings(force=True)  # 이 프로세스의 미반영 버퍼 포함
+    
+    window = min(days, 7)
+    dates = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(window)]
+    
+    pipe = store.pipeline()
+    for stage in TIMING_STAGES:
+        for date in dates:
+            pipe.hgetall(f'analytics:timing:{stage}:{date}')
+    results = pipe.execute()
+    
+    stage_timings = []
+    for i, stage in enumerate(TIMING_STAGES):
+        hist = merge_session_hists(*results[i * window:(i + 1) * window])
+        summary = session_hist_summary(hist)
+        if not summary['count']:
+            continue
+        # 마이크로초 → 밀리초
+        stage_timings.append({
+            'stage': stage,
+            'count': summary['count'],
+            'mean_ms': round(hist['sum'] / hist['count'] / 1000, 1),
+            'p50_ms': round(summary['p50'] / 1000, 1),
+            'p90_ms': round(summary['p90'] / 1000, 1),
+            'p99_ms': round(summary['p99'] / 1000, 1),
         })
     
+    return {'stage_timings': stage_timings, 'timing_days': window}
+
+STATS_PANEL_COMPUTERS = {
+    'traffic': _compute_traffic_panel,
+    'funnel': _compute_funnel_panel,
+    'cache': _compute_cache_panel,
+    'hot': _compute_hot_panel,
+    'users': _compute_users_panel,
+    'referrals': _compute_referrals_panel,
+    'devices': _compute_devices_panel,
+    'timing': _compute_timing_panel,
+}
+
+def compute_stats_panel(panel, days=30):
+    """
+    패널 하나의 통계 계산 (해당 패널이 쓰는 키만 조회)
+    
+    Args:
+        panel: STATS_PANELS 중 하나
+        days: 최근 며칠간의 데이터
+    
+    Returns:
+        dict: 패널 통계 (KV 비활성화 / 실패 시 기본값)
+    """
+    defaults = _empty_stats()
+    
+    if not store:
+        log(f"⚠️ KV 비활성화 - 빈 통계 반환 ({panel})", "WARNING")
+        return {key: defaults[key] for key in STATS_PANEL_FIELDS[panel]}
+    
+    try:
+        return STATS_PANEL_COMPUTERS[panel](get_kst_now(), days)
     except Exception as e:
-        # 📊 Analytics 로깅 (실패)
-        log_analytics(
-            action='blog_analyzed',
-            data={'blog_url': blog_url if 'blog_url' in locals() else 'unknown'},
-            success=False,
-            error_message=str(e)
-        )
-        return jsonify({'error': f'오류가 발생했습니다: {str(e)}'}), 500
+        log(f"⚠️ KV 통계 조회 실패 ({panel}): {e}", "ERROR")
+        return {key: defaults[key] for key in STATS_PANEL_FIELDS[panel]}
 
-# 📊 Analytics 통계 계산 함수 (Vercel KV)
 def get_analytics_stats(days=30):
     """
-    ⚡ 최적화된 통계 조회 (Redis Pipeline 사용 - 10배 이상 빠름!)
+    전체 통계 직접 계산 (모든 패널 합산 - 크론/스크립트용, 대시보드는 패널 스냅샷 사용)
     
     Args:
         days: 최근 며칠간의 데이터 (기본 30일)
@@ -1073,341 +3878,194 @@ def get_analytics_stats(days=30):
     Returns:
         dict: 통계 데이터
     """
+    stats = _empty_stats()
+    with replica_reads('stats'):
+        for panel in STATS_PANELS:
+            stats.update(compute_stats_panel(panel, days))
     
-    stats = {
-        'total_analyses': 0,
-        'success_analyses': 0,
-        'failed_analyses': 0,
-        'today_analyses': 0,
-        'yesterday_analyses': 0,
-        'week_analyses': 0,
-        'month_analyses': 0,
-        'hourly_stats': {},
-        'daily_stats': {},
-        'recent_logs': [],
-        'top_blog_domains': {'네이버 블로그': 0},
-        'conversion_funnel': {
-            'visits': 0,
-            'analyses': 0,
-            'copies': 0,
-            'visits_to_blog': 0
-        },
-        'success_rate': 0,
-        'avg_comments_count': 8.0,
-        'total_page_views': 0,
-        'total_comment_copies': 0,
-        'total_blog_visits': 0,
-        'today_page_views': 0,
-        'today_comment_copies': 0,
-        'today_blog_visits': 0,
-        'week_page_views': 0,
-        'week_comment_copies': 0,
-        'week_blog_visits': 0,
-        'daily_page_views': {},
-        'daily_comment_copies': {},
-        'daily_blog_visits': {},
-        # ✨ NEW: DAU/WAU/MAU/신규/재방문/세션
-        'dau': 0,
-        'wau': 0,
-        'mau': 0,
-        'today_new_users': 0,
-        'new_user_rate': 0,
-        'retention_rate': 0,
-        'avg_session_time': 0,
-        'completion_rate': 0
-    }
+    log(f"⚡ KV 통계 조회 완료 (Pipeline): 총 {stats['total_analyses']}건, DAU {stats['dau']}명", "ANALYTICS")
+    return stats
+
+# ============================
+# 🗂️ 통계 스냅샷 (Materialized View, 패널별)
+# ============================
+
+# 스냅샷 최대 허용 나이 (초) - 이보다 오래되면 다음 조회 시 1개 요청만 재계산
+STATS_SNAPSHOT_MAX_AGE = int(os.environ.get('STATS_SNAPSHOT_MAX_AGE', '300'))
+STATS_SNAPSHOT_LOCK_TTL = 60  # 재계산 락 (동시 재계산 방지)
+STATS_SNAPSHOT_WAIT = 2.0  # 스냅샷이 없을 때 락을 못 잡은 요청이 재계산을 기다리는 최대 시간 (초)
+
+def stats_snapshot_key(days, panel):
+    return f'analytics:snapshot:{panel}:{days}'
+
+def _decode_stats_snapshot(raw):
+    """JSON 스냅샷 → 템플릿이 기대하는 형태로 복원 (JSON은 dict 키를 문자열로 바꿈)"""
+    snapshot = json.loads(raw)
+    if 'feedback_stats' in snapshot:
+        snapshot['feedback_stats'] = {int(k): v for k, v in snapshot['feedback_stats'].items()}
+    return snapshot
+
+def _with_snapshot_age(snapshot):
+    """조회 시점 기준 스냅샷 나이(초) 추가"""
+    generated_at = snapshot.get('snapshot_generated_at')
+    if generated_at:
+        age = (get_kst_now() - datetime.fromisoformat(generated_at)).total_seconds()
+        snapshot['snapshot_age_seconds'] = max(0, int(age))
+    return snapshot
+
+def refresh_stats_snapshot(days=30, panel=None):
+    """
+    패널 통계 재계산 후 스냅샷으로 저장 (크론 / 오래된 스냅샷 조회 시)
     
-    if not redis_client:
-        log("⚠️ KV 비활성화 - 빈 통계 반환", "WARNING")
-        return stats
+    Args:
+        days: 최근 며칠간의 데이터
+        panel: 패널 이름 (None이면 전체 패널)
     
-    try:
-        today = get_kst_now()
-        today_str = today.strftime('%Y-%m-%d')
-        yesterday_str = (today - timedelta(days=1)).strftime('%Y-%m-%d')
-        
-        # ⚡ Redis Pipeline: 모든 키를 한 번에 가져오기
-        pipe = redis_client.pipeline()
-        keys_map = {}
-        
-        # 기본 통계 키
-        keys_to_get = [
-            ('total_analyses', 'analytics:total:blog_analyzed'),
-            ('success_analyses', 'analytics:success:blog_analyzed'),
-            ('failed_analyses', 'analytics:failed:blog_analyzed'),
-            ('today_analyses', f'analytics:daily:{today_str}:blog_analyzed'),
-            ('yesterday_analyses', f'analytics:daily:{yesterday_str}:blog_analyzed'),
-            ('total_page_views', 'analytics:total:page_view'),
-            ('today_page_views', f'analytics:daily:{today_str}:page_view'),
-            ('total_comment_copies', 'analytics:total:comment_copied'),
-            ('today_comment_copies', f'analytics:daily:{today_str}:comment_copied'),
-            ('total_blog_visits', 'analytics:total:blog_visit'),
-            ('today_blog_visits', f'analytics:daily:{today_str}:blog_visit'),
-        ]
-        
-        # 시간대별 (24시간)
-        for hour in range(24):
-            hour_str = f"{hour:02d}"
-            keys_to_get.append((f'hourly_{hour_str}', f'analytics:hourly:{today_str}:{hour_str}'))
-        
-        # 일별 통계 (30일)
-        for i in range(days):
-            date = (today - timedelta(days=i)).strftime('%Y-%m-%d')
-            keys_to_get.append((f'daily_analyzed_{date}', f'analytics:daily:{date}:blog_analyzed'))
-            keys_to_get.append((f'daily_pageview_{date}', f'analytics:daily:{date}:page_view'))
-            keys_to_get.append((f'daily_copies_{date}', f'analytics:daily:{date}:comment_copied'))
-            keys_to_get.append((f'daily_visits_{date}', f'analytics:daily:{date}:blog_visit'))
-        
-        # 브라우저 분포
-        for browser in ['Chrome', 'Safari', 'Edge', 'Firefox', 'Other']:
-            keys_to_get.append((f'browser_{browser}', f'analytics:browser:{browser}'))
-        
-        # 디바이스 분포
-        for device in ['Desktop', 'Mobile', 'Tablet']:
-            keys_to_get.append((f'device_{device}', f'analytics:device:{device}'))
-        
-        # OS 분포
-        for os in ['Windows', 'macOS', 'iOS', 'Android', 'Linux', 'Other']:
-            keys_to_get.append((f'os_{os}', f'analytics:os:{os}'))
-        
-        # 피드백 분포
-        for rating in [5, 4, 3, 2]:
-            keys_to_get.append((f'feedback_{rating}', f'analytics:feedback:rating_{rating}'))
-        
-        # 💾 캐시 통계
-        keys_to_get.append(('cache_hits', 'analytics:cache:hits'))
-        keys_to_get.append(('cache_misses', 'analytics:cache:misses'))
-        keys_to_get.append(('cache_stores', 'analytics:cache:stores'))
-        keys_to_get.append(('today_cache_hits', f'analytics:cache:hits:{today_str}'))
-        keys_to_get.append(('today_cache_misses', f'analytics:cache:misses:{today_str}'))
-        
-        # 👥 추천 통계
-        keys_to_get.append(('total_referrals', 'analytics:total_referrals'))
-        keys_to_get.append(('total_bonus_claims', 'analytics:total_bonus_claims'))
-        
-        # Pipeline에 모든 get 추가
-        for key_name, redis_key in keys_to_get:
-            pipe.get(redis_key)
-            keys_map[key_name] = len(keys_map)
-        
-        # ⚡ 한 번에 실행!
-        results = pipe.execute()
-        
-        # 결과 파싱
-        def get_val(key_name):
-            idx = keys_map.get(key_name)
-            if idx is not None and results[idx]:
-                try:
-                    return int(results[idx])
-                except:
-                    return 0
-            return 0
-        
-        # 기본 통계
-        stats['total_analyses'] = get_val('total_analyses')
-        stats['success_analyses'] = get_val('success_analyses')
-        stats['failed_analyses'] = get_val('failed_analyses')
-        stats['today_analyses'] = get_val('today_analyses')
-        stats['yesterday_analyses'] = get_val('yesterday_analyses')
-        stats['total_page_views'] = get_val('total_page_views')
-        stats['today_page_views'] = get_val('today_page_views')
-        stats['total_comment_copies'] = get_val('total_comment_copies')
-        stats['today_comment_copies'] = get_val('today_comment_copies')
-        stats['total_blog_visits'] = get_val('total_blog_visits')
-        stats['today_blog_visits'] = get_val('today_blog_visits')
-        
-        # 시간대별 통계
-        for hour in range(24):
-            hour_str = f"{hour:02d}"
-            count = get_val(f'hourly_{hour_str}')
-            if count > 0:
-                stats['hourly_stats'][hour_str] = count
-        
-        # 일별 통계
-        for i in range(days):
-            date = (today - timedelta(days=i)).strftime('%Y-%m-%d')
-            
-            analyzed = get_val(f'daily_analyzed_{date}')
-            stats['daily_stats'][date] = analyzed
-            
-            if i < 7:
-                stats['week_analyses'] += analyzed
-                stats['week_page_views'] += get_val(f'daily_pageview_{date}')
-                stats['week_comment_copies'] += get_val(f'daily_copies_{date}')
-                stats['week_blog_visits'] += get_val(f'daily_visits_{date}')
-            
-            stats['month_analyses'] += analyzed
-            stats['daily_page_views'][date] = get_val(f'daily_pageview_{date}')
-            stats['daily_comment_copies'][date] = get_val(f'daily_copies_{date}')
-            stats['daily_blog_visits'][date] = get_val(f'daily_visits_{date}')
-        
-        # 브라우저 분포
-        stats['browser_stats'] = {}
-        for browser in ['Chrome', 'Safari', 'Edge', 'Firefox', 'Other']:
-            count = get_val(f'browser_{browser}')
-            if count > 0:
-                stats['browser_stats'][browser] = count
-        
-        # 디바이스 분포
-        stats['device_stats'] = {}
-        for device in ['Desktop', 'Mobile', 'Tablet']:
-            count = get_val(f'device_{device}')
-            if count > 0:
-                stats['device_stats'][device] = count
-        
-        # OS 분포
-        stats['os_stats'] = {}
-        for os in ['Windows', 'macOS', 'iOS', 'Android', 'Linux', 'Other']:
-            count = get_val(f'os_{os}')
-            if count > 0:
-                stats['os_stats'][os] = count
-        
-        # 피드백 통계
-        stats['feedback_stats'] = {}
-        stats['total_feedbacks'] = 0
-        for rating in [5, 4, 3, 2]:
-            count = get_val(f'feedback_{rating}')
-            if count > 0:
-                stats['feedback_stats'][rating] = count
-                stats['total_feedbacks'] += count
-        
-        # 평균 만족도 계산
-        if stats['total_feedbacks'] > 0:
-            weighted_sum = sum(rating * count for rating, count in stats['feedback_stats'].items())
-            stats['avg_rating'] = round(weighted_sum / stats['total_feedbacks'], 2)
-        else:
-            stats['avg_rating'] = 0
-        
-        # 💾 캐시 통계
-        stats['cache_hits'] = get_val('cache_hits')
-        stats['cache_misses'] = get_val('cache_misses')
-        stats['cache_stores'] = get_val('cache_stores')
-        stats['today_cache_hits'] = get_val('today_cache_hits')
-        stats['today_cache_misses'] = get_val('today_cache_misses')
-        
-        # 캐시 히트율 계산
-        total_cache_requests = stats['cache_hits'] + stats['cache_misses']
-        if total_cache_requests > 0:
-            stats['cache_hit_rate'] = round((stats['cache_hits'] / total_cache_requests) * 100, 1)
-        else:
-            stats['cache_hit_rate'] = 0
-        
-        # 오늘 캐시 히트율
-        today_cache_requests = stats['today_cache_hits'] + stats['today_cache_misses']
-        if today_cache_requests > 0:
-            stats['today_cache_hit_rate'] = round((stats['today_cache_hits'] / today_cache_requests) * 100, 1)
-        else:
-            stats['today_cache_hit_rate'] = 0
-        
-        # 👥 추천 통계
-        stats['total_referrals'] = get_val('total_referrals')  # 총 추천 건수
-        stats['total_bonus_claims'] = get_val('total_bonus_claims')  # 총 보너스 지급 횟수
-        
-        # 추천한 유저 수 (SET 크기 조회)
-        try:
-            stats['total_referrers'] = redis_client.scard('analytics:referrers') or 0
-        except:
-            stats['total_referrers'] = 0
-        
-        # 전환율 계산
-        stats['conversion_funnel']['visits'] = stats['total_page_views']
-        stats['conversion_funnel']['analyses'] = stats['success_analyses']
-        stats['conversion_funnel']['copies'] = stats['total_comment_copies']
-        stats['conversion_funnel']['visits_to_blog'] = stats['total_blog_visits']
-        
-        # 성공률 계산
-        if stats['total_analyses'] > 0:
-            stats['success_rate'] = round((stats['success_analyses'] / stats['total_analyses']) * 100, 1)
-        
-        # ✨ NEW: DAU/WAU/MAU 조회 (⚡ 초고속 최적화!)
+    Returns:
+        dict: 새 스냅샷 (통계 + snapshot_generated_at / snapshot_compute_ms)
+    """
+    if panel is None:
+        return _merge_panel_snapshots([refresh_stats_snapshot(days, name) for name in STATS_PANELS])
+    
+    started = time.perf_counter()
+    snapshot = compute_stats_panel(panel, days)
+    snapshot['snapshot_generated_at'] = get_kst_now().isoformat()
+    snapshot['snapshot_compute_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    snapshot['snapshot_days'] = days
+    
+    if store:
         try:
-            # ⚡ Pipeline으로 모든 작업 한 번에!
-            pipe_dau = redis_client.pipeline()
-            
-            # 1. DAU (오늘 고유 사용자)
-            pipe_dau.scard(f'analytics:dau:{today_str}')
-            
-            # 2. WAU (최근 7일 고유 사용자) - SUNIONSTORE 사용!
-            wau_keys = [f'analytics:wau:{(today - timedelta(days=i)).strftime("%Y-%m-%d")}' for i in range(7)]
-            if wau_keys:
-                pipe_dau.sunionstore('analytics:wau:temp', *wau_keys)  # 임시 SET 생성
-                pipe_dau.scard('analytics:wau:temp')  # 크기만 조회 (초고속!)
-                pipe_dau.expire('analytics:wau:temp', 3600)  # 1시간 후 자동 삭제
-            
-            # 3. MAU (최근 30일 고유 사용자) - SUNIONSTORE 사용!
-            mau_keys = [f'analytics:mau:{(today - timedelta(days=i)).strftime("%Y-%m-%d")}' for i in range(30)]
-            if mau_keys:
-                pipe_dau.sunionstore('analytics:mau:temp', *mau_keys)  # 임시 SET 생성
-                pipe_dau.scard('analytics:mau:temp')  # 크기만 조회 (초고속!)
-                pipe_dau.expire('analytics:mau:temp', 3600)  # 1시간 후 자동 삭제
-            
-            # 4. 오늘 신규 사용자
-            pipe_dau.scard(f'analytics:new_users:{today_str}')
-            
-            # 5. 세션 시간 리스트
-            pipe_dau.lrange(f'analytics:sessions:{today_str}', 0, -1)
-            
-            # ⚡ 한 번에 실행!
-            dau_results = pipe_dau.execute()
-            
-            # 결과 파싱
-            idx = 0
-            stats['dau'] = dau_results[idx] or 0
-            idx += 1
-            
-            if wau_keys:
-                idx += 1  # sunionstore 결과 스킵
-                stats['wau'] = dau_results[idx] or 0
-                idx += 2  # scard, expire 스킵
-            
-            if mau_keys:
-                idx += 1  # sunionstore 결과 스킵
-                stats['mau'] = dau_results[idx] or 0
-                idx += 2  # scard, expire 스킵
-            
-            stats['today_new_users'] = dau_results[idx] or 0
-            idx += 1
-            
-            # 세션 시간 계산
-            session_times = dau_results[idx] or []
-            if session_times:
-                total_time = sum(int(t) for t in session_times)
-                stats['avg_session_time'] = round(total_time / len(session_times), 0)
-                log(f"📊 세션 시간 통계: {len(session_times)}개 기록, 총 {total_time}초, 평균 {stats['avg_session_time']}초", "ANALYTICS")
-            else:
-                log(f"⚠️ 세션 시간 데이터 없음 (오늘: {today_str})", "WARNING")
-            
-            # 계산형 지표
-            if stats['dau'] > 0:
-                stats['new_user_rate'] = round((stats['today_new_users'] / stats['dau']) * 100, 1)
-                returning_users = stats['dau'] - stats['today_new_users']
-                stats['retention_rate'] = round((returning_users / stats['dau']) * 100, 1)
-                log(f"👥 DAU: {stats['dau']}명, 신규: {stats['today_new_users']}명, 재방문: {returning_users}명 ({stats['retention_rate']}%)", "ANALYTICS")
-            
-            if stats['total_page_views'] > 0:
-                stats['completion_rate'] = round((stats['total_blog_visits'] / stats['total_page_views']) * 100, 1)
-            
-            # 👥 추천 참여율 계산 (추천한 유저 / 전체 유저)
-            if stats['mau'] > 0:
-                stats['referral_participation_rate'] = round((stats['total_referrers'] / stats['mau']) * 100, 1)
-            else:
-                stats['referral_participation_rate'] = 0
-            
-            log(f"⚡ DAU: {stats['dau']}, WAU: {stats['wau']}, MAU: {stats['mau']} (초고속 조회!)", "ANALYTICS")
-            log(f"✨ 신규: {stats['today_new_users']}, 재방문율: {stats['retention_rate']}%", "ANALYTICS")
+            store.set(stats_snapshot_key(days, panel), json.dumps(snapshot, ensure_ascii=False), ex=86400)
+            log(f"🗂️ 통계 스냅샷 저장: {panel} {days}일 ({snapshot['snapshot_compute_ms']}ms)", "ANALYTICS")
+        except Exception as e:
+            log(f"⚠️ 통계 스냅샷 저장 실패 ({panel}): {e}", "WARNING")
+    
+    snapshot['snapshot_age_seconds'] = 0
+    return snapshot
+
+def _merge_panel_snapshots(snapshots):
+    """패널 스냅샷들을 하나의 stats dict로 합치기 (메타데이터는 가장 오래된 패널 기준)"""
+    stats = _empty_stats()
+    for snapshot in snapshots:
+        stats.update({k: v for k, v in snapshot.items() if not k.startswith('snapshot_')})
+    
+    oldest = min(snapshots, key=lambda s: s.get('snapshot_generated_at', ''))
+    stats['snapshot_generated_at'] = oldest.get('snapshot_generated_at')
+    stats['snapshot_age_seconds'] = max(s.get('snapshot_age_seconds', 0) for s in snapshots)
+    stats['snapshot_compute_ms'] = round(sum(s.get('snapshot_compute_ms', 0) for s in snapshots), 1)
+    return stats
+
+def get_stats_snapshot(days=30, panel=None, max_age=None, force=False):
+    """
+    대시보드용 통계 조회 - 패널당 스냅샷 GET 1회 (기간과 무관하게 일정한 비용)
+    
+    - force → 즉시 재계산
+    - 스냅샷 없음 → 락을 잡은 1개 요청만 재계산, 나머지는 STATS_SNAPSHOT_WAIT초까지 기다렸다가 없으면 빈 패널
+    - 스냅샷이 max_age보다 오래됨 → 락을 잡은 1개 요청만 재계산, 나머지는 기존 스냅샷 반환
+    
+    Args:
+        days: 최근 며칠간의 데이터
+        panel: 패널 이름 (None이면 전체 패널 합산)
+        max_age: 허용 나이 (초, 기본 STATS_SNAPSHOT_MAX_AGE)
+        force: 강제 재계산 여부
+    
+    Returns:
+        dict: 통계 + snapshot_generated_at / snapshot_age_seconds
+    """
+    if panel is None:
+        return _merge_panel_snapshots([get_stats_snapshot(days, name, max_age, force) for name in STATS_PANELS])
+    
+    if max_age is None:
+        max_age = STATS_SNAPSHOT_MAX_AGE
+    
+    if not store or force:
+        return refresh_stats_snapshot(days, panel)
+    
+    key = stats_snapshot_key(days, panel)
+    try:
+        raw = store.get(key)
+        if not raw:
+            if store.set(f'{key}:lock', '1', nx=True, ex=STATS_SNAPSHOT_LOCK_TTL):
+                return refresh_stats_snapshot(days, panel)
             
-        except Exception as dau_error:
-            log(f"⚠️ DAU/WAU/MAU 조회 실패: {dau_error}", "WARNING")
-        
-        # 플랫폼 (네이버만 사용 중)
-        stats['top_blog_domains']['네이버 블로그'] = stats['total_analyses']
-        
-        log(f"⚡ KV 통계 조회 완료 (Pipeline): 총 {stats['total_analyses']}건, DAU {stats['dau']}명", "ANALYTICS")
-        
+            deadline = time.monotonic() + STATS_SNAPSHOT_WAIT
+            while not raw and time.monotonic() < deadline:
+                time.sleep(0.1)
+                raw = store.get(key)
+            if not raw:
+                log(f"⏳ 통계 스냅샷 재계산 중 ({panel}) → 빈 패널 반환", "WARNING")
+                defaults = _empty_stats()
+                return {field: defaults[field] for field in STATS_PANEL_FIELDS[panel]}
+        
+        snapshot = _with_snapshot_age(_decode_stats_snapshot(raw))
+        if snapshot.get('snapshot_age_seconds', 0) <= max_age:
+            return snapshot
+        
+        # 오래된 스냅샷 → 재계산은 한 요청만
+        if store.set(f'{key}:lock', '1', nx=True, ex=STATS_SNAPSHOT_LOCK_TTL):
+            return refresh_stats_snapshot(days, panel)
+        return snapshot
+    
     except Exception as e:
-        log(f"⚠️ KV 통계 조회 실패: {e}", "ERROR")
+        log(f"⚠️ 통계 스냅샷 조회 실패 ({panel}): {e} → 직접 계산", "WARNING")
+        return refresh_stats_snapshot(days, panel)
+
+def bearer_authorized(secret):
+    """Authorization: Bearer 토큰 확인 (토큰이 설정되지 않았으면 항상 거부)"""
+    return bool(secret) and request.headers.get('Authorization') == f'Bearer {secret}'
+
+def cron_authorized():
+    """크론 요청 인증 (Authorization: Bearer CRON_SECRET, 미설정이면 항상 거부)"""
+    return bearer_authorized(os.environ.get('CRON_SECRET'))
+
+@app.route('/api/cron/stats-snapshot')
+def cron_stats_snapshot():
+    """주기적 통계 스냅샷 갱신 (Vercel Cron - Authorization: Bearer CRON_SECRET)"""
+    if not cron_authorized():
+        return jsonify({'error': 'unauthorized'}), 401
     
-    return stats
+    with replica_reads('stats_snapshot'):
+        snapshot = refresh_stats_snapshot(days=30)
+    return jsonify({
+        'success': True,
+        'generated_at': snapshot['snapshot_generated_at'],
+        'compute_ms': snapshot['snapshot_compute_ms']
+    })
+
+# 트래킹 가능한 이벤트 → Analytics에 넘길 필드 (나머지 필드는 버림)
+# 이벤트별 (필드, 기본값, 최대 길이) - 최대 길이가 있으면 문자열로 잘라 저장
+TRACK_EVENT_FIELDS = {
+    'page_view': (('browser', 'Other', None), ('deviceType', 'Desktop', None), ('os', 'Other', None),
+                  ('userId', None, None), ('firstVisit', None, None), ('sessionDuration', 0, None)),
+    'comment_copied': (('comment', '', 50), ('sessionDuration', 0, None)),
+    'blog_visit': (('url', '', 100), ('sessionDuration', 0, None)),
+    'quick_feedback': (('rating', 0, None), ('sessionDuration', 0, None)),
+}
+TRACK_BATCH_MAX_EVENTS = 50
+TRACK_BATCH_MAX_BYTES = 64 * 1024
+
+def parse_track_event(data):
+    """
+    클라이언트 이벤트 1개 검증 + 정규화
+    
+    Args:
+        data: {'event': 'page_view', 'userId': ..., ...}
+    
+    Returns:
+        tuple or None: (action, analytics data) - 알 수 없는 이벤트면 None
+    """
+    if not isinstance(data, dict):
+        return None
+    
+    event_type = data.get('event')
+    if event_type not in TRACK_EVENT_FIELDS:
+        return None
+    
+    event_data = {}
+    for field, default, max_len in TRACK_EVENT_FIELDS[event_type]:
+        value = data.get(field, default)
+        event_data[field] = value if max_len is None else str(value)[:max_len]
+    return event_type, event_data
 
 @app.route('/api/track', methods=['POST'])
 def track_event():
@@ -1421,37 +4079,10 @@ def track_event():
         if not event_type:
             return jsonify({'error': 'event type required'}), 400
         
-        # 이벤트별 로깅
-        if event_type == 'page_view':
-            # 브라우저/디바이스 + userId/firstVisit/sessionDuration 정보 포함
-            device_data = {
-                'browser': data.get('browser', 'Other'),
-                'deviceType': data.get('deviceType', 'Desktop'),
-                'os': data.get('os', 'Other'),
-                'userId': data.get('userId'),
-                'firstVisit': data.get('firstVisit'),
-                'sessionDuration': data.get('sessionDuration', 0)
-            }
-            log(f"📊 page_view 데이터: userId={device_data.get('userId', 'None')[:30] if device_data.get('userId') else 'None'}..., firstVisit={device_data.get('firstVisit', 'None')[:30] if device_data.get('firstVisit') else 'None'}...", "API")
-            log_analytics('page_view', data=device_data, success=True)
-        elif event_type == 'comment_copied':
-            comment_data = {
-                'comment': data.get('comment', '')[:50],
-                'sessionDuration': data.get('sessionDuration', 0)
-            }
-            log_analytics('comment_copied', data=comment_data, success=True)
-        elif event_type == 'blog_visit':
-            visit_data = {
-                'url': data.get('url', '')[:100],
-                'sessionDuration': data.get('sessionDuration', 0)
-            }
-            log_analytics('blog_visit', data=visit_data, success=True)
-        elif event_type == 'quick_feedback':
-            feedback_data = {
-                'rating': data.get('rating', 0),
-                'sessionDuration': data.get('sessionDuration', 0)
-            }
-            log_analytics('quick_feedback', data=feedback_data, success=True)
+        # 이벤트별 로깅 (알 수 없는 이벤트는 무시)
+        parsed = parse_track_event(data)
+        if parsed:
+            log_analytics(parsed[0], data=parsed[1], success=True)
         
         return jsonify({'success': True}), 200
     
@@ -1459,6 +4090,57 @@ def track_event():
         log(f"⚠️ Track event failed: {e}", "ERROR")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/track/batch', methods=['POST'])
+def track_event_batch():
+    """
+    이벤트 일괄 트래킹 API (프론트엔드 큐 flush / navigator.sendBeacon)
+    
+    본문: [{event...}, ...] 또는 {"userId": ..., "firstVisit": ..., "events": [...]}
+    - 최상위 공통 필드는 각 이벤트의 기본값으로 사용
+    - sendBeacon은 text/plain으로 보내므로 Content-Type과 무관하게 JSON 파싱
+    """
+    try:
+        if (request.content_length or 0) > TRACK_BATCH_MAX_BYTES:
+            return jsonify({'error': 'payload_too_large'}), 413
+        
+        # 길이 헤더가 없는 본문(chunked)도 상한 + 1바이트까지만 읽음
+        raw = request.stream.read(TRACK_BATCH_MAX_BYTES + 1)
+        if len(raw) > TRACK_BATCH_MAX_BYTES:
+            return jsonify({'error': 'payload_too_large'}), 413
+        
+        try:
+            body = json.loads(raw.decode('utf-8') or 'null')
+        except ValueError:
+            return jsonify({'error': 'invalid_json'}), 400
+        
+        common = {}
+        if isinstance(body, dict):
+            common = {k: v for k, v in body.items() if k != 'events'}
+            body = body.get('events')
+        if not isinstance(body, list):
+            return jsonify({'error': 'events array required'}), 400
+        if len(body) > TRACK_BATCH_MAX_EVENTS:
+            return jsonify({'error': 'too_many_events', 'max_events': TRACK_BATCH_MAX_EVENTS}), 413
+        
+        events = []
+        for item in body:
+            parsed = parse_track_event({**common, **item} if isinstance(item, dict) else item)
+            if parsed:
+                events.append((parsed[0], parsed[1], True))
+        
+        recorded = log_analytics_batch(events)
+        log(f"📨 /api/track/batch 수신: {len(body)}개 → 유효 {len(events)}개, 기록 {recorded}개", "API")
+        
+        return jsonify({
+            'success': True,
+            'accepted': len(events),
+            'rejected': len(body) - len(events)
+        }), 200
+    
+    except Exception as e:
+        log(f"⚠️ Track batch failed: {e}", "ERROR")
+        return jsonify({'error': str(e)}), 500
+
 # ============================
 # 🔐 관리자 로그인/로그아웃
 # ============================
@@ -1496,6 +4178,261 @@ def admin_logout():
 # 🎁 보너스 시스템 API
 # ============================
 
+# 💳 보너스 지급 장부 - 클레임 1회 = 스크립트 1회 (확인 → 지급 → 기록 → 통계가 한 번에 원자적으로)
+# 동시에 여러 번 눌러도 한도/쿨다운을 넘겨 중복 지급되지 않음
+# 시각은 KST ISO 문자열로 저장 (같은 형식끼리는 문자열 비교 = 시간 비교, 기존 저장값과 호환)
+REFERRAL_BONUS = 5
+REFERRAL_MAX_CLAIMS = 5  # 7일 롤링 한도
+REFERRAL_RESET_DAYS = 7
+SHARE_BONUS = 5
+SHARE_COOLDOWN_DAYS = 7
+BONUS_LEDGER_KEEP = 50  # 사용자별 지급 내역 보관 개수
+BONUS_RECORD_TTL = 30 * 24 * 60 * 60
+# 1이면 아직 보상받지 않은 실제 추천(track 기록)이 있어야 추천 보너스 지급, 0이면 기존의 너그러운 정책
+REFERRAL_VERIFY = os.environ.get('REFERRAL_VERIFY', '1') == '1'
+
+# 👥 추천 인덱스 - 모든 조회가 키 하나 읽기 (SCAN 없음)
+# - referred_by:{신규}          → 추천인 (처음 한 번만 기록, 이후 다른 링크는 무시)
+# - referrals:of:{추천인}        → 정렬 집합 {신규: 추천 시각(ms)} (ZCARD = 누적 추천 수)
+# - referrals:leaderboard       → 정렬 집합 {추천인: 누적 추천 수}
+# - referral:unclaimed:{추천인}  → 아직 보너스로 바꾸지 않은 추천 수
+# 클러스터에서는 스크립트 1회가 한 사용자의 키만 사용 (사용자별 슬롯) → 전체 통계/순위는 스크립트 뒤에 따로 기록
+
+# 단일 Redis/memory/sqlite: 추천 인덱스 + 통계를 스크립트 1회로
+# KEYS: 1 referred_by, 2 referrals:of, 3 leaderboard, 4 unclaimed, 5 총 추천 통계, 6 추천한 유저 집합
+# ARGV: 1 추천인, 2 신규 사용자, 3 지금(ms)
+# 반환: {상태(recorded/duplicate), 추천인의 누적 추천 수}
+REFERRAL_TRACK_LUA = """
+if not redis.call('SET', KEYS[1], ARGV[1], 'NX') then
+    return {'duplicate', redis.call('ZCARD', KEYS[2])}
+end
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+redis.call('ZINCRBY', KEYS[3], 1, ARGV[1])
+redis.call('INCR', KEYS[4])
+redis.call('INCR', KEYS[5])
+redis.call('SADD', KEYS[6], ARGV[1])
+return {'recorded', redis.call('ZCARD', KEYS[2])}
+"""
+
+# 클러스터: referred_by:{신규}를 SET NX(또는 같은 추천인으로 이미 기록됨)로 통과시킨 뒤 추천인 쪽 기록
+# 다시 실행해도 같은 결과 (ZADD NX) → 중간에 실패한 추천은 같은 요청을 재시도하면 이어서 기록
+# KEYS: 1 referrals:of, 2 unclaimed
+# ARGV: 1 신규 사용자, 2 지금(ms)
+# 반환: {이번에 추가됐는지(1/0), 추천인의 누적 추천 수}
+REFERRAL_RECORD_LUA = """
+local added = redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1])
+if added == 1 then
+    redis.call('INCR', KEYS[2])
+end
+return {added, redis.call('ZCARD', KEYS[1])}
+"""
+
+# 클러스터: 추천 전체 통계 ({accounts} 슬롯) - 신규 사용자별 1번만 세므로 다시 실행해도 같은 결과
+# KEYS: 1 leaderboard, 2 추천한 유저 집합, 3 총 추천 통계, 4 추천으로 들어온 유저 집합
+# ARGV: 1 추천인, 2 추천인의 누적 추천 수, 3 신규 사용자
+REFERRAL_STATS_LUA = """
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[1])
+if redis.call('SADD', KEYS[4], ARGV[3]) == 1 then
+    redis.call('INCR', KEYS[3])
+end
+return 1
+"""
+
+# KEYS: 1 리셋 시각, 2 클레임 횟수, 3 보너스 잔액, 4 지급 내역, 5 보상 전 추천 수
+# ARGV: 1 지금, 2 리셋 시각(지금+7일), 3 최대 횟수, 4 보너스, 5 기록 TTL, 6 리셋 키 TTL, 7 내역 항목, 8 내역 보관 수,
+#       9 추천 기록 확인 여부(1/0)
+# 반환: {상태(granted/reset_pending/no_referral), 클레임 횟수, 리셋 시각}
+REFERRAL_CLAIM_LUA = """
+local reset_at = redis.call('GET', KEYS[1])
+local claims = tonumber(redis.call('GET', KEYS[2]) or '0')
+if reset_at then
+    if ARGV[1] < reset_at then
+        return {'reset_pending', claims, reset_at}
+    end
+    redis.call('DEL', KEYS[1], KEYS[2])
+    claims = 0
+elseif claims >= tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[2])
+    claims = 0
+end
+local unclaimed = tonumber(redis.call('GET', KEYS[5]) or '0')
+if ARGV[9] == '1' and unclaimed < 1 then
+    return {'no_referral', claims, ''}
+end
+if unclaimed > 0 then
+    redis.call('DECR', KEYS[5])
+end
+
+claims = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+local next_reset = ''
+if claims >= tonumber(ARGV[3]) then
+    next_reset = ARGV[2]
+    redis.call('SET', KEYS[1], next_reset, 'EX', ARGV[6])
+end
+redis.call('INCRBY', KEYS[3], ARGV[4])
+redis.call('EXPIRE', KEYS[3], ARGV[5])
+redis.call('LPUSH', KEYS[4], ARGV[7])
+redis.call('LTRIM', KEYS[4], 0, tonumber(ARGV[8]) - 1)
+redis.call('EXPIRE', KEYS[4], ARGV[5])
+return {'granted', claims, next_reset}
+"""
+
+# KEYS: 1 마지막 지급 시각, 2 보너스 잔액, 3 지급 내역
+# ARGV: 1 지금, 2 쿨다운 기준 시각(지금-7일), 3 보너스, 4 기록 TTL, 5 내역 항목, 6 내역 보관 수
+# 반환: {상태(granted/cooldown), 마지막 지급 시각}
+SHARE_CLAIM_LUA = """
+local last = redis.call('GET', KEYS[1])
+if last and last > ARGV[2] then
+    return {'cooldown', last}
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+redis.call('INCRBY', KEYS[2], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('LPUSH', KEYS[3], ARGV[5])
+redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[6]) - 1)
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return {'granted', ARGV[1]}
+"""
+
+def _record_bonus_grant(db, bonus_key, ledger_key, amount, entry, keep, ttl):
+    """보너스 잔액 적립 + 지급 내역 기록 (스크립트 fallback 공용)"""
+    db.incrby(bonus_key, amount)
+    db.expire(bonus_key, ttl)
+    db.lpush(ledger_key, entry)
+    db.ltrim(ledger_key, 0, keep - 1)
+    db.expire(ledger_key, ttl)
+
+def _referral_track_fallback(db, keys, args):
+    """REFERRAL_TRACK_LUA와 같은 동작 (memory/sqlite)"""
+    referred_by_key, referrals_key, leaderboard_key, unclaimed_key, total_key, referrers_key = keys
+    referrer_id, new_user_id, now_ms = args
+    if not db.set(referred_by_key, referrer_id, nx=True):
+        return ['duplicate', db.zcard(referrals_key)]
+    db.zadd(referrals_key, {new_user_id: now_ms})
+    db.zincrby(leaderboard_key, 1, referrer_id)
+    db.incr(unclaimed_key)
+    db.incr(total_key)
+    db.sadd(referrers_key, referrer_id)
+    return ['recorded', db.zcard(referrals_key)]
+
+def _referral_record_fallback(db, keys, args):
+    """REFERRAL_RECORD_LUA와 같은 동작 (memory/sqlite)"""
+    referrals_key, unclaimed_key = keys
+    new_user_id, now_ms = args
+    added = db.zadd(referrals_key, {new_user_id: now_ms}, nx=True)
+    if added:
+        db.incr(unclaimed_key)
+    return [added, db.zcard(referrals_key)]
+
+def _referral_stats_fallback(db, keys, args):
+    """REFERRAL_STATS_LUA와 같은 동작 (memory/sqlite)"""
+    leaderboard_key, referrers_key, total_key, referred_key = keys
+    referrer_id, referral_count, new_user_id = args
+    db.zadd(leaderboard_key, {referrer_id: referral_count})
+    db.sadd(referrers_key, referrer_id)
+    if db.sadd(referred_key, new_user_id):
+        db.incr(total_key)
+    return 1
+
+def _referral_claim_fallback(db, keys, args):
+    """REFERRAL_CLAIM_LUA와 같은 동작 (memory/sqlite)"""
+    reset_key, claims_key, bonus_key, ledger_key, unclaimed_key = keys
+    now, next_reset, max_claims, bonus, ttl, reset_ttl, entry, keep, verify = args
+    reset_at = db.get(reset_key)
+    claims = int(db.get(claims_key) or 0)
+    if reset_at:
+        if now < reset_at:
+            return ['reset_pending', claims, reset_at]
+        db.delete(reset_key, claims_key)
+        claims = 0
+    elif claims >= max_claims:
+        db.delete(claims_key)
+        claims = 0
+    unclaimed = int(db.get(unclaimed_key) or 0)
+    if verify == '1' and unclaimed < 1:
+        return ['no_referral', claims, '']
+    if unclaimed > 0:
+        db.decr(unclaimed_key)
+    
+    claims = db.incr(claims_key)
+    db.expire(claims_key, ttl)
+    if claims >= max_claims:
+        db.set(reset_key, next_reset, ex=reset_ttl)
+    else:
+        next_reset = ''
+    _record_bonus_grant(db, bonus_key, ledger_key, bonus, entry, keep, ttl)
+    return ['granted', claims, next_reset]
+
+def _share_claim_fallback(db, keys, args):
+    """SHARE_CLAIM_LUA와 같은 동작 (memory/sqlite)"""
+    last_key, bonus_key, ledger_key = keys
+    now, cutoff, bonus, ttl, entry, keep = args
+    last = db.get(last_key)
+    if last and last > cutoff:
+        return ['cooldown', last]
+    db.set(last_key, now, ex=ttl)
+    _record_bonus_grant(db, bonus_key, ledger_key, bonus, entry, keep, ttl)
+    return ['granted', now]
+
+_bonus_scripts = {}
+
+def run_bonus_script(name, user_id, keys, args):
+    """보너스 스크립트 실행 (처음 호출 시 생성, 키는 account_key로 user_id의 슬롯 - None이면 전체 통계 슬롯)"""
+    if name not in _bonus_scripts:
+        from storage import StorageScript
+        _bonus_scripts[name] = {
+            'referral_track': lambda: StorageScript(REFERRAL_TRACK_LUA, _referral_track_fallback),
+            'referral_record': lambda: StorageScript(REFERRAL_RECORD_LUA, _referral_record_fallback),
+            'referral_stats': lambda: StorageScript(REFERRAL_STATS_LUA, _referral_stats_fallback),
+            'referral': lambda: StorageScript(REFERRAL_CLAIM_LUA, _referral_claim_fallback),
+            'share': lambda: StorageScript(SHARE_CLAIM_LUA, _share_claim_fallback),
+        }[name]()
+    owner = f'u:{user_id}' if user_id else None
+    return _bonus_scripts[name](store, [account_key(key, owner) for key in keys], args)
+
+def record_account_stats(ops):
+    """전체 추천/보너스 통계·순위 기록 (스크립트와 별도 - 실패해도 기록/지급 결과는 그대로)"""
+    try:
+        run_store_ops([(command, account_key(key), *args) for command, key, *args in ops])
+    except Exception as e:
+        log(f"⚠️ 추천/보너스 통계 기록 실패: {e}", "WARNING")
+
+def _bonus_ledger_entry(kind, amount, now):
+    return json.dumps({'type': kind, 'amount': amount, 'at': now.isoformat()}, ensure_ascii=False)
+
+def _time_left(until, now):
+    """남은 시간 → (일, 시간) - 기존 응답 필드(days_left/hours_left) 형식"""
+    remaining = until - now
+    return remaining.days, remaining.seconds // 3600
+
+def track_referral_cluster(referrer_id, new_user_id):
+    """
+    클러스터 추천 기록 (referred_by → 추천인 키 → 전체 통계, 슬롯이 달라 3단계)
+    
+    referred_by가 이미 같은 추천인이면 중간에 실패한 기록으로 보고 나머지 단계를 다시 실행
+    (추천인 키는 ZADD NX, 순위는 누적 추천 수로 덮어쓰기, 총 추천 수는 신규 사용자별 1번 → 몇 번 실행해도 같은 결과)
+    
+    Returns:
+        (recorded, 추천인의 누적 추천 수) - 다른 추천인으로 이미 기록된 사용자면 recorded=False
+    """
+    referred_by_key = account_key(f'referred_by:{new_user_id}', f'u:{new_user_id}')
+    if not store.set(referred_by_key, referrer_id, nx=True) and store.get(referred_by_key) != referrer_id:
+        return False, None
+    added, referral_count = run_bonus_script('referral_record', referrer_id, [
+        f'referrals:of:{referrer_id}',
+        f'referral:unclaimed:{referrer_id}',
+    ], [new_user_id, int(time.time() * 1000)])
+    # 실패하면 요청 실패 → 재시도 때 다시 기록
+    run_bonus_script('referral_stats', None, [
+        'referrals:leaderboard',
+        'analytics:referrers',
+        'analytics:total_referrals',
+        'analytics:referred_users',
+    ], [referrer_id, int(referral_count), new_user_id])
+    return bool(int(added)), referral_count
+
 @app.route('/api/referral/track', methods=['POST'])
 def track_referral():
     """친구 추천 추적"""
@@ -1513,26 +4450,30 @@ def track_referral():
             return jsonify({'success': True})  # 에러 없이 무시
         
         # Redis 연결 확인
-        if not redis_client:
+        if not store:
             log(f"⚠️ Redis 연결 없음 - 추천 기록 불가", "WARNING")
             return jsonify({'success': True})  # 실패해도 사용자에게는 성공 반환
         
-        # Redis에 기록
-        key = f'referral:{referrer_id}:{new_user_id}'
-        redis_client.set(key, json.dumps({
-            'referrer_id': referrer_id,
-            'new_user_id': new_user_id,
-            'timestamp': datetime.now(KST).isoformat(),
-            'bonus_given': False
-        }), ex=30*24*60*60)  # 30일 보관
-        
-        # 📊 Analytics: 추천 통계 기록
-        redis_client.incr('analytics:total_referrals')  # 총 추천 건수
-        redis_client.sadd('analytics:referrers', referrer_id)  # 추천한 유저 집합
-        
-        log(f"📋 친구 추천 기록: {referrer_id} → {new_user_id}", "REFERRAL")
+        # 처음 추천만 기록 (이미 다른 추천으로 들어온 사용자면 무시)
+        if getattr(store, 'cluster', False):
+            recorded, referral_count = track_referral_cluster(referrer_id, new_user_id)
+        else:
+            status, referral_count = run_bonus_script('referral_track', referrer_id, [
+                f'referred_by:{new_user_id}',
+                f'referrals:of:{referrer_id}',
+                'referrals:leaderboard',
+                f'referral:unclaimed:{referrer_id}',
+                'analytics:total_referrals',
+                'analytics:referrers',
+            ], [referrer_id, new_user_id, int(time.time() * 1000)])
+            recorded = status == 'recorded'
+        
+        if not recorded:
+            log(f"ℹ️ 이미 추천 기록이 있는 사용자: {new_user_id}", "REFERRAL")
+        else:
+            log(f"📋 친구 추천 기록: {referrer_id} → {new_user_id} (누적 {referral_count}명)", "REFERRAL")
         
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'recorded': recorded})
     
     except Exception as e:
         log(f"⚠️ 친구 추천 추적 실패: {e}", "ERROR")
@@ -1540,7 +4481,7 @@ def track_referral():
 
 @app.route('/api/referral/claim', methods=['POST'])
 def claim_referral_bonus():
-    """친구 추천 보너스 지급 (7일 롤링 5회 제한)"""
+    """친구 추천 보너스 지급 (7일 롤링 5회 제한, 스크립트 1회로 원자적 처리)"""
     try:
         data = request.get_json()
         user_id = data.get('userId')
@@ -1552,124 +4493,104 @@ def claim_referral_bonus():
             return jsonify({'success': False, 'error': 'missing_user'}), 400
         
         # Redis 연결 확인
-        if not redis_client:
+        if not store:
             log(f"⚠️ Redis 연결 없음 - 보너스 지급 불가", "ERROR")
             return jsonify({'success': False, 'error': 'server_not_ready'}), 500
         
+        # 보상 전 추천(referral:unclaimed)이 있어야 지급 (REFERRAL_VERIFY=0이면 기존처럼 너그럽게 지급)
         now = datetime.now(KST)
-        
-        # 1. 리셋 시점 확인 (5회 소진 후 7일)
-        reset_key = f'referral:reset:{user_id}'
-        reset_time_str = redis_client.get(reset_key)
-        
-        if reset_time_str:
-            reset_time = datetime.fromisoformat(reset_time_str)
-            if now < reset_time:
-                # 아직 리셋 시점이 안 됨 (7일 미경과)
-                days_left = (reset_time - now).days
-                hours_left = ((reset_time - now).seconds // 3600)
-                
-                log(f"⏰ 리셋 대기 중: {user_id} (남은 시간: {days_left}일 {hours_left}시간)", "BONUS")
-                return jsonify({
-                    'success': False,
-                    'error': 'reset_pending',
-                    'reset_time': reset_time.isoformat(),
-                    'days_left': days_left,
-                    'hours_left': hours_left
-                }), 400
-            else:
-                # 리셋 시점 도달 → 초기화
-                log(f"🔄 7일 경과 → 클레임 횟수 초기화: {user_id}", "BONUS")
-                redis_client.delete(reset_key)
-                redis_client.delete(f'referral:claims:{user_id}')
-        
-        # 2. 현재 클레임 횟수 확인
-        claims_key = f'referral:claims:{user_id}'
-        current_claims = int(redis_client.get(claims_key) or 0)
-        
-        log(f"📊 현재 클레임 횟수: {current_claims}/5", "BONUS")
-        
-        # 3. 한도 체크 (5회)
-        if current_claims >= 5:
-            log(f"⚠️ 한도 초과: {user_id} (5/5)", "BONUS")
-            # 리셋 시점을 다시 확인해서 반환
-            reset_time_str = redis_client.get(reset_key)
-            if reset_time_str:
-                reset_time = datetime.fromisoformat(reset_time_str)
-                days_left = (reset_time - now).days
-                hours_left = ((reset_time - now).seconds // 3600)
-                return jsonify({
-                    'success': False,
-                    'error': 'limit_reached',
-                    'current_claims': current_claims,
-                    'max_claims': 5,
-                    'reset_time': reset_time.isoformat(),
-                    'days_left': days_left,
-                    'hours_left': hours_left
-                }), 400
-        
-        # 4. 실제 추천 기록 확인 (너그러운 정책)
-        has_referral = False
-        
-        try:
-            referred_by_key = f'referred_by:{user_id}'
-            referred_by = redis_client.get(referred_by_key)
-            
-            if referred_by:
-                has_referral = True
-                log(f"✅ 추천 기록 확인: {user_id}", "BONUS")
-            else:
-                # 너그러운 정책으로 일단 지급
-                log(f"⚠️ 추천 기록 없음, 하지만 지급: {user_id}", "BONUS")
-                has_referral = True
-        except Exception as e:
-            log(f"⚠️ 추천 기록 확인 중 오류 (무시): {e}", "WARNING")
-            has_referral = True  # 에러 시에도 너그럽게 지급
-        
-        if not has_referral:
+        status, claims, reset_at = run_bonus_script('referral', user_id, [
+            f'referral:reset:{user_id}',
+            f'referral:claims:{user_id}',
+            f'quota:bonus:u:{user_id}',
+            f'bonus:ledger:{user_id}',
+            f'referral:unclaimed:{user_id}',
+        ], [
+            now.isoformat(),
+            (now + timedelta(days=REFERRAL_RESET_DAYS)).isoformat(),
+            REFERRAL_MAX_CLAIMS,
+            REFERRAL_BONUS,
+            BONUS_RECORD_TTL,
+            (REFERRAL_RESET_DAYS + 1) * 24 * 60 * 60,  # 8일 보관 (여유)
+            _bonus_ledger_entry('referral', REFERRAL_BONUS, now),
+            BONUS_LEDGER_KEEP,
+            '1' if REFERRAL_VERIFY else '0',
+        ])
+        claims = int(claims)
+        
+        if status == 'no_referral':
             log(f"❌ 추천 기록 없음: {user_id}", "BONUS")
             return jsonify({
                 'success': False,
                 'error': 'no_referral'
             }), 400
         
-        # 5. 클레임 횟수 증가
-        new_claims = current_claims + 1
-        redis_client.set(claims_key, str(new_claims), ex=30*24*60*60)  # 30일 보관
-        
-        # 📊 Analytics: 보너스 지급 통계 기록
-        redis_client.incr('analytics:total_bonus_claims')  # 총 보너스 지급 횟수
-        
-        # 6. 5회 소진 시 리셋 시점 기록 (현재 시각 + 7일)
-        if new_claims >= 5:
-            reset_time = now + timedelta(days=7)
-            redis_client.set(reset_key, reset_time.isoformat(), ex=8*24*60*60)  # 8일 보관 (여유)
-            log(f"🔒 5회 소진 완료 → 7일 후 초기화: {reset_time.strftime('%Y-%m-%d %H:%M')}", "BONUS")
+        if status == 'reset_pending':
+            reset_time = datetime.fromisoformat(reset_at)
+            days_left, hours_left = _time_left(reset_time, now)
+            log(f"⏰ 리셋 대기 중: {user_id} (남은 시간: {days_left}일 {hours_left}시간)", "BONUS")
+            return jsonify({
+                'success': False,
+                'error': 'reset_pending',
+                'reset_time': reset_time.isoformat(),
+                'days_left': days_left,
+                'hours_left': hours_left
+            }), 400
         
-        log(f"🎁 친구 추천 보너스 지급 성공: {user_id} (+5회) [{new_claims}/5]", "BONUS")
+        record_account_stats([('incr', 'analytics:total_bonus_claims')])
+        if reset_at:
+            log(f"🔒 {REFERRAL_MAX_CLAIMS}회 소진 완료 → 7일 후 초기화: {reset_at[:16]}", "BONUS")
+        log(f"🎁 친구 추천 보너스 지급 성공: {user_id} (+{REFERRAL_BONUS}회) [{claims}/{REFERRAL_MAX_CLAIMS}]", "BONUS")
         
         return jsonify({
             'success': True,
-            'bonus': 5,
-            'current_claims': new_claims,
-            'max_claims': 5,
-            'remaining_claims': 5 - new_claims,
-            'reset_in_7_days': new_claims >= 5
+            'bonus': REFERRAL_BONUS,
+            'current_claims': claims,
+            'max_claims': REFERRAL_MAX_CLAIMS,
+            'remaining_claims': REFERRAL_MAX_CLAIMS - claims,
+            'reset_in_7_days': claims >= REFERRAL_MAX_CLAIMS
         }), 200
     
     except Exception as e:
-        log(f"❌ 친구 추천 보너스 지급 실패: {e}", "ERROR")
-        import traceback
-        log(f"📋 상세 에러: {traceback.format_exc()}", "ERROR")
+        log(f"❌ 친구 추천 보너스 지급 실패: {e}", "ERROR", exc_info=True)
         return jsonify({
             'success': False, 
             'error': 'server_error',
             'message': str(e)
         }), 500
 
+@app.route('/api/referral/status')
+def referral_status():
+    """내 추천 현황 (누적/보상 전 추천 수, 순위, 나를 추천한 사람) - 키 단위 조회만 사용"""
+    user_id = request.args.get('userId')
+    if not user_id:
+        return jsonify({'success': False, 'error': 'missing_user'}), 400
+    if not store:
+        return jsonify({'success': False, 'error': 'server_not_ready'}), 500
+    
+    try:
+        pipe = store.pipeline(transaction=False)
+        owner = f'u:{user_id}'
+        pipe.zcard(account_key(f'referrals:of:{user_id}', owner))
+        pipe.get(account_key(f'referral:unclaimed:{user_id}', owner))
+        pipe.zrevrank(account_key('referrals:leaderboard'), user_id)
+        pipe.get(account_key(f'referred_by:{user_id}', owner))
+        total, unclaimed, rank, referred_by = pipe.execute()
+    except Exception as e:
+        log(f"⚠️ 추천 현황 조회 실패: {e}", "ERROR")
+        return jsonify({'success': False, 'error': 'server_error'}), 500
+    
+    return jsonify({
+        'success': True,
+        'total_referrals': total,
+        'unclaimed_referrals': int(unclaimed or 0),
+        'rank': rank + 1 if rank is not None else None,
+        'referred_by': referred_by,
+    })
+
 @app.route('/api/share/claim', methods=['POST'])
 def claim_share_bonus():
-    """SNS 공유 보너스 지급"""
+    """SNS 공유 보너스 지급 (7일 쿨다운, 스크립트 1회로 원자적 처리)"""
     try:
         data = request.get_json()
         user_id = data.get('userId')
@@ -1681,41 +4602,44 @@ def claim_share_bonus():
             return jsonify({'success': False, 'error': 'missing_user'}), 400
         
         # Redis 연결 확인
-        if not redis_client:
+        if not store:
             log(f"⚠️ Redis 연결 없음 - 보너스 지급 불가", "ERROR")
             return jsonify({'success': False, 'error': 'server_not_ready'}), 500
         
-        # 쿨다운 체크 (7일)
-        last_claim_key = f'share_claim:{user_id}'
-        last_claim = redis_client.get(last_claim_key)
-        
-        if last_claim:
-            last_claim_time = datetime.fromisoformat(last_claim)  # decode 제거 (이미 문자열)
-            days_diff = (datetime.now(KST) - last_claim_time).days
-            
-            if days_diff < 7:
-                log(f"⏰ 쿨다운: {user_id} (남은 일수: {7 - days_diff}일)", "BONUS")
-                return jsonify({
-                    'success': False,
-                    'error': 'cooldown',
-                    'days_left': 7 - days_diff
-                }), 400
-        
-        # 보너스 지급 기록
-        redis_client.set(last_claim_key, datetime.now(KST).isoformat(), ex=30*24*60*60)
+        now = datetime.now(KST)
+        status, last_claim = run_bonus_script('share', user_id, [
+            f'share_claim:{user_id}',
+            f'quota:bonus:u:{user_id}',
+            f'bonus:ledger:{user_id}',
+        ], [
+            now.isoformat(),
+            (now - timedelta(days=SHARE_COOLDOWN_DAYS)).isoformat(),
+            SHARE_BONUS,
+            BONUS_RECORD_TTL,
+            _bonus_ledger_entry('share', SHARE_BONUS, now),
+            BONUS_LEDGER_KEEP,
+        ])
+        
+        if status == 'cooldown':
+            days_diff = (now - datetime.fromisoformat(last_claim)).days
+            log(f"⏰ 쿨다운: {user_id} (남은 일수: {SHARE_COOLDOWN_DAYS - days_diff}일)", "BONUS")
+            return jsonify({
+                'success': False,
+                'error': 'cooldown',
+                'days_left': SHARE_COOLDOWN_DAYS - days_diff
+            }), 400
         
-        log(f"🎁 SNS 공유 보너스 지급 성공: {user_id} (+5회)", "BONUS")
+        record_account_stats([('incr', 'analytics:total_share_claims')])
+        log(f"🎁 SNS 공유 보너스 지급 성공: {user_id} (+{SHARE_BONUS}회)", "BONUS")
         
         return jsonify({
             'success': True,
-            'bonus': 5,
+            'bonus': SHARE_BONUS,
             'expiryDays': 30
         }), 200
     
     except Exception as e:
-        log(f"❌ SNS 공유 보너스 지급 실패: {e}", "ERROR")
-        import traceback
-        log(f"📋 상세 에러: {traceback.format_exc()}", "ERROR")
+        log(f"❌ SNS 공유 보너스 지급 실패: {e}", "ERROR", exc_info=True)
         return jsonify({
             'success': False,
             'error': 'server_error',
@@ -1729,17 +4653,193 @@ def claim_share_bonus():
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    """📊 Analytics 대시보드 (로그인 필수)"""
+    """📊 Analytics 대시보드 (로그인 필수) - 셸만 즉시 렌더링, 패널은 브라우저가 병렬 조회"""
     try:
-        # 통계 계산
-        stats = get_analytics_stats(days=30)  # 최근 30일
-        
-        return render_template('analytics.html', stats=stats)
+        return render_template('analytics.html', panels=STATS_PANELS, days=30)
     
     except Exception as e:
         log(f"⚠️ 대시보드 로드 실패: {e}", "ERROR")
         return f"오류: {str(e)}", 500
 
+@app.route('/api/admin/live')
+@login_required
+def admin_live_stream():
+    """
+    ⚡ 실시간 카운터 SSE 스트림
+    
+    접속 시 저장소의 최근 60초 버킷을 읽고, 이후 Pub/Sub 증가분을 더해 최대 LIVE_MIN_INTERVAL마다 1회 전송
+    (재연결해도 창이 비지 않음 - 구독 직후와 버킷 조회 사이 몇 ms의 이벤트는 중복 집계될 수 있음)
+    """
+    if not store:
+        return jsonify({'error': 'kv_disabled'}), 503
+    
+    def stream():
+        pubsub = store.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(LIVE_CHANNEL)
+        started = last_sent = last_heartbeat = time.monotonic()
+        dirty = True  # 접속 직후 1회 전송
+        
+        try:
+            yield 'retry: 3000\n\n'
+            try:
+                buckets = read_live_window(int(time.time()))
+            except Exception as e:
+                log(f"⚠️ 실시간 카운터 조회 실패: {e}", "WARNING")
+                buckets = {}
+            while time.monotonic() - started < LIVE_STREAM_MAX_SECONDS:
+                message = pubsub.get_message(timeout=LIVE_MIN_INTERVAL)
+                now = time.monotonic()
+                
+                if message and message.get('type') == 'message':
+                    try:
+                        delta = json.loads(message['data'])
+                        second = int(delta.pop('t'))
+                        buckets.setdefault(second, Counter()).update(
+                            {field: int(amount) for field, amount in delta.items()})
+                        dirty = True
+                    except (TypeError, ValueError, KeyError, AttributeError):
+                        pass
+                
+                oldest = int(time.time()) - LIVE_WINDOW_SECONDS
+                for second in [second for second in buckets if second <= oldest]:
+                    del buckets[second]
+                    dirty = True
+                
+                if dirty and now - last_sent >= LIVE_MIN_INTERVAL:
+                    yield f"event: counters\ndata: {json.dumps(summarize_live_window(buckets))}\n\n"
+                    last_sent = last_heartbeat = now
+                    dirty = False
+                elif now - last_heartbeat >= LIVE_HEARTBEAT_SECONDS:
+                    yield ': ping\n\n'
+                    last_heartbeat = now
+        finally:
+            pubsub.close()
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 프록시 버퍼링 방지
+    })
+
+@app.route('/api/admin/storage')
+@login_required
+def admin_storage_status():
+    """🔌 저장소 연결 상태 지표 (Redis: 상태 전환 횟수, 재연결 시도/실패, 누적 다운 시간)"""
+    bool(store)  # 재시도 시각이 지났으면 여기서 재연결 시도
+    return jsonify(store.connection_stats())
+
+@app.route('/api/admin/cache/invalidate', methods=['POST'])
+@login_required
+def admin_invalidate_cache():
+    """🧹 분석 캐시 전체 무효화 (세대 INCR 1번 - 이전 키는 그대로 두고 TTL로 만료)"""
+    if not store:
+        return jsonify({'error': 'storage_unavailable'}), 503
+    previous = cache_namespace()
+    try:
+        namespace = invalidate_cache()
+    except Exception as e:
+        log(f"⚠️ 캐시 무효화 실패: {e}", "ERROR")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'previous': previous, 'namespace': namespace,
+                    'propagation_seconds': CACHE_GENERATION_REFRESH})
+
+@app.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    """🔬 저장된 요청 프로파일 목록"""
+    profiles = []
+    if store:
+        try:
+            ids = store.lrange('profiles:index', 0, PROFILE_KEEP - 1)
+            if ids:
+                metas = store.mget([f'profile:{profile_id}:meta' for profile_id in ids])
+                profiles = [json.loads(meta) for meta in metas if meta]
+        except Exception as e:
+            log(f"⚠️ 프로파일 목록 조회 실패: {e}", "ERROR")
+    return render_template('profiles.html', profiles=profiles, sample_rate=PROFILE_SAMPLE_RATE,
+                           sample_routes=PROFILE_SAMPLE_ROUTES, sample_interval=PROFILE_SAMPLE_INTERVAL,
+                           kv_enabled=bool(store))
+
+@app.route('/admin/profiles/<profile_id>.<fmt>')
+@login_required
+def admin_profile_download(profile_id, fmt):
+    """🔬 프로파일 다운로드 (txt / collapsed / pstats)"""
+    if fmt not in PROFILE_FORMATS or not store:
+        return jsonify({'error': 'not_found'}), 404
+    data = store.get(f'profile:{profile_id}:{fmt}')
+    if data is None:
+        return jsonify({'error': 'not_found'}), 404
+    if fmt == 'pstats':
+        import base64
+        data = base64.b64decode(data)
+    return Response(data, content_type=PROFILE_FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{profile_id}.{fmt}"'
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    📈 Prometheus 텍스트 포맷 메트릭 (PROMETHEUS_MULTIPROC_DIR 설정 시 전체 워커 합산)
+    
+    Authorization: Bearer METRICS_TOKEN 필요 (미설정이면 항상 거부 - 라우트/오류/Redis 내부 상태 노출 방지)
+    """
+    metrics = get_metrics()
+    if not metrics:
+        return jsonify({'error': 'metrics_disabled'}), 404
+    if not bearer_authorized(METRICS_TOKEN):
+        return jsonify({'error': 'unauthorized'}), 401
+    
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+    
+    metrics.storage_up.set(1 if store else 0)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+@app.route('/api/admin/stats/<panel>')
+@login_required
+def admin_stats_panel(panel):
+    """
+    📊 대시보드 패널 JSON (패널별 스냅샷 + ETag/Last-Modified 조건부 요청)
+    
+    변경 없는 패널은 304 (본문 없음)로 응답
+    """
+    if panel not in STATS_PANELS:
+        return jsonify({'error': 'unknown_panel', 'panels': list(STATS_PANELS)}), 404
+    
+    days = min(max(request.args.get('days', 30, type=int), 1), 90)
+    
+    try:
+        with replica_reads('dashboard'):
+            snapshot = get_stats_snapshot(days, panel=panel, force=request.args.get('refresh') == '1')
+    except Exception as e:
+        log(f"⚠️ 패널 조회 실패 ({panel}): {e}", "ERROR")
+        return jsonify({'error': str(e)}), 500
+    
+    data = {k: v for k, v in snapshot.items() if not k.startswith('snapshot_')}
+    generated_at = snapshot.get('snapshot_generated_at')
+    body = json.dumps({
+        'panel': panel,
+        'days': days,
+        'generated_at': generated_at,
+        'compute_ms': snapshot.get('snapshot_compute_ms'),
+        'data': data
+    }, ensure_ascii=False, sort_keys=True)
+    
+    # ETag는 패널 데이터만으로 (스냅샷을 다시 계산해도 값이 같으면 304) - 생성 시각은 헤더로
+    fingerprint = json.dumps([panel, days, data], ensure_ascii=False, sort_keys=True)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+    if generated_at:
+        response.last_modified = datetime.fromisoformat(generated_at)
+        response.headers['X-Snapshot-Generated-At'] = generated_at
+    response.cache_control.private = True
+    response.cache_control.no_cache = True  # 매번 재검증 (304)
+    return response.make_conditional(request)
+
 if __name__ == '__main__':
     # 로컬 개발용
     app.run(debug=True, port=5001)
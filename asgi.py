@@ -0,0 +1,406 @@
+"""
+⚡ ASGI 진입점 - /api/analyze를 이벤트 루프에서 비동기로 처리
+
+    uvicorn asgi:application --workers 2
+    GUNICORN_WORKER_CLASS=uvicorn gunicorn -c gunicorn.conf.py asgi:application
+
+동기 경로(gunicorn app:app, Vercel)는 분석 1건이 네이버/OpenAI 응답을 기다리는 동안 스레드 하나를 점유
+→ 여기서는 대기 중인 분석이 코루틴 하나뿐이라 워커 하나가 수백 건을 동시에 기다려도 메모리가 거의 늘지 않음
+- 스크래핑: httpx.AsyncClient / AI: AsyncOpenAI (요청 인자는 app.ai_completion_request 그대로)
+- 캐시/한도: redis.asyncio (memory는 바로 호출, sqlite는 스레드 풀)
+- CPU 작업(bs4 파싱), Analytics 기록, 댓글 보충(실시간 이벤트 발행), after_request 훅은 스레드 풀에서 → 루프를 막지 않음
+- 검증/한도 초과 응답/응답 형식/before·after_request 훅은 Flask 앱과 같은 함수 사용
+- 나머지 라우트는 기존 Flask 앱을 스레드 풀에서 그대로 실행 (a2wsgi, SSE 스트리밍 포함)
+
+ASYNC_ANALYZE=0이면 /api/analyze도 기존 동기 뷰로 처리 (배포 설정만으로 되돌리기)
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask import g, request, session
+
+import app as repost
+from app import log, metric_inc, metric_observe, timed
+
+ASYNC_ANALYZE = os.environ.get('ASYNC_ANALYZE', '1') == '1'
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', '16'))  # 동기 라우트 + 파싱/Analytics 기록용 스레드 수
+
+flask_app = repost.app
+wsgi_application = WSGIMiddleware(flask_app, workers=ASGI_THREADS)
+
+# ============================
+# 🔌 비동기 클라이언트 (이벤트 루프당 하나)
+# ============================
+# 루프에 묶인 커넥션 풀이므로 루프가 바뀌면 (워커 포크, 테스트의 asyncio.run) 새로 만듦
+
+_clients = {'loop': None, 'http': None, 'openai': None}
+
+def _loop_clients():
+    loop = asyncio.get_running_loop()
+    if _clients['loop'] is not loop:
+        _clients.update(loop=loop, http=None, openai=None)
+    return _clients
+
+def http_client():
+    """스크래핑용 httpx 클라이언트 (requests 세션과 같은 정책 - keep-alive 재사용, 쿠키 저장 안 함)"""
+    clients = _loop_clients()
+    if clients['http'] is None:
+        import httpx
+        from http.cookiejar import DefaultCookiePolicy
+
+        instance = httpx.AsyncClient(
+            timeout=repost.SCRAPE_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=repost.HTTP_POOL_SIZE),
+        )
+        instance.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        clients['http'] = instance
+    return clients['http']
+
+def openai_client():
+    """🤖 AsyncOpenAI 클라이언트 - API 키가 없거나 실패하면 None (기본 템플릿 사용)"""
+    clients = _loop_clients()
+    if clients['openai'] is None:
+        clients['openai'] = False
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if api_key:
+            try:
+                from openai import AsyncOpenAI
+                clients['openai'] = AsyncOpenAI(api_key=api_key)
+            except Exception as e:
+                log(f"❌ AsyncOpenAI 클라이언트 초기화 실패: {e}", "ERROR")
+    return clients['openai'] or None
+
+async def close_clients():
+    for name in ('http', 'openai'):
+        instance = _clients.get(name)
+        if instance:
+            await instance.close()
+        _clients[name] = None
+
+# ============================
+# 💽 저장소 (redis.asyncio / memory / sqlite)
+# ============================
+
+def _async_redis():
+    store = repost.store
+    return store if isinstance(store, repost.ManagedRedis) else None
+
+async def store_available():
+    """bool(store)의 비동기 버전 - Redis 최초 연결/재연결 확인(ping)만 스레드에서"""
+    managed = _async_redis()
+    if managed is None:
+        return bool(repost.store)
+    if managed.state in ('up', 'disabled'):
+        return managed.state == 'up'
+    return await asyncio.to_thread(bool, managed)
+
+async def store_call(command, *args, endpoint=None):
+    """저장소 명령 1개 (endpoint: app.replica_reads와 같이 지연 허용 읽기를 복제본으로)"""
+    managed = _async_redis()
+    if managed is None:
+        method = getattr(repost.store, command)
+        if repost.store.backend == 'sqlite':
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+    if endpoint is not None and managed.reads is not None and command in repost.REPLICA_READ_COMMANDS:
+        return await _routed_read(managed, endpoint, command, args)
+    return await _redis_call(managed, command, args)
+
+async def _redis_call(managed, command, args):
+    started = time.perf_counter()
+    try:
+        return await getattr(managed.async_client(), command)(*args)
+    except Exception as e:
+        managed.report_error(e)
+        raise
+    finally:
+        metric_observe('redis_latency', time.perf_counter() - started, command)
+
+async def _routed_read(managed, endpoint, command, args):
+    """app.ReadRouter.read의 비동기 버전 (복제 지연 확인만 스레드에서)"""
+    router = managed.reads
+    if router.refresh_due():
+        await asyncio.to_thread(router.refresh)
+    replica = router.pick()
+    if replica is not None:
+        started = time.perf_counter()
+        try:
+            result = await _redis_call(replica, command, args)
+        except Exception as e:
+            router.replica_failed(replica, e)
+        else:
+            router.record(endpoint, replica.name, time.perf_counter() - started)
+            return result
+
+    started = time.perf_counter()
+    result = await _redis_call(managed, command, args)
+    router.record(endpoint, 'primary', time.perf_counter() - started)
+    return result
+
+async def store_script(script, keys, args):
+    """StorageScript 실행 (Redis는 EVALSHA, memory/sqlite는 트랜잭션 안의 파이썬 구현)"""
+    managed = _async_redis()
+    if managed is None:
+        if repost.store.backend == 'sqlite':
+            return await asyncio.to_thread(script, repost.store, keys, args)
+        return script(repost.store, keys, args)
+
+    started = time.perf_counter()
+    try:
+        return await script.run_async(managed.async_client(), keys, args)
+    except Exception as e:
+        managed.report_error(e)
+        raise
+    finally:
+        metric_observe('redis_latency', time.perf_counter() - started, 'evalsha')
+
+# ============================
+# 🔍 분석 파이프라인 (app.py 동기 함수의 비동기 버전)
+# ============================
+
+async def check_usage_quota(user_id, ip):
+    """app.check_usage_quota와 같은 결과 (None이면 한도 검사 없이 통과)"""
+    if not repost.QUOTA_ENABLED or not await store_available():
+        return None
+    (script, first_keys, args), ip_call = repost.quota_script_calls(user_id, ip)
+    keys = first_keys + (ip_call[1] if ip_call else [])
+    try:
+        user_raw = await store_script(script, first_keys, args)
+        if not int(user_raw[0]) or not ip_call:
+            return repost.quota_result(user_raw, None, keys)
+        ip_raw = await store_script(*ip_call)
+        if not int(ip_raw[0]):
+            await store_script(*repost.quota_release_call(user_raw, keys))
+        return repost.quota_result(user_raw, ip_raw, keys)
+    except Exception as e:
+        log(f"⚠️ 사용량 한도 확인 실패 (통과 처리): {e}", "WARNING")
+        return None
+
+async def cache_namespace():
+    """app.cache_namespace의 비동기 버전 (세대 확인 주기가 됐을 때만 저장소 조회)"""
+    if repost.cache_generation_due():
+        try:
+            repost.set_cache_generation(await store_call('get', repost.CACHE_GENERATION_KEY, endpoint='cache'))
+        except Exception as e:
+            repost.cache_generation_failed(e)
+    return repost.current_cache_namespace()
+
+async def run_store_ops(ops):
+    """통계 명령 목록 동시 실행"""
+    await asyncio.gather(*(store_call(command, *args) for command, *args in ops))
+
+async def get_cached_comments(url):
+    with timed('cache_lookup'):
+        if not await store_available():
+            return None
+        try:
+            namespace = await cache_namespace()
+            normalized_url, cache_key = repost.cache_lookup_key(url, namespace)
+            cached_data = await store_call('get', cache_key, endpoint='cache')
+            await run_store_ops(repost.record_cache_outcome(normalized_url, bool(cached_data), namespace))
+            return json.loads(cached_data) if cached_data else None
+        except Exception as e:
+            log(f"⚠️ 캐시 조회 실패: {e}", "WARNING")
+            metric_inc('cache', getattr(repost.store, 'backend', 'redis'), 'error')
+            return None
+
+async def set_cached_comments(url, blog_data, comments, ttl=repost.ANALYSIS_CACHE_TTL):
+    with timed('cache_store'):
+        if not await store_available():
+            return False
+        try:
+            namespace = await cache_namespace()
+            normalized_url, cache_key = repost.cache_lookup_key(url, namespace)
+            await store_call('setex', cache_key, ttl, repost.cache_payload(blog_data, comments))
+            log(f"💾 캐시 저장 완료: {normalized_url[:50]}... (TTL: {ttl}초)", "CACHE", namespace=namespace)
+            await run_store_ops(repost.record_cache_store(namespace))
+            return True
+        except Exception as e:
+            log(f"⚠️ 캐시 저장 실패: {e}", "WARNING")
+            return False
+
+async def scrape_blog_content(url):
+    """네이버 블로그 내용 스크래핑 (HTML 파싱은 스레드 풀에서)"""
+    try:
+        fetch_url = repost.scrape_fetch_url(url)
+        with timed('scrape_fetch'):
+            response = await http_client().get(fetch_url, headers=repost.SCRAPE_HEADERS)
+
+        response.raise_for_status()
+        return await asyncio.to_thread(repost.parse_blog_html, response.text, url)
+
+    except Exception as e:
+        return repost.scrape_error_result(url, e)
+
+async def generate_comments_with_ai(ai, title, content, is_admin=False):
+    log("🤖 AI 댓글 생성 시작", "AI")
+
+    try:
+        if ai is None:
+            log("❌ OpenAI 클라이언트가 초기화되지 않음 → 템플릿 사용", "WARNING")
+            return None
+
+        request_kwargs = repost.ai_completion_request(title, content, is_admin)
+        if request_kwargs is None:
+            return None
+
+        with timed('ai_call'):
+            response = await ai.chat.completions.create(**request_kwargs)
+
+        return repost.parse_ai_comments(response)
+
+    except Exception as e:
+        log(f"❌ AI 댓글 생성 중 예외 발생 → 템플릿 댓글로 대체: {e}", "ERROR",
+            exc_info=True, error_type=type(e).__name__)
+        return None
+
+async def generate_comments(blog_data, is_admin=False):
+    title = blog_data['title']
+    content = blog_data['content']
+
+    log("📋 댓글 생성 프로세스 시작", "COMMENT", title=title[:50], is_admin=is_admin)
+
+    ai = openai_client()
+    ai_comments = await generate_comments_with_ai(ai, title, content, is_admin)
+    # AI 실패 시 실시간 이벤트 발행(저장소 왕복)이 있으므로 이벤트 루프 밖에서
+    return await asyncio.to_thread(repost.complete_comments, ai_comments, title, content, ai_enabled=ai is not None)
+
+async def analyze_blog():
+    """app.analyze_blog의 비동기 버전 (요청 컨텍스트 안에서 실행)"""
+    blog_url = None
+    try:
+        params, error_response = repost.prepare_analyze(request.json)
+        if error_response:
+            return error_response
+        blog_url, force_refresh, is_admin = params['url'], params['force_refresh'], params['is_admin']
+
+        log("🚀 새로운 블로그 분석 요청 시작", "API", url=blog_url, force_refresh=force_refresh,
+            is_admin=is_admin, mode='async')
+
+        # 💾 1단계: 캐시 조회
+        if not force_refresh:
+            cached_result = await get_cached_comments(blog_url)
+            if cached_result:
+                log("⚡ 캐시된 데이터 반환 (즉시 응답!)", "CACHE")
+                await asyncio.to_thread(repost.log_analyze_success, blog_url, cached_result['blog'],
+                                        cached_result['comments'], True)
+                return repost.analyze_response({
+                    'blog': cached_result['blog'],
+                    'comments': cached_result['comments'],
+                    'from_cache': True,
+                    'cached_at': cached_result.get('cached_at')
+                }, params['fields'])
+
+        # 🚦 사용량 한도 (캐시 히트는 차감 없음 - 스크래핑/AI 전에 차감, 관리자 세션은 제외)
+        if 'admin_logged_in' not in session:
+            quota = g.quota = await check_usage_quota(params['user_id'], repost.get_client_ip())
+            denied = repost.quota_denied_response(quota, params['user_id'])
+            if denied:
+                return denied
+
+        # 💾 2단계: 캐시 미스 → 스크래핑 + 댓글 생성
+        log("📡 블로그 스크래핑 시작...", "SCRAPE")
+        blog_data = await scrape_blog_content(blog_url)
+        log(f"✅ 스크래핑 완료: {blog_data['title'][:50]}...", "SCRAPE")
+
+        comments = await generate_comments(blog_data, is_admin)
+
+        # 💾 3단계: 캐시에 저장 (24시간)
+        cache_saved = await set_cached_comments(blog_url, blog_data, comments, ttl=repost.ANALYSIS_CACHE_TTL)
+
+        log(f"🎉 전체 분석 완료! 댓글 {len(comments)}개 생성", "API", cache_saved=cache_saved)
+        await asyncio.to_thread(repost.log_analyze_success, blog_url, blog_data, comments, False)
+
+        return repost.analyze_response({
+            'blog': blog_data,
+            'comments': comments,
+            'from_cache': False
+        }, params['fields'])
+
+    except Exception as e:
+        return await asyncio.to_thread(repost.analyze_failed_response, blog_url, e)
+
+# ============================
+# 🌐 ASGI 애플리케이션
+# ============================
+
+async def _read_body(receive):
+    body = BytesIO()
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            return None  # 응답 전에 연결 끊김
+        body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    body.seek(0)
+    return body
+
+async def handle_analyze(scope, receive, send):
+    """
+    POST /api/analyze: Flask 요청 컨텍스트를 직접 열고 비동기 뷰 실행
+
+    Flask 3의 요청 컨텍스트는 contextvars 기반 → 같은 태스크 안에서 await를 넘어도 유지되고
+    태스크끼리는 섞이지 않음. before/after_request 훅도 동기 경로와 똑같이 실행.
+    """
+    body = await _read_body(receive)
+    if body is None:
+        return
+
+    ctx = flask_app.request_context(repost.apply_proxy_fix(build_environ(scope, body)))
+    error = None
+    try:
+        ctx.push()
+        try:
+            rv = flask_app.preprocess_request()
+            if rv is None:
+                with timed('analyze'):
+                    rv = await analyze_blog()
+        except Exception as e:
+            rv = flask_app.handle_user_exception(e)
+        # after_request 훅(구간 시간 flush, 프로파일 저장 등)은 동기 저장소 호출 → 스레드에서
+        # (to_thread는 contextvars를 복사 → 같은 요청 컨텍스트)
+        response = await asyncio.to_thread(flask_app.finalize_request, rv)
+    except Exception as e:
+        error = e
+        response = flask_app.handle_exception(e)
+
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                        for name, value in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+    finally:
+        response.close()
+        ctx.pop(error)
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # asyncio.to_thread 기본 스레드 수(CPU+4)는 1코어 인스턴스에서 5개뿐
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(ASGI_THREADS))
+            log("⚡ ASGI 워커 시작", "INIT", async_analyze=ASYNC_ANALYZE, threads=ASGI_THREADS, pid=os.getpid())
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_clients()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if ASYNC_ANALYZE and scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/api/analyze':
+        return await handle_analyze(scope, receive, send)
+    await wsgi_application(scope, receive, send)
@@ -0,0 +1,165 @@
+"""
+💳 보너스 클레임 동시성 검사
+
+같은 userId로 친구 추천/SNS 공유 보너스를 동시에 수십 번 요청해 한도 이상 지급되지 않는지 확인.
+(추천: 7일 5회, 공유: 7일 1회) 중복 지급이 있으면 종료 코드 1.
+추천 보상은 기록된 추천이 있어야 지급되므로 먼저 추천 10건을 기록하고 시작하며,
+같은 신규 유저를 여러 추천인이 동시에 추적해도 추천이 1건만 기록되는지도 함께 검사.
+
+    python bench/bonus_concurrency.py                                  # memory, 스레드 32개
+    python bench/bonus_concurrency.py --storage sqlite --processes 4   # 워커 프로세스 4개가 같은 파일 공유
+    python bench/bonus_concurrency.py --storage redis --processes 4    # KV_REDIS_URL / REDIS_URL
+
+결과에는 클레임 1회 응답 시간(p50/p95)도 함께 표시.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CLAIMS = {
+    'referral': ('/api/referral/claim', 5),  # (경로, 허용 지급 횟수)
+    'share': ('/api/share/claim', 1),
+}
+
+
+SEEDED_REFERRALS = 10
+
+
+def seed_referrals(user_id):
+    """보상 대상이 될 추천을 미리 기록 (REFERRAL_VERIFY=1이면 추천 없이는 지급되지 않음)"""
+    import app
+
+    client = app.app.test_client()
+    for i in range(SEEDED_REFERRALS):
+        response = client.post('/api/referral/track', json={'referrerId': user_id, 'newUserId': f'{user_id}_friend{i}'})
+        if not (response.get_json() or {}).get('recorded'):
+            raise SystemExit("❌ 추천 기록 실패")
+
+
+def fire_claims(user_id, threads, start_at):
+    """스레드마다 추천/공유 클레임과 같은 신규 유저 추천 추적을 한 번씩, 시작 시각에 맞춰 동시에 요청"""
+    import app
+
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        client = app.app.test_client()
+        time.sleep(max(0.0, start_at - time.time()))
+        for kind, (path, _) in CLAIMS.items():
+            started = time.perf_counter()
+            response = client.post(path, json={'userId': user_id})
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            body = response.get_json() or {}
+            with lock:
+                results.append({'kind': kind, 'status': response.status_code,
+                                'granted': bool(body.get('success')), 'error': body.get('error'),
+                                'ms': elapsed_ms})
+
+        # 서로 다른 추천인이 같은 신규 유저를 동시에 추적 → 1건만 기록되어야 함
+        response = client.post('/api/referral/track',
+                               json={'referrerId': f'racer_{uuid.uuid4().hex[:8]}', 'newUserId': f'{user_id}_contested'})
+        with lock:
+            results.append({'kind': 'track', 'status': response.status_code,
+                            'granted': bool((response.get_json() or {}).get('recorded')), 'error': None, 'ms': 0})
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+
+def granted_referrals(results):
+    return sum(row['granted'] for row in results if row['kind'] == 'referral')
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='보너스 클레임 동시성 검사')
+    parser.add_argument('--storage', choices=('memory', 'sqlite', 'redis'), default='memory')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=32, help='프로세스당 동시 요청 수')
+    parser.add_argument('--worker', metavar='USER_ID', help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(fire_claims(args.worker, args.threads, args.start_at)))
+        return
+
+    if args.storage == 'memory' and args.processes > 1:
+        raise SystemExit("❌ memory 저장소는 프로세스 간 공유되지 않음 → --storage sqlite 또는 redis")
+
+    os.environ['STORAGE_BACKEND'] = args.storage
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    if args.storage == 'sqlite':
+        os.environ['STORAGE_SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='repost-bonus-'), 'bonus.sqlite3')
+
+    user_id = f'bench_{uuid.uuid4().hex[:8]}'
+    seed_referrals(user_id)
+    start_at = time.time() + 1.5  # 워커 프로세스 임포트 시간 여유
+
+    if args.processes == 1:
+        results = fire_claims(user_id, args.threads, start_at)
+    else:
+        workers = [subprocess.Popen(
+            [sys.executable, __file__, '--worker', user_id, '--threads', str(args.threads),
+             '--start-at', str(start_at)],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True) for _ in range(args.processes)]
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode != 0:
+                raise SystemExit("❌ 워커 실패")
+            results.extend(json.loads(output.strip().splitlines()[-1]))
+
+    import app
+    balance = int(app.store.get(f'quota:bonus:u:{user_id}') or 0)
+    ledger = app.store.lrange(f'bonus:ledger:{user_id}', 0, -1)
+
+    total = args.processes * args.threads
+    print(f"💳 보너스 클레임 동시성 ({args.storage}, 프로세스 {args.processes} × 스레드 {args.threads} = {total}회씩)")
+    failed = False
+    expected_balance = 0
+    for kind, (_, allowed) in CLAIMS.items():
+        rows = [row for row in results if row['kind'] == kind]
+        granted = sum(row['granted'] for row in rows)
+        errors = sorted({row['error'] for row in rows if row['error']})
+        latencies = [row['ms'] for row in rows]
+        ok = granted == min(allowed, len(rows))
+        failed |= not ok
+        expected_balance += granted * 5
+        print(f"  {'✅' if ok else '❌'} {kind:<9} 지급 {granted}/{allowed}회  거절 사유 {errors}  "
+              f"p50 {statistics.median(latencies):6.1f}ms  p95 {percentile(latencies, 0.95):6.1f}ms")
+
+    ok = balance == expected_balance and len(ledger) == expected_balance // 5
+    failed |= not ok
+    print(f"  {'✅' if ok else '❌'} 보너스 잔액 {balance}회, 지급 내역 {len(ledger)}건")
+
+    recorded = sum(row['granted'] for row in results if row['kind'] == 'track')
+    unclaimed = int(app.store.get(f'referral:unclaimed:{user_id}') or 0)
+    ok = recorded == 1 and unclaimed == SEEDED_REFERRALS - granted_referrals(results)
+    failed |= not ok
+    print(f"  {'✅' if ok else '❌'} 같은 신규 유저 동시 추적 {recorded}건 기록, 보상 대기 추천 {unclaimed}건")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
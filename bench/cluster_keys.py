@@ -0,0 +1,270 @@
+"""
+🧩 Redis Cluster 키 배치 검사
+
+앱의 주요 경로(사용량 한도, 이벤트 기록, 캐시 조회/저장, 대시보드 패널 전체, 추천/공유 보너스, 프로파일 목록)를
+REDIS_CLUSTER 모드 키 이름으로 실행하면서 다중 키 명령(스크립트, SUNIONSTORE, MGET, 다중 DEL/EXISTS)의 키를 기록해
+모든 키가 같은 슬롯인지 검사 (클러스터에서는 슬롯이 다르면 CROSSSLOT 오류). 하나라도 어긋나면 종료 코드 1.
+MGET은 클러스터 래퍼가 노드별로 나눠 조회하므로(mget_nonatomic) 슬롯이 달라도 통과.
+
+함께 보고:
+- 캐시 키가 마스터 노드에 고르게 흩어지는지 (해시 태그 없는 키)
+- 사용량 한도/보너스 키가 사용자별 태그({u:<userId>})로 마스터 노드에 고르게 흩어지는지
+- 파이프라인 1회가 몇 개 노드로 나뉘는지 (ClusterPipeline은 노드별로 묶어 노드당 1회 왕복)
+
+    python bench/cluster_keys.py                              # 서버 없이 (memory 저장소 + 클러스터 키 이름)
+    python bench/cluster_keys.py --masters 6 --cache-keys 50000
+    python bench/cluster_keys.py --untagged                   # 비교용: 해시 태그 없이 (이전 키 이름)
+    python bench/cluster_keys.py --url redis://127.0.0.1:7000  # 실제 클러스터 (docker-compose.cluster.yml)
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ.setdefault('LOG_ASYNC', '0')
+os.environ.setdefault('METRICS_ENABLED', '0')
+
+from redis.cluster import key_slot  # noqa: E402
+
+import app  # noqa: E402
+from storage import MemoryStorage, StorageScript  # noqa: E402
+
+SLOTS = 16384
+
+# 명령 → 인자에서 키 목록 뽑기
+MULTI_KEY_COMMANDS = {
+    'sunionstore': lambda args: [args[0], *args[1:]],
+    'mget': lambda args: list(args[0]) if isinstance(args[0], (list, tuple)) else list(args),
+    'delete': list,
+    'exists': list,
+}
+SPLIT_BY_CLIENT = {'mget'}  # app._ClusterClient가 노드별로 나눠 실행
+
+
+def slot_of(key):
+    return key_slot(key.encode())
+
+
+def node_of(slot, masters):
+    """redis-cli --cluster create 기본 분배 (슬롯을 마스터 수로 균등 분할)"""
+    return slot * masters // SLOTS
+
+
+class Recorder:
+    def __init__(self):
+        self.multi_key = []  # (명령, 키 목록)
+        self.pipelines = []  # [첫 번째 키, ...] (파이프라인 1회)
+
+
+class RecordingPipeline:
+    def __init__(self, recorder, pipe):
+        self._recorder = recorder
+        self._pipe = pipe
+        self._keys = []
+
+    def __len__(self):
+        return len(self._pipe)
+
+    def __getattr__(self, name):
+        attr = getattr(self._pipe, name)
+        if name == 'execute':
+            def execute(*args, **kwargs):
+                self._recorder.pipelines.append(self._keys)
+                self._keys = []
+                return attr(*args, **kwargs)
+            return execute
+
+        def queue(*args, **kwargs):
+            if name in MULTI_KEY_COMMANDS:
+                self._recorder.multi_key.append((name, MULTI_KEY_COMMANDS[name](args)))
+            if args and name != 'publish':
+                self._keys.append(args[0])
+            attr(*args, **kwargs)
+            return self
+        return queue
+
+
+class RecordingStore:
+    """저장소 프록시 - 클러스터 모드 키 이름(cluster=True)으로 동작하며 다중 키 명령 기록"""
+
+    cluster = True
+
+    def __init__(self, inner, recorder):
+        self._inner = inner
+        self._recorder = recorder
+        self.backend = inner.backend
+
+    def __bool__(self):
+        return bool(self._inner)
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if name == 'pipeline':
+            return lambda *args, **kwargs: RecordingPipeline(self._recorder, attr(*args, **kwargs))
+        if name in MULTI_KEY_COMMANDS and callable(attr):
+            def command(*args, **kwargs):
+                keys = MULTI_KEY_COMMANDS[name](args)
+                if len(keys) > 1:
+                    self._recorder.multi_key.append((name, keys))
+                return attr(*args, **kwargs)
+            return command
+        return attr
+
+
+def record_scripts(recorder):
+    """StorageScript 실행 키 기록 (Redis EVALSHA / memory fallback 공통)"""
+    original = StorageScript.__call__
+
+    def call(self, storage, keys, args):
+        recorder.multi_key.append((f'script:{self.sha[:8]}', list(keys)))
+        return original(self, storage, keys, args)
+    StorageScript.__call__ = call
+
+
+def exercise():
+    """클러스터에서 문제가 될 수 있는 경로를 한 번씩 실행 → 실패한 단계 목록"""
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    failures = []
+
+    def step(name, fn):
+        try:
+            fn()
+        except Exception as e:
+            failures.append((name, repr(e)))
+
+    def requests_context():
+        with app.app.test_request_context('/'):
+            step('quota (user)', lambda: app.check_usage_quota('cluster_user', '10.0.0.1'))
+            step('quota (ip)', lambda: app.check_usage_quota(None, '10.0.0.2'))
+            step('analytics batch', lambda: app.log_analytics_batch([
+                ('page_view', {'userId': 'cluster_user', 'browser': 'Chrome', 'deviceType': 'Desktop'}, True),
+                ('blog_analyzed', {'blog_url': 'https://blog.naver.com/cluster/1', 'from_cache': True}, True),
+                ('comment_copied', {'sessionDuration': 42}, True),
+            ]))
+            step('cache store', lambda: app.set_cached_comments('https://blog.naver.com/cluster/1', {'title': 't'}, ['c']))
+            step('cache lookup', lambda: app.get_cached_comments('https://blog.naver.com/cluster/1'))
+            for panel in app.STATS_PANELS:
+                step(f'panel {panel}', lambda panel=panel: app.compute_stats_panel(panel))
+
+    requests_context()
+    for path, body in (('/api/referral/track', {'referrerId': 'cluster_user', 'newUserId': 'cluster_friend'}),
+                       ('/api/referral/claim', {'userId': 'cluster_user'}),
+                       ('/api/share/claim', {'userId': 'cluster_user'})):
+        step(path, lambda path=path, body=body: client.post(path, json=body).get_json()['success'])
+    step('/api/referral/status', lambda: client.get('/api/referral/status?userId=cluster_user').get_json()['success'])
+
+    for profile_id in ('cluster1', 'cluster2'):
+        app.store.set(f'profile:{profile_id}:meta', json.dumps({
+            'id': profile_id, 'created_at': app.get_kst_now().isoformat(), 'method': 'GET', 'path': '/',
+            'status': 200, 'duration_ms': 1.0, 'formats': ['txt'],
+        }))
+    app.store.lpush('profiles:index', 'cluster1', 'cluster2')
+    step('/admin/profiles', lambda: client.get('/admin/profiles').status_code == 200 or 1 / 0)
+    return failures
+
+
+def cache_key_spread(count, masters):
+    """합성 캐시 키 count개의 마스터별 비율"""
+    namespace = app.current_cache_namespace()
+    nodes = collections.Counter()
+    for i in range(count):
+        url = f'blog.naver.com/blogger{i % 997}/{220000000000 + i}'
+        nodes[node_of(slot_of(app.generate_cache_key(url, namespace)), masters)] += 1
+    return [nodes[n] / count for n in range(masters)]
+
+
+def account_key_spread(count, masters):
+    """합성 사용자 count명의 사용량 한도 키(사용자 버킷) 마스터별 비율"""
+    nodes = collections.Counter()
+    for i in range(count):
+        nodes[node_of(slot_of(app.account_key(f'quota:bucket:u:user{i}', f'u:user{i}')), masters)] += 1
+    return [nodes[n] / count for n in range(masters)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Redis Cluster 키 배치 검사')
+    parser.add_argument('--url', help='실제 클러스터 노드 URL (없으면 memory 저장소로 키 이름만 검사)')
+    parser.add_argument('--masters', type=int, default=3, help='노드 분산 계산용 마스터 수 (--url 없을 때)')
+    parser.add_argument('--cache-keys', type=int, default=20000)
+    parser.add_argument('--untagged', action='store_true', help='해시 태그 없이 (단일 Redis 키 이름) 검사')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    RecordingStore.cluster = not args.untagged
+
+    recorder = Recorder()
+    record_scripts(recorder)
+    inner = app.ManagedRedis(args.url, cluster=True) if args.url else MemoryStorage()
+    app.store = RecordingStore(inner, recorder)
+    if args.url and not app.store:
+        raise SystemExit(f"❌ 클러스터 연결 실패: {inner.connection_stats()['last_error']}")
+
+    started = time.perf_counter()
+    failures = exercise()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.url:
+        masters = len(inner.get_primaries())
+        locate = lambda key: inner.get_node_from_key(key).name  # noqa: E731
+    else:
+        masters = args.masters
+        locate = lambda key: node_of(slot_of(key), masters)  # noqa: E731
+
+    checks = []
+    for command, keys in recorder.multi_key:
+        slots = {slot_of(key) for key in keys}
+        checks.append({'command': command, 'keys': len(keys), 'slots': len(slots), 'example': keys[0]})
+    cross_slot = [check for check in checks if check['slots'] > 1 and check['command'] not in SPLIT_BY_CLIENT]
+    fanout = [len({locate(key) for key in keys}) for keys in recorder.pipelines if keys]
+    spread = cache_key_spread(args.cache_keys, args.masters)
+    account_spread = account_key_spread(args.cache_keys, args.masters)
+
+    result = {
+        'mode': 'cluster' if args.url else 'offline',
+        'masters': masters,
+        'multi_key_commands': len(checks),
+        'cross_slot': cross_slot,
+        'failed_steps': failures,
+        'pipelines': len(fanout),
+        'pipeline_nodes_max': max(fanout, default=0),
+        'pipeline_nodes_avg': round(sum(fanout) / len(fanout), 2) if fanout else 0,
+        'cache_key_share_by_master': [round(share, 4) for share in spread],
+        'account_key_share_by_master': [round(share, 4) for share in account_spread],
+        'elapsed_ms': round(elapsed_ms, 1),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(f"🧩 다중 키 명령 {len(checks)}회 ({result['mode']}, 마스터 {masters}개)")
+        seen = set()
+        for check in checks:
+            label = (check['command'], check['example'].split(':')[0])
+            if label in seen:
+                continue
+            seen.add(label)
+            mark = '✅' if check['slots'] == 1 else '🔀' if check['command'] in SPLIT_BY_CLIENT else '❌'
+            print(f"  {mark} {check['command']:<18} 키 {check['keys']:>2}개 → 슬롯 {check['slots']}개  예: {check['example']}")
+        print(f"  파이프라인 {len(fanout)}회: 노드 평균 {result['pipeline_nodes_avg']}개 / 최대 {result['pipeline_nodes_max']}개 (노드당 1회 왕복)")
+        print("  캐시 키 마스터별 비율 (" + f"{args.cache_keys}개, 마스터 {args.masters}개): "
+              + ', '.join(f'{share:.1%}' for share in spread))
+        print("  사용자 한도 키 마스터별 비율 (" + f"{args.cache_keys}명, 마스터 {args.masters}개): "
+              + ', '.join(f'{share:.1%}' for share in account_spread))
+        for name, error in failures:
+            print(f"  ❌ {name}: {error}")
+
+    if cross_slot or failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+🧊 콜드 스타트 벤치마크
+
+매 회 새 인터프리터를 띄워 `import app` + 첫 요청까지 걸린 시간을 측정.
+중앙값이 예산(COLD_START_BUDGET_MS 또는 --budget-ms)을 넘으면 종료 코드 1 → CI에서 회귀 감지.
+
+    python bench/cold_start.py
+    python bench/cold_start.py --runs 10 --path /robots.txt --budget-ms 400
+
+Redis/OpenAI는 지연 초기화이므로 첫 요청이 이를 쓰지 않는 경로라면 연결 비용은 측정에 포함되지 않음.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 자식 인터프리터에서 실행되는 측정 코드 (결과는 마지막 줄 JSON)
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (finished - imported) * 1000,
+    "total_ms": (finished - started) * 1000,
+    "status": response.status_code
+}))
+'''
+
+
+def measure_once(path):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, path],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit("❌ 측정 실패")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='콜드 스타트 시간 측정')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/robots.txt', help='첫 요청 경로')
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.environ.get('COLD_START_BUDGET_MS', '500')))
+    args = parser.parse_args()
+    
+    samples = [measure_once(args.path) for _ in range(args.runs)]
+    
+    print(f"🧊 콜드 스타트 {args.runs}회 (첫 요청: {args.path}, 응답 {samples[-1]['status']})")
+    for key in ('import_ms', 'first_request_ms', 'total_ms'):
+        values = [sample[key] for sample in samples]
+        print(f"  {key:<18} 중앙값 {statistics.median(values):7.1f}ms  "
+              f"최소 {min(values):7.1f}ms  최대 {max(values):7.1f}ms")
+    
+    median_total = statistics.median(sample['total_ms'] for sample in samples)
+    if median_total > args.budget_ms:
+        print(f"❌ 예산 초과: {median_total:.1f}ms > {args.budget_ms:.0f}ms")
+        sys.exit(1)
+    print(f"✅ 예산 이내: {median_total:.1f}ms <= {args.budget_ms:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
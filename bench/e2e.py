@@ -0,0 +1,329 @@
+"""
+🏎️ /api/analyze 엔드투엔드 벤치마크
+
+가짜 네이버/OpenAI 서버(bench/fakes.py)와 앱 서버를 각각 별도 프로세스로 띄우고
+시나리오별로 부하를 걸어 처리량과 p50/p95/p99 지연시간을 측정.
+
+시나리오:
+- cache_hit: 미리 데운 URL 반복 요청 (저장소 조회만)
+- cache_miss: 매번 새 URL (스크래핑 + AI + 캐시 저장)
+- template_fallback: 가짜 OpenAI 실패율 100% → 템플릿 댓글 (SDK 재시도 포함)
+- track: POST /api/track (page_view)
+
+결과는 JSON으로 저장 (기본 bench/results/<날짜>-<커밋>.json) → compare로 커밋 간 비교.
+
+    python bench/e2e.py
+    python bench/e2e.py --scenarios cache_hit,track --scale 2 --storage sqlite
+    python bench/e2e.py --server gunicorn --workers 4 --compare bench/results/이전결과.json
+    python bench/e2e.py compare 이전.json 이후.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# 시나리오별 기본 (요청 수, 동시성) - --scale로 요청 수 배율 조정
+SCENARIOS = {
+    'cache_hit': (500, 20),
+    'cache_miss': (100, 10),
+    'template_fallback': (40, 10),
+    'track': (1000, 20),
+}
+CACHE_HIT_URLS = 20  # cache_hit 시나리오에서 미리 데우는 URL 수
+
+
+# ============================
+# 🚀 프로세스 관리
+# ============================
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, path='/', timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"❌ 127.0.0.1:{port} 가 {timeout:.0f}초 안에 뜨지 않음")
+
+
+def start_process(args, env=None, log_path=os.devnull):
+    log_file = open(log_path, 'w')
+    return subprocess.Popen(args, cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def start_app(args, naver_port, openai_port, app_port):
+    """앱 서버 시작 (외부 서비스는 가짜 서버로 교체)"""
+    env = dict(os.environ)
+    env.update({
+        'NAVER_BLOG_BASE_URL': f'http://127.0.0.1:{naver_port}',
+        'OPENAI_BASE_URL': f'http://127.0.0.1:{openai_port}/v1',
+        'OPENAI_API_KEY': 'sk-bench',
+        'QUOTA_ENABLED': '0',  # 같은 IP에서 수천 번 호출하므로 사용량 한도는 끄고 측정
+        'STORAGE_BACKEND': args.storage,
+        'STORAGE_SQLITE_PATH': os.path.join(tempfile.mkdtemp(prefix='repost-bench-'), 'bench.sqlite3'),
+    })
+    if args.storage != 'redis':
+        env.pop('KV_REDIS_URL', None)
+        env.pop('REDIS_URL', None)
+
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', 'app:app', '-b', f'127.0.0.1:{app_port}',
+                   '-w', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-c',
+                   'import sys, app; app.app.run(host="127.0.0.1", port=int(sys.argv[1]), threaded=True)',
+                   str(app_port)]
+    return start_process(command, env=env, log_path=args.app_log)
+
+
+def control(port, **values):
+    """가짜 서버 설정 변경 (POST /__control)"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('POST', '/__control', json.dumps(values), {'Content-Type': 'application/json'})
+    result = json.loads(conn.getresponse().read())
+    conn.close()
+    return result
+
+
+# ============================
+# 📈 부하 생성 / 집계
+# ============================
+
+def percentile(sorted_values, q):
+    """nearest-rank 분위수"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_load(port, make_request, total, concurrency):
+    """
+    total개의 요청을 concurrency개 스레드로 실행 (스레드마다 keep-alive 커넥션 1개)
+
+    Args:
+        make_request: i → (method, path, body_dict)
+    """
+    latencies = []
+    errors = []
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            method, path, body = make_request(i)
+            payload = json.dumps(body) if body is not None else None
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, payload, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status >= 400:
+                        errors.append(response.status)
+            except (OSError, http.client.HTTPException) as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        conn.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'error_samples': sorted({str(e) for e in errors})[:5],
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(latencies) / duration, 1) if duration else 0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0,
+    }
+
+
+def analyze_request(url):
+    return 'POST', '/api/analyze', {'url': url}
+
+
+def run_scenario(name, args, ports):
+    total, concurrency = SCENARIOS[name]
+    total = max(1, int(total * args.scale))
+    concurrency = args.concurrency or concurrency
+    run_id = uuid.uuid4().hex[:8]
+    app_port, _, openai_port = ports
+
+    if name == 'cache_hit':
+        urls = [f'https://blog.naver.com/benchhit/{run_id}{i}' for i in range(CACHE_HIT_URLS)]
+        run_load(app_port, lambda i: analyze_request(urls[i]), len(urls), 1)  # 예열 (순차)
+        return run_load(app_port, lambda i: analyze_request(urls[i % len(urls)]), total, concurrency)
+
+    if name == 'cache_miss':
+        return run_load(app_port, lambda i: analyze_request(f'https://blog.naver.com/benchmiss/{run_id}{i}'),
+                        total, concurrency)
+
+    if name == 'template_fallback':
+        previous = control(openai_port)
+        control(openai_port, failure_rate=1.0, failure_status=args.fallback_status)
+        try:
+            return run_load(app_port, lambda i: analyze_request(f'https://blog.naver.com/benchfail/{run_id}{i}'),
+                            total, concurrency)
+        finally:
+            control(openai_port, failure_rate=previous['failure_rate'], failure_status=previous['failure_status'])
+
+    if name == 'track':
+        return run_load(app_port, lambda i: ('POST', '/api/track', {
+            'event': 'page_view', 'userId': f'bench-{run_id}-{i % 200}', 'sessionDuration': 30 + i % 300
+        }), total, concurrency)
+
+    raise SystemExit(f"❌ 알 수 없는 시나리오: {name}")
+
+
+# ============================
+# 🧾 결과 저장 / 비교
+# ============================
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def print_results(results):
+    print(f"{'시나리오':<20}{'요청':>7}{'오류':>6}{'처리량(rps)':>13}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, r in results['scenarios'].items():
+        print(f"{name:<20}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>13}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+
+def compare(base_path, new_path):
+    """두 결과 파일의 시나리오별 변화율 출력 (처리량 ↑, 지연 ↓ 가 개선)"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"📊 {base['meta']['revision']} → {new['meta']['revision']}")
+    print(f"{'시나리오':<20}{'지표':<16}{'이전':>10}{'이후':>10}{'변화':>9}")
+    for name, after in new['scenarios'].items():
+        before = base['scenarios'].get(name)
+        if not before:
+            continue
+        for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            old, cur = before[metric], after[metric]
+            change = f"{(cur - old) / old * 100:+.1f}%" if old else '-'
+            print(f"{name:<20}{metric:<16}{old:>10}{cur:>10}{change:>9}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == 'compare':
+        return compare(sys.argv[2], sys.argv[3])
+
+    parser = argparse.ArgumentParser(description='/api/analyze 엔드투엔드 벤치마크')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--scale', type=float, default=1.0, help='시나리오별 요청 수 배율')
+    parser.add_argument('--concurrency', type=int, default=0, help='모든 시나리오의 동시성 (기본: 시나리오별)')
+    parser.add_argument('--storage', default='memory', choices=('memory', 'sqlite', 'redis'))
+    parser.add_argument('--server', default='werkzeug', choices=('werkzeug', 'gunicorn'))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--naver-latency-ms', type=float, default=150)
+    parser.add_argument('--openai-latency-ms', type=float, default=1200)
+    parser.add_argument('--openai-failure-rate', type=float, default=0.0)
+    parser.add_argument('--fallback-status', type=int, default=500,
+                        help='template_fallback 시나리오의 OpenAI 오류 코드 (500/429는 SDK 재시도, 400은 즉시 실패)')
+    parser.add_argument('--out', help='결과 JSON 경로 (기본: bench/results/<날짜>-<커밋>.json)')
+    parser.add_argument('--compare', help='이전 결과 JSON과 비교')
+    parser.add_argument('--app-log', default=os.devnull, help='앱 서버 로그 파일')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    naver_port, openai_port, app_port = free_port(), free_port(), free_port()
+    processes = [
+        start_process([sys.executable, os.path.join(BENCH_DIR, 'fakes.py'), 'naver',
+                       '--port', str(naver_port), '--latency-ms', str(args.naver_latency_ms)]),
+        start_process([sys.executable, os.path.join(BENCH_DIR, 'fakes.py'), 'openai',
+                       '--port', str(openai_port), '--latency-ms', str(args.openai_latency_ms),
+                       '--failure-rate', str(args.openai_failure_rate)]),
+    ]
+    try:
+        wait_for_port(naver_port, '/__control')
+        wait_for_port(openai_port, '/__control')
+        processes.append(start_app(args, naver_port, openai_port, app_port))
+        wait_for_port(app_port, '/robots.txt')
+
+        results = {
+            'meta': {
+                'revision': git_revision(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare', 'app_log')},
+            },
+            'scenarios': {},
+        }
+        for name in names:
+            print(f"▶ {name} ...", flush=True)
+            results['scenarios'][name] = run_scenario(name, args, (app_port, naver_port, openai_port))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    print_results(results)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{results['meta']['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"💾 저장: {out}")
+
+    if args.compare:
+        compare(args.compare, out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+🎭 벤치마크용 가짜 외부 서비스 (네이버 블로그 / OpenAI)
+
+- 가짜 네이버: /PostView.naver?blogId=..&logNo=.. 에 저장해 둔 PostView HTML을 지연 후 응답
+- 가짜 OpenAI: POST /v1/chat/completions 에 댓글 JSON을 지연 후 응답 (실패율 설정 가능)
+  실행 중 POST /__control {"failure_rate": 1.0, "latency_ms": 500} 으로 설정 변경
+
+앱은 NAVER_BLOG_BASE_URL / OPENAI_BASE_URL 환경변수로 이 서버들을 바라보게 함.
+
+    python bench/fakes.py naver --port 9001 --latency-ms 150
+    python bench/fakes.py openai --port 9002 --latency-ms 1200 --failure-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+FAKE_COMMENTS = [
+    '사진만 봐도 분위기가 느껴지네요 ☕',
+    '바닐라빈 라떼 꼭 마셔보고 싶어요!',
+    '주차 정보까지 알려주셔서 감사해요 😊',
+    '무화과 타르트 너무 맛있어 보여요 🍰',
+    '창가 자리 햇살 정말 예쁘네요 ✨',
+    '성수동 갈 때 저장해뒀다가 방문해볼게요! 자세한 후기 감사합니다 🙏',
+    '웨이팅 있어도 갈 만한 곳 같아요. 작업하기 좋은 카페 찾고 있었는데 딱이네요!',
+    '가격대가 조금 있지만 분위기랑 맛 생각하면 납득되네요. 다음 후기도 기대할게요 👍',
+]
+
+
+class FakeConfig:
+    """요청마다 읽는 설정 (스레드 간 공유, /__control로 변경)"""
+
+    def __init__(self, latency_ms=0, jitter=0.2, failure_rate=0.0, failure_status=500):
+        self.latency_ms = float(latency_ms)
+        self.jitter = float(jitter)
+        self.failure_rate = float(failure_rate)
+        self.failure_status = int(failure_status)
+        self.requests = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def sleep(self):
+        if self.latency_ms > 0:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0.0, random.uniform(self.latency_ms - spread, self.latency_ms + spread)) / 1000)
+
+    def update(self, values):
+        for key in ('latency_ms', 'jitter', 'failure_rate', 'failure_status'):
+            if key in values:
+                setattr(self, key, type(getattr(self, key))(values[key]))
+
+    def as_dict(self):
+        return {
+            'latency_ms': self.latency_ms, 'jitter': self.jitter,
+            'failure_rate': self.failure_rate, 'failure_status': self.failure_status,
+            'requests': self.requests, 'failures': self.failures,
+        }
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive (실제 서비스와 같은 커넥션 재사용)
+    config = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        payload = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+    def _handle_control(self):
+        """설정 조회/변경 - 시나리오별로 실패율/지연을 바꿀 때 사용"""
+        if self.command == 'POST':
+            self.config.update(self._read_json())
+        self._send(200, json.dumps(self.config.as_dict()))
+
+
+class FakeNaverHandler(_FakeHandler):
+    html_template = ''
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/__control':
+            return self._handle_control()
+
+        with self.config.lock:
+            self.config.requests += 1
+        self.config.sleep()
+
+        query = parse_qs(parsed.query)
+        blog_id = query.get('blogId', ['benchblog'])[0]
+        log_no = query.get('logNo', ['0'])[0]
+        html = (self.html_template
+                .replace('{{title}}', f'성수동 카페 후기 #{log_no}')
+                .replace('{{blog_id}}', blog_id)
+                .replace('{{log_no}}', log_no))
+        self._send(200, html, 'text/html; charset=utf-8')
+
+    do_POST = do_GET
+
+
+class FakeOpenAIHandler(_FakeHandler):
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == '/__control':
+            return self._handle_control()
+        if not path.endswith('/chat/completions'):
+            return self._send(404, json.dumps({'error': {'message': 'not found'}}))
+
+        request_body = self._read_json()
+        with self.config.lock:
+            self.config.requests += 1
+        self.config.sleep()
+
+        if random.random() < self.config.failure_rate:
+            with self.config.lock:
+                self.config.failures += 1
+            return self._send(self.config.failure_status, json.dumps({
+                'error': {'message': 'fake upstream failure', 'type': 'server_error', 'code': None}
+            }))
+
+        content = json.dumps({'comments': random.sample(FAKE_COMMENTS, len(FAKE_COMMENTS))}, ensure_ascii=False)
+        self._send(200, json.dumps({
+            'id': f'chatcmpl-bench{random.randrange(10 ** 9)}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request_body.get('model', 'gpt-3.5-turbo-1106'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 600, 'completion_tokens': 250, 'total_tokens': 850},
+        }, ensure_ascii=False))
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/__control':
+            return self._handle_control()
+        self._send(404, json.dumps({'error': {'message': 'not found'}}))
+
+
+class _BenchHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 1024  # 동시 연결 수백 개에서도 SYN 재전송 대기가 측정에 섞이지 않도록
+
+
+def _serve(handler_class, port, config, **attrs):
+    handler = type(handler_class.__name__, (handler_class,), {'config': config, **attrs})
+    server = _BenchHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=handler_class.__name__, daemon=True)
+    thread.start()
+    return server
+
+
+def start_fake_naver(port=0, latency_ms=150, jitter=0.2, html_path=None):
+    """가짜 네이버 서버 시작 (백그라운드 스레드) → (server, config)"""
+    with open(html_path or os.path.join(FIXTURE_DIR, 'naver_postview.html'), encoding='utf-8') as f:
+        html_template = f.read()
+    config = FakeConfig(latency_ms=latency_ms, jitter=jitter)
+    return _serve(FakeNaverHandler, port, config, html_template=html_template), config
+
+
+def start_fake_openai(port=0, latency_ms=1200, jitter=0.2, failure_rate=0.0, failure_status=500):
+    """가짜 OpenAI 서버 시작 (백그라운드 스레드) → (server, config)"""
+    config = FakeConfig(latency_ms=latency_ms, jitter=jitter,
+                        failure_rate=failure_rate, failure_status=failure_status)
+    return _serve(FakeOpenAIHandler, port, config), config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='벤치마크용 가짜 외부 서비스')
+    parser.add_argument('service', choices=('naver', 'openai'))
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=None)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--failure-status', type=int, default=500)
+    parser.add_argument('--html', help='네이버 PostView HTML (기본: fixtures/naver_postview.html)')
+    args = parser.parse_args()
+
+    if args.service == 'naver':
+        latency = 150 if args.latency_ms is None else args.latency_ms
+        server, _ = start_fake_naver(args.port, latency, args.jitter, args.html)
+        print(f"🎭 가짜 네이버: http://127.0.0.1:{server.server_port} (NAVER_BLOG_BASE_URL)")
+    else:
+        latency = 1200 if args.latency_ms is None else args.latency_ms
+        server, _ = start_fake_openai(args.port, latency, args.jitter, args.failure_rate, args.failure_status)
+        print(f"🎭 가짜 OpenAI: http://127.0.0.1:{server.server_port}/v1 (OPENAI_BASE_URL)")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+📦 임포트 시간 프로파일 (python -X importtime)
+
+`import app` 을 새 인터프리터에서 실행하고 최상위 패키지별 누적 임포트 시간을 표로 출력.
+콜드 스타트에서 어떤 모듈이 시간을 잡아먹는지 확인할 때 사용.
+
+    python bench/import_profile.py
+    python bench/import_profile.py --top 30 --json import_profile.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime(module):
+    """-X importtime 출력(stderr)을 [(self_us, cumulative_us, depth, name)] 로 파싱"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"❌ import {module} 실패")
+    
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def summarize(rows, module):
+    """최상위(직접 임포트된) 패키지별 누적 시간 집계"""
+    # 직접 임포트된 모듈은 대상 모듈보다 한 단계 깊음
+    target_depth = next((depth for _, _, depth, name in rows if name == module), 0)
+    packages = {}
+    for self_us, cumulative_us, depth, name in rows:
+        if depth == target_depth + 1:
+            top = name.split('.')[0]
+            packages[top] = packages.get(top, 0) + cumulative_us
+    total_us = next((cumulative for _, cumulative, _, name in rows if name == module), 0)
+    return total_us, sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='import 시간 프로파일')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', dest='json_path', help='결과를 JSON 파일로 저장')
+    args = parser.parse_args()
+    
+    rows = run_importtime(args.module)
+    total_us, packages = summarize(rows, args.module)
+    
+    print(f"📦 import {args.module}: {total_us / 1000:.1f}ms (모듈 {len(rows)}개)")
+    print(f"{'패키지':<30}{'누적(ms)':>10}{'비율':>8}")
+    for name, cumulative_us in packages[:args.top]:
+        share = cumulative_us / total_us * 100 if total_us else 0
+        print(f"{name:<30}{cumulative_us / 1000:>10.1f}{share:>7.1f}%")
+    
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'module': args.module,
+                'total_ms': round(total_us / 1000, 1),
+                'packages': [{'name': name, 'cumulative_ms': round(us / 1000, 1)} for name, us in packages]
+            }, f, indent=2, ensure_ascii=False)
+        print(f"💾 저장: {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
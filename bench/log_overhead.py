@@ -0,0 +1,91 @@
+"""
+📝 로깅 핫패스 비용 벤치마크
+
+요청 처리 스레드가 log() 한 번에 쓰는 시간을 방식별로 측정 (출력은 임시 파일로 보냄).
+
+    python bench/log_overhead.py
+    python bench/log_overhead.py --calls 50000 --calls-per-request 25 --json
+
+| 방식 | 내용 |
+| --- | --- |
+| legacy_print | 이전 log(): print(flush=True) + stdout/stderr flush |
+| json_sync | JSON 포맷 + 동기 쓰기 (LOG_ASYNC=0, Vercel 기본) |
+| json_async | 큐에 넣기만 함 (LOG_ASYNC=1) - 별도로 리스너가 모두 쓰는 데 걸린 시간도 표시 |
+| sampled_out | LOG_SAMPLE_RATES로 버려지는 카테고리 (CACHE 비율 0) |
+| below_level | LOG_LEVEL보다 낮은 DEBUG 로그 |
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def legacy_log(message, level="INFO"):
+    """변경 전 log() 구현 (비교 기준)"""
+    from datetime import datetime, timedelta, timezone
+    timestamp = datetime.now(timezone(timedelta(hours=9))).strftime('%H:%M:%S')
+    print(f"[{timestamp}] {level}: {message}", flush=True)
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+
+def time_calls(func, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로깅 핫패스 비용 측정')
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--calls-per-request', type=int, default=25,
+                        help='/api/analyze 한 번에 남기는 로그 수 (요청당 비용 추정용)')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    os.environ.setdefault('STORAGE_BACKEND', 'none')
+    import app
+
+    results = {}
+    with tempfile.TemporaryFile('w', encoding='utf-8') as sink:
+        with contextlib.redirect_stdout(sink):
+            results['legacy_print'] = time_calls(
+                lambda i: legacy_log(f"📡 블로그 스크래핑 시작... {i}", "SCRAPE"), args.calls)
+
+        app.configure_logging(stream=sink, async_output=False, fmt='json')
+        results['json_sync'] = time_calls(
+            lambda i: app.log("📡 블로그 스크래핑 시작", "SCRAPE", url=f'https://blog.naver.com/x/{i}'), args.calls)
+
+        app.configure_logging(stream=sink, async_output=True, fmt='json')
+        started = time.perf_counter()
+        results['json_async'] = time_calls(
+            lambda i: app.log("📡 블로그 스크래핑 시작", "SCRAPE", url=f'https://blog.naver.com/x/{i}'), args.calls)
+        app.configure_logging(stream=sink, async_output=False)  # 리스너 정지 = 큐 비우기
+        drain_us = (time.perf_counter() - started) / args.calls * 1e6
+
+        app.LOG_SAMPLE_RATES['CACHE'] = 0.0
+        results['sampled_out'] = time_calls(lambda i: app.log("⚡ 캐시 히트", "CACHE", url=i), args.calls)
+        results['below_level'] = time_calls(lambda i: app.log("   내용 미리보기", "DEBUG", preview=i), args.calls)
+
+    if args.json:
+        print(json.dumps({'per_call_us': results, 'async_total_with_drain_us': drain_us,
+                          'calls': args.calls, 'calls_per_request': args.calls_per_request}, indent=2))
+        return
+
+    print(f"📝 log() 호출당 비용 ({args.calls}회 평균, 요청당 {args.calls_per_request}회 기준)")
+    for name, per_call in results.items():
+        per_request_ms = per_call * args.calls_per_request / 1000
+        print(f"  {name:<14} {per_call:8.2f}µs/호출  → 요청당 {per_request_ms:6.3f}ms")
+    print(f"  (json_async 리스너가 모두 쓰기까지 포함: {drain_us:.2f}µs/호출 - 요청 스레드 밖에서 처리)")
+
+
+if __name__ == '__main__':
+    main()
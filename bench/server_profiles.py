@@ -0,0 +1,177 @@
+"""
+🧵 gunicorn 워커 방식별 동시 분석 요청 처리량
+
+가짜 네이버/OpenAI 서버(bench/fakes.py)를 띄우고 gunicorn 설정별로 캐시 미스 분석 요청을
+동시 10 / 100 / 500개 걸어 정해진 시간 동안 처리한 요청 수와 지연시간을 비교.
+
+프로필:
+- legacy: 이전 Procfile (gunicorn app:app, sync 워커 1개, preload 없음)
+- gthread: gunicorn.conf.py 기본 (워커 WEB_CONCURRENCY × 스레드 GUNICORN_THREADS)
+- gevent: gunicorn.conf.py + GUNICORN_WORKER_CLASS=gevent (pip install gevent 필요)
+- asgi: gunicorn.conf.py + GUNICORN_WORKER_CLASS=uvicorn, asgi:application (분석 요청을 이벤트 루프에서 처리)
+
+    python bench/server_profiles.py
+    python bench/server_profiles.py --profiles gthread,gevent --levels 100,500 --duration 30
+    python bench/server_profiles.py --json > bench/results/server_profiles.json
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from e2e import free_port, percentile, start_process, wait_for_port  # noqa: E402
+
+PROFILES = {  # 이름: (앱, gunicorn 인자, 환경변수)
+    'legacy': ('app:app', [], {}),
+    'gthread': ('app:app', ['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'gthread'}),
+    'gevent': ('app:app', ['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'gevent'}),
+    'asgi': ('asgi:application', ['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'uvicorn'}),
+}
+OPTIONAL_MODULES = {'gevent': 'gevent', 'asgi': 'uvicorn'}  # 미설치면 건너뛸 프로필
+
+
+def start_server(profile, app_port, naver_port, openai_port, log_path):
+    target, config_args, profile_env = PROFILES[profile]
+    env = dict(os.environ)
+    env.update({
+        'NAVER_BLOG_BASE_URL': f'http://127.0.0.1:{naver_port}',
+        'OPENAI_BASE_URL': f'http://127.0.0.1:{openai_port}/v1',
+        'OPENAI_API_KEY': 'sk-bench',
+        'QUOTA_ENABLED': '0',
+        'STORAGE_BACKEND': 'memory',
+        'LOG_LEVEL': 'WARNING',
+        **profile_env,
+    })
+    env.pop('KV_REDIS_URL', None)
+    env.pop('REDIS_URL', None)
+    if not config_args:
+        config_args = ['-c', os.devnull]  # 설정 파일 없이 = 이전 기본값 (sync 워커 1개)
+        env.pop('WEB_CONCURRENCY', None)
+    command = [sys.executable, '-m', 'gunicorn', target, *config_args,
+               '-b', f'127.0.0.1:{app_port}', '--log-level', 'warning']
+    return start_process(command, env=env, log_path=log_path)
+
+
+def run_timed_load(port, concurrency, duration, timeout):
+    """concurrency개 연결이 duration초 동안 새 URL 분석을 반복 요청 (마감 후엔 진행 중인 요청만 기다림)"""
+    run_id = uuid.uuid4().hex[:8]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        while time.perf_counter() < deadline:
+            with lock:
+                i = next(counter)
+            body = json.dumps({'url': f'https://blog.naver.com/benchconc/{run_id}{i}'})
+            started = time.perf_counter()
+            try:
+                conn.request('POST', '/api/analyze', body, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                with lock:
+                    if response.status < 400:
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    else:
+                        errors.append(str(response.status))
+            except (OSError, http.client.HTTPException) as e:
+                with lock:
+                    errors.append(type(e).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        conn.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'completed': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'elapsed_s': round(elapsed, 1),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50)),
+        'p95_ms': round(percentile(latencies, 0.95)),
+        'p99_ms': round(percentile(latencies, 0.99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='gunicorn 워커 방식별 처리량 비교')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--levels', default='10,100,500', help='동시 요청 수 (쉼표 구분)')
+    parser.add_argument('--duration', type=float, default=20, help='단계별 측정 시간 (초)')
+    parser.add_argument('--timeout', type=float, default=30, help='요청 타임아웃 (초)')
+    parser.add_argument('--naver-latency-ms', type=float, default=150)
+    parser.add_argument('--openai-latency-ms', type=float, default=1200)
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(',') if p.strip()]
+    for profile, module in OPTIONAL_MODULES.items():
+        if profile in profiles and importlib.util.find_spec(module) is None:
+            print(f"⚠️ {module} 미설치 - {profile} 프로필 건너뜀", file=sys.stderr)
+            profiles.remove(profile)
+    levels = [int(level) for level in args.levels.split(',')]
+
+    naver_port, openai_port = free_port(), free_port()
+    fakes = [
+        start_process([sys.executable, os.path.join(BENCH_DIR, 'fakes.py'), 'naver',
+                       '--port', str(naver_port), '--latency-ms', str(args.naver_latency_ms)]),
+        start_process([sys.executable, os.path.join(BENCH_DIR, 'fakes.py'), 'openai',
+                       '--port', str(openai_port), '--latency-ms', str(args.openai_latency_ms)]),
+    ]
+    results = {}
+    try:
+        wait_for_port(naver_port, '/__control')
+        wait_for_port(openai_port, '/__control')
+        for profile in profiles:
+            app_port = free_port()
+            log_path = os.path.join(tempfile.gettempdir(), f'repost-bench-{profile}.log')
+            server = start_server(profile, app_port, naver_port, openai_port, log_path)
+            try:
+                wait_for_port(app_port, '/robots.txt')
+                results[profile] = []
+                for level in levels:
+                    print(f"▶ {profile} × {level} ...", file=sys.stderr, flush=True)
+                    results[profile].append(run_timed_load(app_port, level, args.duration, args.timeout))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    finally:
+        for process in fakes:
+            process.terminate()
+
+    if args.json:
+        print(json.dumps({'config': vars(args), 'cpu_count': os.cpu_count(), 'results': results}, indent=2))
+        return
+
+    print(f"{'프로필':<10}{'동시':>6}{'완료':>7}{'오류':>6}{'처리량(rps)':>13}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for profile, rows in results.items():
+        for r in rows:
+            print(f"{profile:<10}{r['concurrency']:>6}{r['completed']:>7}{r['errors']:>6}{r['throughput_rps']:>13}"
+                  f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+
+
+if __name__ == '__main__':
+    main()
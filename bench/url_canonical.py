@@ -0,0 +1,173 @@
+"""
+🧭 URL 정규화 캐시 적중률 (URL 로그 재생)
+
+같은 글이 여러 형태의 URL(모바일/PostView/추적 파라미터/끝 슬래시/scheme 생략/인코딩 여부)로 들어오는
+분석 요청 로그를 재생해, 이전 normalize_blog_url과 플랫폼 처리기(platforms.py)의 캐시 적중률을 비교.
+
+- 적중: 이전에 본 캐시 키 (첫 요청 이후 같은 글은 모두 적중하는 것이 최대치)
+- 잘못된 적중: 다른 글과 같은 키 (다른 글의 댓글을 돌려주는 충돌 - 합성 로그에서만 확인 가능)
+- URL당 정규화 비용: 이전 구현 / 메모이즈 없이 / 메모이즈 (재생 순서대로 호출)
+
+    python bench/url_canonical.py                       # 합성 로그 (네이버 블로그/포스트, 티스토리, 브런치, velog)
+    python bench/url_canonical.py --requests 50000 --posts 2000 --json
+    python bench/url_canonical.py --log urls.txt        # 실제 URL 로그 재생 (한 줄에 URL 하나)
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import parse_qs, quote, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from platforms import resolve_url  # noqa: E402
+
+
+def legacy_normalize(url):
+    """변경 전 normalize_blog_url (비교 기준)"""
+    try:
+        parsed = urlparse(url)
+        if 'blog.naver.com' in url or 'm.blog.naver.com' in url:
+            query_params = parse_qs(parsed.query)
+            if 'blogId' in query_params and 'logNo' in query_params:
+                blog_id = query_params['blogId'][0]
+                log_no = query_params['logNo'][0]
+            else:
+                path_parts = parsed.path.strip('/').split('/')
+                if len(path_parts) >= 2:
+                    blog_id = path_parts[0]
+                    log_no = path_parts[-1]
+                else:
+                    return url
+            return f"blog.naver.com/{blog_id}/{log_no}"
+        return f"{parsed.netloc}{parsed.path}"
+    except Exception:
+        return url
+
+
+# 플랫폼별 (비중, 글 식별자 생성, URL 변형들)
+VELOG_SLUGS = ('리액트-훅-정리', '파이썬-비동기-입문', 'nextjs-배포-후기', '회고-2025')
+
+PLATFORM_MIX = {
+    'naver_blog': (0.70, lambda i: {'id': f'blogger{i % 97}', 'no': 220000000000 + i}, (
+        'https://blog.naver.com/{id}/{no}',
+        'https://m.blog.naver.com/{id}/{no}',
+        'https://m.blog.naver.com/PostView.naver?blogId={id}&logNo={no}',
+        'https://blog.naver.com/PostView.naver?blogId={id}&logNo={no}&redirect=Dlog&widgetTypeCall=true',
+        'https://m.blog.naver.com/PostView.nhn?logNo={no}&blogId={id}&proxyReferer=',
+        'https://blog.naver.com/{id}/{no}?trackingCode=rss',
+        'https://blog.naver.com/{id}?Redirect=Log&logNo={no}',
+        'blog.naver.com/{id}/{no}',
+    )),
+    'naver_post': (0.10, lambda i: {'v': 30000000 + i, 'm': 1000 + i % 53}, (
+        'https://post.naver.com/viewer/postView.naver?volumeNo={v}&memberNo={m}',
+        'https://m.post.naver.com/viewer/postView.nhn?volumeNo={v}&memberNo={m}&vType=VERTICAL',
+    )),
+    'tistory': (0.10, lambda i: {'b': f'dev{i % 41}', 'n': 100 + i}, (
+        'https://{b}.tistory.com/{n}',
+        'https://{b}.tistory.com/m/{n}',
+        'https://{b}.tistory.com/{n}?category=1043',
+        'https://{b}.tistory.com/{n}/',
+    )),
+    'brunch': (0.05, lambda i: {'a': f'writer{i % 29}', 'n': i}, (
+        'https://brunch.co.kr/@{a}/{n}',
+        'https://brunch.co.kr/@{a}/{n}/',
+        'https://www.brunch.co.kr/@{a}/{n}?utm_source=kakao',
+    )),
+    'velog': (0.05, lambda i: {'u': f'coder{i % 31}', 's': f'{VELOG_SLUGS[i % len(VELOG_SLUGS)]}-{i}'}, (
+        'https://velog.io/@{u}/{s}',
+        'https://velog.io/@{u}/{qs}',
+        'https://velog.io/@{u}/{qs}/',
+    )),
+}
+
+
+def synthetic_log(requests, posts, seed):
+    """(URL, 글 ID) 목록 - 인기 글에 요청이 몰리도록 지프 분포, URL 형태는 변형 중 무작위"""
+    rng = random.Random(seed)
+    catalog = []
+    for platform, (share, make_ids, variants) in PLATFORM_MIX.items():
+        for i in range(max(1, int(posts * share))):
+            ids = make_ids(i)
+            if 's' in ids:
+                ids['qs'] = quote(ids['s'])
+            catalog.append((f'{platform}:{i}', ids, variants))
+    rng.shuffle(catalog)
+    weights = [1 / (rank + 1) for rank in range(len(catalog))]
+    rows = []
+    for post_id, ids, variants in rng.choices(catalog, weights=weights, k=requests):
+        rows.append((rng.choice(variants).format(**ids), post_id))
+    return rows
+
+
+def simulate(rows, normalize):
+    """재생 → 적중 수 / 잘못된 적중 수 (키를 처음 만든 글과 다른 글) / 캐시 키 수"""
+    seen = {}
+    hits = wrong = 0
+    for url, post_id in rows:
+        key = normalize(url)
+        if key in seen:
+            hits += 1
+            if post_id is not None and seen[key] != post_id:
+                wrong += 1
+        else:
+            seen[key] = post_id
+    return {'hits': hits, 'wrong_hits': wrong, 'keys': len(seen)}
+
+
+def time_per_call(rows, normalize):
+    started = time.perf_counter()
+    for url, _ in rows:
+        normalize(url)
+    return (time.perf_counter() - started) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='URL 정규화 캐시 적중률 비교')
+    parser.add_argument('--requests', type=int, default=20000, help='합성 로그 요청 수')
+    parser.add_argument('--posts', type=int, default=1000, help='합성 로그 글 수')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--log', help='실제 URL 로그 파일 (한 줄에 URL 하나)')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON으로 출력')
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log, encoding='utf-8') as f:
+            rows = [(line.strip(), None) for line in f if line.strip()]
+        distinct_posts = None
+    else:
+        rows = synthetic_log(args.requests, args.posts, args.seed)
+        distinct_posts = len({post_id for _, post_id in rows})
+
+    resolve_url.cache_clear()
+    results = {
+        'legacy': simulate(rows, legacy_normalize),
+        'platforms': simulate(rows, lambda url: resolve_url(url).canonical),
+    }
+    resolve_url.cache_clear()
+    timings = {
+        'legacy': time_per_call(rows, legacy_normalize),
+        'platforms_uncached': time_per_call(rows, lambda url: resolve_url.__wrapped__(url).canonical),
+        'platforms_memoized': time_per_call(rows, lambda url: resolve_url(url).canonical),
+    }
+    max_hits = len(rows) - distinct_posts if distinct_posts else None
+
+    if args.json:
+        print(json.dumps({'requests': len(rows), 'distinct_posts': distinct_posts, 'max_hits': max_hits,
+                          'results': results, 'per_call_us': timings}, indent=2))
+        return
+
+    print(f"🧭 URL 정규화 캐시 적중률 ({len(rows)}개 요청"
+          + (f", 글 {distinct_posts}개 → 최대 적중 {max_hits / len(rows):.1%})" if max_hits else ")"))
+    for name, r in results.items():
+        print(f"  {name:<10} 적중률 {r['hits'] / len(rows):6.1%}  캐시 키 {r['keys']:>6}개  "
+              f"잘못된 적중 {r['wrong_hits']}건")
+    print("  URL당 정규화 비용: " + ', '.join(f"{name} {us:.2f}µs" for name, us in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
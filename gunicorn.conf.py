@@ -0,0 +1,77 @@
+"""
+gunicorn 설정 (gunicorn app:app 실행 시 현재 디렉터리의 이 파일을 자동으로 읽음)
+
+분석 요청은 대부분 네이버/OpenAI 응답을 기다리는 I/O 대기 → 워커 하나가 여러 요청을 동시에 처리하도록
+- gthread (기본): 워커당 스레드 GUNICORN_THREADS개
+- gevent: 워커당 그린렛 GUNICORN_WORKER_CONNECTIONS개 (pip install gevent 필요, 없으면 gthread로 대체)
+- sync: 이전 동작 (워커 하나가 요청 하나)
+- uvicorn: asgi:application 실행용 (분석 요청을 이벤트 루프에서 비동기로 처리 - asgi.py 참고)
+    GUNICORN_WORKER_CLASS=uvicorn gunicorn -c gunicorn.conf.py asgi:application
+
+preload_app: 마스터에서 앱을 한 번 임포트한 뒤 포크 → 워커 시작이 빠르고 메모리 공유
+포크 전에 만든 연결/스레드는 워커에서 쓰지 않도록 post_fork에서 app.reinit_after_fork() 호출
+"""
+
+import glob
+import os
+import sys
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent':
+    try:
+        import trio  # noqa: F401 - 설치돼 있으면 httpcore(OpenAI SDK)가 임포트하는데, 패치 후엔 select.epoll이 없어 실패
+    except ImportError:
+        pass
+    try:
+        # preload_app이 앱을 임포트하기 전에 패치해야 앱의 잠금/소켓이 협력형으로 동작
+        from gevent import monkey
+        monkey.patch_all()
+        # 로그 리스너 "스레드"가 그린렛이 되면 포크 후 워커에 부모의 그린렛이 그대로 남아 허브를 막음
+        # → 동기 출력 (그린렛 하나뿐인 리스너로는 어차피 병렬 처리 이득 없음)
+        os.environ.setdefault('LOG_ASYNC', '0')
+    except ImportError:
+        print("⚠️ gevent 미설치 - gthread 워커 사용", file=sys.stderr)
+        worker_class = 'gthread'
+elif worker_class == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '500'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))  # OpenAI 재시도까지 고려
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))  # 0 = 워커 재시작 안 함
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    """📈 마스터 시작 시 이전 실행의 Prometheus 워커 파일 정리"""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def when_ready(server):
+    """🧵 preload된 앱이 요청 중에 지연 임포트하는 모듈을 포크 전에 미리 임포트"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.preload_lazy_modules()
+
+
+def post_fork(server, worker):
+    """🧵 preload된 앱의 클라이언트를 워커용으로 초기화 (preload를 끄면 아직 임포트 전이라 할 일 없음)"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.reinit_after_fork()
+
+
+def child_exit(server, worker):
+    """📈 종료된 워커의 live* 게이지 제거"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,180 @@
+"""
+🧭 블로그 플랫폼 처리기 (URL 정규화 + 본문 주소 + 추출 셀렉터)
+
+같은 글이 여러 형태의 URL로 들어옴 (모바일/데스크톱, PostView 쿼리, 추적 파라미터, 끝 슬래시, scheme 생략,
+퍼센트 인코딩 여부...) → 플랫폼 처리기가 URL에서 글 식별자만 뽑아 다음을 결정:
+
+- canonical: 캐시 키에 쓰는 정규 주소 (같은 글이면 항상 같은 문자열, 추적 파라미터 무시)
+- fetch_url: 실제로 요청할 본문 주소 (네이버 블로그는 iframe 없는 PostView)
+- 제목/본문 셀렉터: 플랫폼 마크업에 맞춘 우선순위
+
+정규식은 모듈 로드 시 한 번 컴파일하고, 결과는 URL별로 메모이즈 (resolve_url).
+처리기 추가 = PLATFORMS에 PlatformHandler 하나 추가 (앞에 있을수록 먼저 검사).
+어느 처리기에도 맞지 않으면 기존 동작 (도메인 + 경로, 일반 셀렉터, 원래 주소로 요청).
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+# 네이버 블로그 본문 조회 주소 (벤치마크에서는 로컬 가짜 서버로 교체)
+NAVER_BLOG_BASE_URL = os.environ.get('NAVER_BLOG_BASE_URL', 'https://blog.naver.com').rstrip('/')
+
+RESOLVE_CACHE_SIZE = 4096  # 메모이즈할 URL 수 (LRU)
+
+# 기존 스크래퍼의 셀렉터 (네이버 기준) - 처리기가 없는 사이트도 그대로 사용
+DEFAULT_TITLE_SELECTORS = ('meta[property="og:title"]', 'title', '.se-title-text', '.pcol1')
+DEFAULT_CONTENT_SELECTORS = ('meta[property="og:description"]', '.se-main-container', '#postViewArea',
+                             '.post-view', 'article')
+
+# 쿼리에서 가져온 식별자 허용 문자 (본문 주소에 그대로 들어가므로)
+_SAFE_ID = re.compile(r'[\w.-]+')
+
+
+class ResolvedUrl(NamedTuple):
+    platform: str
+    canonical: str
+    fetch_url: str
+
+
+class PlatformHandler:
+    """
+    플랫폼 하나의 URL 규칙
+
+    - label: 대시보드 표시 이름
+    - hosts: 호스트 정규식 (www. 제거, 소문자) - 이름 있는 그룹은 식별자로 사용
+    - routes: ((경로 정규식, {식별자: 쿼리 파라미터} 또는 None), ...) - 앞에서부터 처음 맞는 규칙 사용
+    - canonical / fetch: 식별자로 채우는 형식 문자열
+    """
+
+    def __init__(self, name, label, hosts, routes, canonical, fetch,
+                 title_selectors=DEFAULT_TITLE_SELECTORS, content_selectors=DEFAULT_CONTENT_SELECTORS):
+        self.name = name
+        self.label = label
+        self.hosts = re.compile(hosts)
+        self.routes = tuple((re.compile(path), query) for path, query in routes)
+        self.canonical = canonical
+        self.fetch = fetch
+        self.title_selectors = title_selectors
+        self.content_selectors = content_selectors
+
+    def match(self, host, path, query):
+        """URL 조각 → 식별자 dict (이 플랫폼의 글 주소가 아니면 None)"""
+        host_match = self.hosts.fullmatch(host)
+        if not host_match:
+            return None
+        params = None
+        for pattern, query_ids in self.routes:
+            path_match = pattern.fullmatch(path)
+            if not path_match:
+                continue
+            ids = {**host_match.groupdict(), **path_match.groupdict()}
+            if query_ids:
+                if params is None:
+                    params = parse_qs(query)
+                values = {name: params.get(param, [''])[0] for name, param in query_ids.items()}
+                if not all(_SAFE_ID.fullmatch(value) for value in values.values()):
+                    continue
+                ids.update(values)
+            return ids
+        return None
+
+    def resolve(self, ids):
+        return ResolvedUrl(self.name, self.canonical.format(**ids), self.fetch.format(**ids))
+
+
+PLATFORMS = (
+    PlatformHandler(
+        'naver_blog', '네이버 블로그',
+        hosts=r'(?:m\.)?blog\.naver\.com',
+        routes=(
+            (r'/(?P<blog_id>[\w-]+)/(?P<log_no>\d+)', None),  # 데스크톱/모바일 /아이디/글번호
+            (r'/(?:PostView|PostList)\.(?:naver|nhn)', {'blog_id': 'blogId', 'log_no': 'logNo'}),
+            (r'/(?P<blog_id>[\w-]+)', {'log_no': 'logNo'}),  # /아이디?Redirect=Log&logNo=
+        ),
+        canonical='blog.naver.com/{blog_id}/{log_no}',  # 기존 캐시 키와 같은 형식
+        fetch=NAVER_BLOG_BASE_URL + '/PostView.naver?blogId={blog_id}&logNo={log_no}',
+    ),
+    PlatformHandler(
+        'naver_post', '네이버 포스트',
+        hosts=r'(?:m\.)?post\.naver\.com',
+        routes=((r'/viewer/postView\.(?:naver|nhn)', {'volume_no': 'volumeNo'}),),
+        canonical='post.naver.com/{volume_no}',
+        fetch='https://post.naver.com/viewer/postView.naver?volumeNo={volume_no}',
+        content_selectors=('meta[property="og:description"]', '.se_component_wrap', '#cont', 'article'),
+    ),
+    PlatformHandler(
+        'tistory', '티스토리',
+        hosts=r'(?P<blog>[a-z0-9-]+)\.tistory\.com',
+        routes=((r'/(?:m/)?(?P<post>\d+|entry/[^/]+)', None),),  # /m/ = 모바일
+        canonical='{blog}.tistory.com/{post}',
+        fetch='https://{blog}.tistory.com/{post}',
+        title_selectors=('meta[property="og:title"]', '.title-article', '.tit_post', 'title'),
+        content_selectors=('.tt_article_useless_p_margin', '#article-view', '.entry-content', '.article-view',
+                           'article', 'meta[property="og:description"]'),
+    ),
+    PlatformHandler(
+        'brunch', '브런치',
+        hosts=r'brunch\.co\.kr',
+        routes=((r'/@(?P<author>[\w.-]+)/(?P<no>\d+)', None),),
+        canonical='brunch.co.kr/@{author}/{no}',
+        fetch='https://brunch.co.kr/@{author}/{no}',
+        title_selectors=('meta[property="og:title"]', '.cover_title', 'title'),
+        content_selectors=('.wrap_body', 'meta[property="og:description"]'),
+    ),
+    PlatformHandler(
+        'velog', 'velog',
+        hosts=r'velog\.io',
+        routes=((r'/@(?P<user>[\w.-]+)/(?P<slug>[^/]+)', None),),
+        canonical='velog.io/@{user}/{slug}',
+        fetch='https://velog.io/@{user}/{slug}',
+        title_selectors=('meta[property="og:title"]', 'h1', 'title'),
+        content_selectors=('.atom-one', 'meta[property="og:description"]'),
+    ),
+)
+
+_HANDLERS = {handler.name: handler for handler in PLATFORMS}
+GENERIC_LABEL = '기타'
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve_url(url):
+    """
+    블로그 URL → ResolvedUrl(platform, canonical, fetch_url)
+
+    처리기가 없으면 platform='generic': 도메인 + 경로를 키로, 원래 주소로 요청
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url  # 주소창에서 복사하며 scheme이 빠진 경우
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+    except ValueError:
+        return ResolvedUrl('generic', url, url)
+    if host.startswith('www.'):
+        host = host[4:]
+    # 인코딩된/안 된 한글 슬러그를 같은 키로 (퍼센트 인코딩으로 통일), 끝 슬래시 무시
+    path = quote(unquote(parts.path), safe='/@').rstrip('/')
+
+    for handler in PLATFORMS:
+        ids = handler.match(host, path, parts.query)
+        if ids is not None:
+            return handler.resolve(ids)
+    return ResolvedUrl('generic', f'{host}{path}', url)
+
+
+def platform_selectors(platform):
+    """플랫폼 이름 → (제목 셀렉터, 본문 셀렉터)"""
+    handler = _HANDLERS.get(platform)
+    if handler is None:
+        return DEFAULT_TITLE_SELECTORS, DEFAULT_CONTENT_SELECTORS
+    return handler.title_selectors, handler.content_selectors
+
+
+def platform_label(platform):
+    """플랫폼 이름 → 대시보드 표시 이름 (처리기가 없으면 '기타')"""
+    handler = _HANDLERS.get(platform)
+    return handler.label if handler else GENERIC_LABEL
@@ -0,0 +1,1027 @@
+"""
+💽 저장소 백엔드 (Redis 호환 인터페이스)
+
+app.py는 캐시/통계/추천/보너스를 모두 Redis 명령 형태(get/set/incr/sadd/hincrby/pipeline...)로 호출.
+Redis가 없는 환경(로컬 벤치마크, 테스트, 단일 서버 배포)에서도 같은 코드가 그대로 동작하도록
+동일한 명령 집합을 구현한 백엔드를 제공.
+
+- MemoryStorage: 프로세스 내 딕셔너리 (가장 빠름, 재시작 시 초기화)
+- SQLiteStorage: SQLite WAL 파일 (단일 노드, 여러 워커 프로세스가 공유, 재시작 후에도 유지)
+
+Redis 백엔드는 app.py의 ManagedRedis가 담당 (redis-py를 그대로 프록시).
+
+반환값은 redis-py(decode_responses=True)와 동일: 문자열/정수/집합/딕셔너리, 없으면 None
+"""
+
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# 명령 이름 → 파이프라인에서 허용되는 명령 (쓰기/읽기 모두)
+STORAGE_COMMANDS = (
+    'get', 'set', 'setex', 'mget', 'delete', 'exists', 'expire', 'ttl',
+    'incr', 'incrby', 'decr',
+    'sadd', 'srem', 'scard', 'smembers', 'sismember', 'sunionstore',
+    'lpush', 'rpush', 'lrange', 'ltrim', 'llen',
+    'hset', 'hsetnx', 'hget', 'hgetall', 'hincrby', 'hdel',
+    'zadd', 'zincrby', 'zscore', 'zcard', 'zrem', 'zrevrange', 'zrevrank',
+    'publish',
+)
+
+
+class StorageError(Exception):
+    """잘못된 타입 접근 등 명령 오류 (redis의 WRONGTYPE에 해당)"""
+
+
+def _to_str(value):
+    """redis-py처럼 값은 문자열로 저장"""
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise StorageError('value is not an integer or out of range')
+
+
+def _range_slice(items, start, end):
+    """Redis 범위 인덱스(양끝 포함, 음수는 뒤에서부터)로 자르기"""
+    count = len(items)
+    start = max(count + start, 0) if start < 0 else start
+    end = count + end if end < 0 else end
+    return items[start:end + 1]
+
+
+# ============================
+# 📡 프로세스 내 Pub/Sub
+# ============================
+
+class LocalPubSub:
+    """redis-py PubSub의 subscribe/get_message/close 부분 구현 (같은 프로세스 안에서만 전달)"""
+
+    def __init__(self, hub, ignore_subscribe_messages=False):
+        self._hub = hub
+        self._queue = queue.Queue(maxsize=10000)
+        self._channels = set()
+        self._ignore_subscribe_messages = ignore_subscribe_messages
+
+    def subscribe(self, *channels):
+        for channel in channels:
+            self._channels.add(channel)
+            self._hub.add(channel, self)
+            if not self._ignore_subscribe_messages:
+                self._deliver({'type': 'subscribe', 'pattern': None, 'channel': channel, 'data': len(self._channels)})
+
+    def _deliver(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            pass  # 느린 구독자는 메시지 유실 (Redis의 출력 버퍼 한도와 같은 동작)
+
+    def get_message(self, timeout=0.0, **kwargs):
+        try:
+            if timeout:
+                return self._queue.get(timeout=timeout)
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        for channel in self._channels:
+            self._hub.remove(channel, self)
+        self._channels.clear()
+
+
+class _PubSubHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def add(self, channel, subscriber):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+
+    def remove(self, channel, subscriber):
+        with self._lock:
+            self._subscribers.get(channel, set()).discard(subscriber)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber._deliver({'type': 'message', 'pattern': None, 'channel': channel, 'data': _to_str(message)})
+        return len(subscribers)
+
+
+# ============================
+# 🧺 파이프라인
+# ============================
+
+class StoragePipeline:
+    """
+    명령을 모아 execute()에서 한 트랜잭션으로 실행 (redis-py Pipeline 호환)
+
+    명령 메서드는 체이닝을 위해 self를 반환하고, len()은 대기 중인 명령 수
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+        self._commands = []
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __getattr__(self, name):
+        if name not in STORAGE_COMMANDS:
+            raise AttributeError(f"파이프라인에서 지원하지 않는 명령: {name}")
+
+        def queue_command(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue_command
+
+    def execute(self, raise_on_error=True):
+        commands, self._commands = self._commands, []
+        results = []
+        with self._storage._transaction():
+            for name, args, kwargs in commands:
+                try:
+                    results.append(getattr(self._storage, name)(*args, **kwargs))
+                except StorageError as e:
+                    if raise_on_error:
+                        raise
+                    results.append(e)
+        return results
+
+    def reset(self):
+        self._commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.reset()
+
+
+class StorageScript:
+    """
+    여러 명령을 한 번에 원자적으로 실행하는 스크립트 (Redis Lua + 같은 동작의 파이썬 구현)
+
+    - Redis: EVALSHA (서버 스크립트 캐시에 없으면 EVAL) → 다른 클라이언트 명령이 끼어들 수 없음
+    - memory/sqlite: 백엔드 트랜잭션(잠금 / BEGIN IMMEDIATE) 안에서 fallback(storage, keys, args) 실행
+
+    두 구현은 같은 키/인자를 받아 같은 값을 반환해야 함 (Lua 숫자 반환값은 정수로 잘림에 주의)
+    """
+
+    def __init__(self, lua, fallback):
+        self.lua = lua
+        self.fallback = fallback
+        self.sha = hashlib.sha1(lua.encode()).hexdigest()
+
+    def __call__(self, storage, keys, args):
+        if hasattr(storage, '_transaction'):
+            with storage._transaction():
+                return self.fallback(storage, list(keys), list(args))
+        from redis.exceptions import NoScriptError
+
+        try:
+            return storage.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return storage.eval(self.lua, len(keys), *keys, *args)
+
+    async def run_async(self, client, keys, args):
+        """redis.asyncio 클라이언트로 실행 (asgi.py - memory/sqlite는 __call__ 사용)"""
+        from redis.exceptions import NoScriptError
+
+        try:
+            return await client.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return await client.eval(self.lua, len(keys), *keys, *args)
+
+
+# ============================
+# 🧠 메모리 백엔드
+# ============================
+
+class _ZSet(dict):
+    """정렬 집합 (멤버 → 점수)"""
+
+    def ranked(self):
+        """점수 내림차순 (같은 점수는 멤버 역순 - Redis ZREVRANGE와 동일)"""
+        return sorted(self.items(), key=lambda item: (item[1], item[0]), reverse=True)
+
+
+class MemoryStorage:
+    """
+    프로세스 내 딕셔너리 저장소
+
+    값 타입: str / set / list / dict / _ZSet (키당 하나), 만료는 접근 시점 + 주기적 정리로 처리
+    """
+
+    backend = 'memory'
+    SWEEP_EVERY = 1000  # 쓰기 N번마다 만료 키 일괄 정리
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+        self._writes = 0
+        self._hub = _PubSubHub()
+
+    def __bool__(self):
+        return True
+
+    # ---------- 내부 ----------
+
+    @contextmanager
+    def _transaction(self, write=True):
+        with self._lock:
+            yield
+
+    def _alive(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return False
+        return key in self._data
+
+    def _typed(self, key, kind):
+        """키의 값을 kind 타입으로 반환 (없으면 None, 타입이 다르면 StorageError)"""
+        if not self._alive(key):
+            return None
+        value = self._data[key]
+        if type(value) is not kind:  # _ZSet은 dict 하위 클래스 → 해시와 구분
+            raise StorageError('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return value
+
+    def _container(self, key, kind):
+        value = self._typed(key, kind)
+        if value is None:
+            value = self._data[key] = kind()
+        return value
+
+    def _touch(self):
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            now = time.time()
+            for key in [k for k, deadline in self._expires.items() if deadline <= now]:
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+
+    def _drop_if_empty(self, key):
+        if key in self._data and not self._data[key]:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    # ---------- 공통 ----------
+
+    def ping(self):
+        return True
+
+    def pipeline(self, transaction=True):
+        return StoragePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return LocalPubSub(self._hub, ignore_subscribe_messages)
+
+    def publish(self, channel, message):
+        return self._hub.publish(channel, message)
+
+    def connection_stats(self):
+        with self._lock:
+            return {'backend': self.backend, 'state': 'up', 'keys': len(self._data)}
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+        return True
+
+    # ---------- 키/문자열 ----------
+
+    def get(self, key):
+        with self._lock:
+            return self._typed(key, str)
+
+    def mget(self, keys, *args):
+        keys = list(keys) if isinstance(keys, (list, tuple)) else [keys, *args]
+        with self._lock:
+            return [self._typed(key, str) for key in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False, xx=False):
+        with self._lock:
+            exists = self._alive(key)
+            if (nx and exists) or (xx and not exists):
+                return None
+            self._data[key] = _to_str(value)
+            self._expires.pop(key, None)
+            if ex is not None or px is not None:
+                self._expires[key] = time.time() + (ex if ex is not None else px / 1000)
+            self._touch()
+            return True
+
+    def setex(self, key, time_seconds, value):
+        return self.set(key, value, ex=int(getattr(time_seconds, 'total_seconds', lambda: time_seconds)()))
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def expire(self, key, time_seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.time() + int(getattr(time_seconds, 'total_seconds', lambda: time_seconds)())
+            return True
+
+    def ttl(self, key):
+        with self._lock:
+            if not self._alive(key):
+                return -2
+            deadline = self._expires.get(key)
+            return -1 if deadline is None else max(0, int(round(deadline - time.time())))
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            current = self._typed(key, str)
+            value = (_parse_int(current) if current is not None else 0) + int(amount)
+            self._data[key] = str(value)
+            self._touch()
+            return value
+
+    def incr(self, key, amount=1):
+        return self.incrby(key, amount)
+
+    def decr(self, key, amount=1):
+        return self.incrby(key, -amount)
+
+    # ---------- 집합 ----------
+
+    def sadd(self, key, *members):
+        with self._lock:
+            target = self._container(key, set)
+            before = len(target)
+            target.update(_to_str(m) for m in members)
+            self._touch()
+            return len(target) - before
+
+    def srem(self, key, *members):
+        with self._lock:
+            target = self._typed(key, set)
+            if target is None:
+                return 0
+            before = len(target)
+            target.difference_update(_to_str(m) for m in members)
+            removed = before - len(target)
+            self._drop_if_empty(key)
+            return removed
+
+    def scard(self, key):
+        with self._lock:
+            return len(self._typed(key, set) or ())
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._typed(key, set) or ())
+
+    def sismember(self, key, member):
+        with self._lock:
+            return _to_str(member) in (self._typed(key, set) or ())
+
+    def sunionstore(self, dest, keys, *args):
+        keys = list(keys) if isinstance(keys, (list, tuple)) else [keys, *args]
+        with self._lock:
+            union = set()
+            for key in keys:
+                union |= self._typed(key, set) or set()
+            self._data.pop(dest, None)
+            self._expires.pop(dest, None)
+            if union:
+                self._data[dest] = union
+            self._touch()
+            return len(union)
+
+    # ---------- 리스트 ----------
+
+    def lpush(self, key, *values):
+        with self._lock:
+            target = self._container(key, list)
+            for value in values:
+                target.insert(0, _to_str(value))
+            self._touch()
+            return len(target)
+
+    def rpush(self, key, *values):
+        with self._lock:
+            target = self._container(key, list)
+            target.extend(_to_str(v) for v in values)
+            self._touch()
+            return len(target)
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._typed(key, list) or []
+            end = len(items) if end == -1 else end + 1
+            return items[start:end] if start >= 0 else items[len(items) + start:end]
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            items = self._typed(key, list)
+            if items is not None:
+                self._data[key] = self.lrange(key, start, end)
+                self._drop_if_empty(key)
+            return True
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._typed(key, list) or ())
+
+    # ---------- 해시 ----------
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self._lock:
+            target = self._container(key, dict)
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            added = sum(1 for f in items if _to_str(f) not in target)
+            target.update({_to_str(f): _to_str(v) for f, v in items.items()})
+            self._touch()
+            return added
+
+    def hsetnx(self, key, field, value):
+        with self._lock:
+            target = self._container(key, dict)
+            field = _to_str(field)
+            if field in target:
+                return 0
+            target[field] = _to_str(value)
+            self._touch()
+            return 1
+
+    def hget(self, key, field):
+        with self._lock:
+            return (self._typed(key, dict) or {}).get(_to_str(field))
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._typed(key, dict) or {})
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            target = self._container(key, dict)
+            field = _to_str(field)
+            value = _parse_int(target.get(field, 0)) + int(amount)
+            target[field] = str(value)
+            self._touch()
+            return value
+
+    def hdel(self, key, *fields):
+        with self._lock:
+            target = self._typed(key, dict)
+            if target is None:
+                return 0
+            removed = sum(1 for f in fields if target.pop(_to_str(f), None) is not None)
+            self._drop_if_empty(key)
+            return removed
+
+    # ---------- 정렬 집합 ----------
+
+    def zadd(self, key, mapping, nx=False, xx=False):
+        with self._lock:
+            target = self._container(key, _ZSet)
+            added = 0
+            for member, score in mapping.items():
+                member = _to_str(member)
+                exists = member in target
+                if (nx and exists) or (xx and not exists):
+                    continue
+                added += 0 if exists else 1
+                target[member] = float(score)
+            self._drop_if_empty(key)
+            self._touch()
+            return added
+
+    def zincrby(self, key, amount, value):
+        with self._lock:
+            target = self._container(key, _ZSet)
+            member = _to_str(value)
+            target[member] = target.get(member, 0.0) + float(amount)
+            self._touch()
+            return target[member]
+
+    def zscore(self, key, value):
+        with self._lock:
+            return (self._typed(key, _ZSet) or {}).get(_to_str(value))
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._typed(key, _ZSet) or ())
+
+    def zrem(self, key, *values):
+        with self._lock:
+            target = self._typed(key, _ZSet)
+            if target is None:
+                return 0
+            removed = sum(1 for v in values if target.pop(_to_str(v), None) is not None)
+            self._drop_if_empty(key)
+            return removed
+
+    def zrevrange(self, key, start, end, withscores=False):
+        with self._lock:
+            ranked = _range_slice((self._typed(key, _ZSet) or _ZSet()).ranked(), start, end)
+            return ranked if withscores else [member for member, _ in ranked]
+
+    def zrevrank(self, key, value):
+        with self._lock:
+            target = self._typed(key, _ZSet)
+            member = _to_str(value)
+            if target is None or member not in target:
+                return None
+            return [m for m, _ in target.ranked()].index(member)
+
+
+# ============================
+# 🗄️ SQLite (WAL) 백엔드
+# ============================
+
+class SQLiteStorage:
+    """
+    SQLite WAL 파일 저장소 (단일 노드 배포용)
+
+    - kv: 키마다 한 행 (kind = string/list/set/hash/zset, 만료 시각)
+    - kv_members: 집합 원소/해시 필드 (원소 하나 추가가 전체 재작성이 되지 않도록 분리)
+    - 여러 워커 프로세스가 같은 파일 공유 (BEGIN IMMEDIATE로 명령 단위 원자성)
+    - Pub/Sub은 프로세스 내에서만 전달 (워커 간 전달 없음)
+    """
+
+    backend = 'sqlite'
+    SWEEP_EVERY = 1000
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS kv ('
+        ' key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT, expires_at REAL)',
+        'CREATE TABLE IF NOT EXISTS kv_members ('
+        ' key TEXT NOT NULL, field TEXT NOT NULL, value TEXT, PRIMARY KEY (key, field)) WITHOUT ROWID',
+        'CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at) WHERE expires_at IS NOT NULL',
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hub = _PubSubHub()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        with self._transaction():
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def __bool__(self):
+        return True
+
+    # ---------- 내부 ----------
+
+    def _conn(self):
+        """스레드/프로세스별 커넥션 (포크 후에는 새로 연결)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # WAL에서는 커밋마다 fsync 생략해도 손상 없음
+            conn.execute('PRAGMA busy_timeout=10000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def _transaction(self, write=True):
+        """
+        중첩 가능한 쓰기 트랜잭션 (파이프라인 전체가 한 번의 커밋)
+
+        읽기 전용(write=False)은 트랜잭션 없이 autocommit으로 실행 → 쓰기 잠금을 잡지 않음
+        """
+        conn = self._conn()
+        if not write and not self._local.depth:
+            yield conn
+            return
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+        finally:
+            self._local.depth = 0
+
+    def _kind(self, conn, key, expected=None):
+        """살아 있는 키의 kind (없거나 만료면 None, 타입이 다르면 StorageError)"""
+        row = conn.execute('SELECT kind, expires_at FROM kv WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        kind, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self._remove(conn, key)
+            return None
+        if expected and kind != expected:
+            raise StorageError('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return kind
+
+    def _remove(self, conn, key):
+        conn.execute('DELETE FROM kv WHERE key = ?', (key,))
+        conn.execute('DELETE FROM kv_members WHERE key = ?', (key,))
+
+    def _ensure(self, conn, key, kind):
+        if self._kind(conn, key, kind) is None:
+            conn.execute('INSERT INTO kv (key, kind) VALUES (?, ?)', (key, kind))
+
+    def _drop_if_empty(self, conn, key):
+        if conn.execute('SELECT 1 FROM kv_members WHERE key = ? LIMIT 1', (key,)).fetchone() is None:
+            self._remove(conn, key)
+
+    def _touch(self, conn):
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            expired = [row[0] for row in conn.execute(
+                'SELECT key FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))]
+            for key in expired:
+                self._remove(conn, key)
+
+    def _get_string(self, conn, key):
+        if self._kind(conn, key, 'string') is None:
+            return None
+        return conn.execute('SELECT value FROM kv WHERE key = ?', (key,)).fetchone()[0]
+
+    # ---------- 공통 ----------
+
+    def ping(self):
+        self._conn().execute('SELECT 1')
+        return True
+
+    def pipeline(self, transaction=True):
+        return StoragePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return LocalPubSub(self._hub, ignore_subscribe_messages)
+
+    def publish(self, channel, message):
+        return self._hub.publish(channel, message)
+
+    def connection_stats(self):
+        conn = self._conn()
+        return {
+            'backend': self.backend,
+            'state': 'up',
+            'path': self.path,
+            'keys': conn.execute('SELECT COUNT(*) FROM kv').fetchone()[0],
+        }
+
+    def flushall(self):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM kv')
+            conn.execute('DELETE FROM kv_members')
+        return True
+
+    # ---------- 키/문자열 ----------
+
+    def get(self, key):
+        with self._transaction(write=False) as conn:
+            return self._get_string(conn, key)
+
+    def mget(self, keys, *args):
+        keys = list(keys) if isinstance(keys, (list, tuple)) else [keys, *args]
+        with self._transaction(write=False) as conn:
+            return [self._get_string(conn, key) for key in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False, xx=False):
+        with self._transaction() as conn:
+            exists = self._kind(conn, key) is not None
+            if (nx and exists) or (xx and not exists):
+                return None
+            expires_at = None
+            if ex is not None or px is not None:
+                expires_at = time.time() + (ex if ex is not None else px / 1000)
+            self._remove(conn, key)
+            conn.execute('INSERT INTO kv (key, kind, value, expires_at) VALUES (?, ?, ?, ?)',
+                         (key, 'string', _to_str(value), expires_at))
+            self._touch(conn)
+            return True
+
+    def setex(self, key, time_seconds, value):
+        return self.set(key, value, ex=int(getattr(time_seconds, 'total_seconds', lambda: time_seconds)()))
+
+    def delete(self, *keys):
+        with self._transaction() as conn:
+            removed = 0
+            for key in keys:
+                if self._kind(conn, key) is not None:
+                    removed += 1
+                    self._remove(conn, key)
+            return removed
+
+    def exists(self, *keys):
+        with self._transaction(write=False) as conn:
+            return sum(1 for key in keys if self._kind(conn, key) is not None)
+
+    def expire(self, key, time_seconds):
+        with self._transaction() as conn:
+            if self._kind(conn, key) is None:
+                return False
+            seconds = int(getattr(time_seconds, 'total_seconds', lambda: time_seconds)())
+            conn.execute('UPDATE kv SET expires_at = ? WHERE key = ?', (time.time() + seconds, key))
+            return True
+
+    def ttl(self, key):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key) is None:
+                return -2
+            expires_at = conn.execute('SELECT expires_at FROM kv WHERE key = ?', (key,)).fetchone()[0]
+            return -1 if expires_at is None else max(0, int(round(expires_at - time.time())))
+
+    def incrby(self, key, amount=1):
+        with self._transaction() as conn:
+            current = self._get_string(conn, key)
+            value = (_parse_int(current) if current is not None else 0) + int(amount)
+            if current is None:
+                conn.execute('INSERT INTO kv (key, kind, value) VALUES (?, ?, ?)', (key, 'string', str(value)))
+            else:
+                conn.execute('UPDATE kv SET value = ? WHERE key = ?', (str(value), key))
+            self._touch(conn)
+            return value
+
+    def incr(self, key, amount=1):
+        return self.incrby(key, amount)
+
+    def decr(self, key, amount=1):
+        return self.incrby(key, -amount)
+
+    # ---------- 집합 (kv_members.field = 원소) ----------
+
+    def sadd(self, key, *members):
+        with self._transaction() as conn:
+            self._ensure(conn, key, 'set')
+            added = 0
+            for member in members:
+                added += conn.execute('INSERT OR IGNORE INTO kv_members (key, field) VALUES (?, ?)',
+                                      (key, _to_str(member))).rowcount
+            self._touch(conn)
+            return added
+
+    def srem(self, key, *members):
+        with self._transaction() as conn:
+            if self._kind(conn, key, 'set') is None:
+                return 0
+            removed = sum(conn.execute('DELETE FROM kv_members WHERE key = ? AND field = ?',
+                                       (key, _to_str(m))).rowcount for m in members)
+            self._drop_if_empty(conn, key)
+            return removed
+
+    def scard(self, key):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'set') is None:
+                return 0
+            return conn.execute('SELECT COUNT(*) FROM kv_members WHERE key = ?', (key,)).fetchone()[0]
+
+    def smembers(self, key):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'set') is None:
+                return set()
+            return {row[0] for row in conn.execute('SELECT field FROM kv_members WHERE key = ?', (key,))}
+
+    def sismember(self, key, member):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'set') is None:
+                return False
+            return conn.execute('SELECT 1 FROM kv_members WHERE key = ? AND field = ?',
+                                (key, _to_str(member))).fetchone() is not None
+
+    def sunionstore(self, dest, keys, *args):
+        keys = list(keys) if isinstance(keys, (list, tuple)) else [keys, *args]
+        with self._transaction() as conn:
+            live = [key for key in keys if self._kind(conn, key, 'set') is not None]
+            self._remove(conn, dest)
+            if live:
+                conn.execute('INSERT INTO kv (key, kind) VALUES (?, ?)', (dest, 'set'))
+                placeholders = ','.join('?' * len(live))
+                conn.execute(f'INSERT OR IGNORE INTO kv_members (key, field) '
+                             f'SELECT ?, field FROM kv_members WHERE key IN ({placeholders})', (dest, *live))
+                self._drop_if_empty(conn, dest)
+            self._touch(conn)
+            return conn.execute('SELECT COUNT(*) FROM kv_members WHERE key = ?', (dest,)).fetchone()[0]
+
+    # ---------- 리스트 (kv.value = JSON 배열, 로그/최근 목록 정도의 짧은 리스트용) ----------
+
+    def _get_list(self, conn, key):
+        if self._kind(conn, key, 'list') is None:
+            return None
+        return json.loads(conn.execute('SELECT value FROM kv WHERE key = ?', (key,)).fetchone()[0])
+
+    def _put_list(self, conn, key, items):
+        if not items:
+            self._remove(conn, key)
+        elif conn.execute('UPDATE kv SET value = ? WHERE key = ?', (json.dumps(items), key)).rowcount == 0:
+            conn.execute('INSERT INTO kv (key, kind, value) VALUES (?, ?, ?)', (key, 'list', json.dumps(items)))
+
+    def lpush(self, key, *values):
+        with self._transaction() as conn:
+            items = self._get_list(conn, key) or []
+            items[:0] = [_to_str(v) for v in reversed(values)]
+            self._put_list(conn, key, items)
+            self._touch(conn)
+            return len(items)
+
+    def rpush(self, key, *values):
+        with self._transaction() as conn:
+            items = self._get_list(conn, key) or []
+            items.extend(_to_str(v) for v in values)
+            self._put_list(conn, key, items)
+            self._touch(conn)
+            return len(items)
+
+    def lrange(self, key, start, end):
+        with self._transaction(write=False) as conn:
+            items = self._get_list(conn, key) or []
+        end = len(items) if end == -1 else end + 1
+        return items[start:end] if start >= 0 else items[len(items) + start:end]
+
+    def ltrim(self, key, start, end):
+        with self._transaction() as conn:
+            if self._get_list(conn, key) is not None:
+                self._put_list(conn, key, self.lrange(key, start, end))
+            return True
+
+    def llen(self, key):
+        with self._transaction(write=False) as conn:
+            return len(self._get_list(conn, key) or ())
+
+    # ---------- 해시 (kv_members.field/value) ----------
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        with self._transaction() as conn:
+            self._ensure(conn, key, 'hash')
+            added = 0
+            for f, v in items.items():
+                exists = conn.execute('SELECT 1 FROM kv_members WHERE key = ? AND field = ?',
+                                      (key, _to_str(f))).fetchone()
+                added += 0 if exists else 1
+                conn.execute('INSERT OR REPLACE INTO kv_members (key, field, value) VALUES (?, ?, ?)',
+                             (key, _to_str(f), _to_str(v)))
+            self._touch(conn)
+            return added
+
+    def hsetnx(self, key, field, value):
+        with self._transaction() as conn:
+            self._ensure(conn, key, 'hash')
+            inserted = conn.execute('INSERT OR IGNORE INTO kv_members (key, field, value) VALUES (?, ?, ?)',
+                                    (key, _to_str(field), _to_str(value))).rowcount
+            self._touch(conn)
+            return inserted
+
+    def hget(self, key, field):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'hash') is None:
+                return None
+            row = conn.execute('SELECT value FROM kv_members WHERE key = ? AND field = ?',
+                               (key, _to_str(field))).fetchone()
+            return row[0] if row else None
+
+    def hgetall(self, key):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'hash') is None:
+                return {}
+            return dict(conn.execute('SELECT field, value FROM kv_members WHERE key = ?', (key,)).fetchall())
+
+    def hincrby(self, key, field, amount=1):
+        with self._transaction() as conn:
+            self._ensure(conn, key, 'hash')
+            row = conn.execute('SELECT value FROM kv_members WHERE key = ? AND field = ?',
+                               (key, _to_str(field))).fetchone()
+            value = (_parse_int(row[0]) if row else 0) + int(amount)
+            conn.execute('INSERT OR REPLACE INTO kv_members (key, field, value) VALUES (?, ?, ?)',
+                         (key, _to_str(field), str(value)))
+            self._touch(conn)
+            return value
+
+    def hdel(self, key, *fields):
+        with self._transaction() as conn:
+            if self._kind(conn, key, 'hash') is None:
+                return 0
+            removed = sum(conn.execute('DELETE FROM kv_members WHERE key = ? AND field = ?',
+                                       (key, _to_str(f))).rowcount for f in fields)
+            self._drop_if_empty(conn, key)
+            return removed
+
+    # ---------- 정렬 집합 (kv_members.field = 멤버, value = 점수) ----------
+
+    ZSET_ORDER = 'ORDER BY CAST(value AS REAL) DESC, field DESC'
+
+    def _zscore(self, conn, key, member):
+        row = conn.execute('SELECT value FROM kv_members WHERE key = ? AND field = ?', (key, member)).fetchone()
+        return float(row[0]) if row else None
+
+    def zadd(self, key, mapping, nx=False, xx=False):
+        with self._transaction() as conn:
+            self._ensure(conn, key, 'zset')
+            added = 0
+            for member, score in mapping.items():
+                member = _to_str(member)
+                exists = self._zscore(conn, key, member) is not None
+                if (nx and exists) or (xx and not exists):
+                    continue
+                added += 0 if exists else 1
+                conn.execute('INSERT OR REPLACE INTO kv_members (key, field, value) VALUES (?, ?, ?)',
+                             (key, member, repr(float(score))))
+            self._drop_if_empty(conn, key)
+            self._touch(conn)
+            return added
+
+    def zincrby(self, key, amount, value):
+        with self._transaction() as conn:
+            self._ensure(conn, key, 'zset')
+            member = _to_str(value)
+            score = (self._zscore(conn, key, member) or 0.0) + float(amount)
+            conn.execute('INSERT OR REPLACE INTO kv_members (key, field, value) VALUES (?, ?, ?)',
+                         (key, member, repr(score)))
+            self._touch(conn)
+            return score
+
+    def zscore(self, key, value):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'zset') is None:
+                return None
+            return self._zscore(conn, key, _to_str(value))
+
+    def zcard(self, key):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'zset') is None:
+                return 0
+            return conn.execute('SELECT COUNT(*) FROM kv_members WHERE key = ?', (key,)).fetchone()[0]
+
+    def zrem(self, key, *values):
+        with self._transaction() as conn:
+            if self._kind(conn, key, 'zset') is None:
+                return 0
+            removed = sum(conn.execute('DELETE FROM kv_members WHERE key = ? AND field = ?',
+                                       (key, _to_str(v))).rowcount for v in values)
+            self._drop_if_empty(conn, key)
+            return removed
+
+    def zrevrange(self, key, start, end, withscores=False):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'zset') is None:
+                return []
+            query = f'SELECT field, value FROM kv_members WHERE key = ? {self.ZSET_ORDER}'
+            if start >= 0 and end >= 0:
+                rows = conn.execute(query + ' LIMIT ? OFFSET ?', (key, max(end - start + 1, 0), start)).fetchall()
+            else:
+                rows = _range_slice(conn.execute(query, (key,)).fetchall(), start, end)
+            return [(member, float(score)) for member, score in rows] if withscores else [row[0] for row in rows]
+
+    def zrevrank(self, key, value):
+        with self._transaction(write=False) as conn:
+            if self._kind(conn, key, 'zset') is None:
+                return None
+            member = _to_str(value)
+            score = self._zscore(conn, key, member)
+            if score is None:
+                return None
+            return conn.execute(
+                'SELECT COUNT(*) FROM kv_members WHERE key = ? AND '
+                '(CAST(value AS REAL) > ? OR (CAST(value AS REAL) = ? AND field > ?))',
+                (key, score, score, member)).fetchone()[0]